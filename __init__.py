@@ -1,12 +1,5 @@
-import bpy
-
-from .operators import OP_OT_ClearScene
-from .operators import OP_OT_GenerateDataset
-from .panels import PL_PT_file
-from .panels import PL_PT_generator
-from .panels import PL_PT_gui
-from .panels import PL_PT_root
-from .properties import Properties
+# Blender modules are imported by register/unregister only, so the
+# gentool package (config, sampling, sharding) also loads without Blender.
 
 bl_info = {
     "name": "3D GenTool Lights",
@@ -19,26 +12,41 @@ bl_info = {
     "category": "Machine Learning Datasets"
 }
 
-classes = (
-    Properties,
-    OP_OT_ClearScene,
-    PL_PT_root,
-    PL_PT_gui,
-    PL_PT_file,
-    PL_PT_generator,
-    OP_OT_GenerateDataset,
-)
+
+def get_classes():
+    from .operators import OP_OT_ClearScene
+    from .operators import OP_OT_GenerateDataset
+    from .panels import PL_PT_file
+    from .panels import PL_PT_generator
+    from .panels import PL_PT_gui
+    from .panels import PL_PT_root
+    from .properties import Properties
+
+    return (
+        Properties,
+        OP_OT_ClearScene,
+        PL_PT_root,
+        PL_PT_gui,
+        PL_PT_file,
+        PL_PT_generator,
+        OP_OT_GenerateDataset,
+    )
 
 
 def register():
-    for cls in classes:
+    import bpy
+    from .properties import Properties
+
+    for cls in get_classes():
         bpy.utils.register_class(cls)
 
     bpy.types.Scene.tool = bpy.props.PointerProperty(type=Properties)
 
 
 def unregister():
-    for cls in classes:
+    import bpy
+
+    for cls in get_classes():
         bpy.utils.unregister_class(cls)
     del bpy.types.Scene.tool
 
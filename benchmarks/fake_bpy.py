@@ -0,0 +1,167 @@
+"""
+Minimal stand-ins for the bpy, bmesh and mathutils modules, enough to
+import gentool.utils and run its mesh and light helpers without Blender.
+Nothing is rendered: operators are no-ops.
+"""
+import sys
+import types
+
+import numpy as np
+
+
+class Matrix:
+    def __init__(self, rows=None):
+        self.m = np.eye(4) if rows is None else np.array(rows, dtype=np.float64)
+
+    @staticmethod
+    def Translation(vector):
+        m = np.eye(4)
+        m[:3, 3] = vector
+        return Matrix(m)
+
+    def copy(self):
+        return Matrix(self.m.copy())
+
+    def __matmul__(self, other):
+        return Matrix(self.m @ other.m)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.m.astype(dtype) if dtype is not None else self.m
+
+
+class Vector:
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self.values = tuple(values)
+
+    @property
+    def xyz(self):
+        return self.values
+
+    @xyz.setter
+    def xyz(self, values):
+        self.values = tuple(values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+
+class Vertices:
+    def __init__(self, co: np.ndarray):
+        self.co = np.asarray(co, dtype=np.float32).reshape(-1, 3)
+
+    def __len__(self):
+        return len(self.co)
+
+    def foreach_get(self, attribute: str, out: np.ndarray):
+        assert attribute == "co", "only co is supported"
+        out[:] = self.co.ravel()
+
+
+class Mesh:
+    def __init__(self, name: str = "", co=()):
+        self.name = name
+        self.vertices = Vertices(np.asarray(co).reshape(-1, 3))
+        self.materials = list()
+
+    def transform(self, matrix: Matrix):
+        m = np.asarray(matrix)
+        self.vertices.co = (self.vertices.co @ m[:3, :3].T + m[:3, 3]).astype(np.float32)
+
+    def update(self):
+        pass
+
+
+class LightData:
+    def __init__(self, name: str, type: str):
+        self.name = name
+        self.type = type
+        self.color = (1.0, 1.0, 1.0)
+        self.energy = 10.0
+
+
+class Object:
+    def __init__(self, name: str, object_data=None):
+        self.name = name
+        self.data = object_data
+        self.type = 'LIGHT' if isinstance(object_data, LightData) else 'MESH'
+        self._location = Vector()
+        self.scale = (1.0, 1.0, 1.0)
+        self.matrix_basis = Matrix()
+        self.matrix_world = Matrix()
+
+    @property
+    def location(self):
+        return self._location
+
+    @location.setter
+    def location(self, values):
+        self._location = Vector(values)
+
+    def select_set(self, _):
+        pass
+
+
+class Collection(list):
+    def __init__(self, factory):
+        super(Collection, self).__init__()
+        self.factory = factory
+
+    def new(self, *args, **kwargs):
+        item = self.factory(*args, **kwargs)
+        self.append(item)
+        return item
+
+    def remove(self, item, do_unlink=True):
+        list.remove(self, item)
+
+    def get(self, name):
+        return next((item for item in self if item.name == name), None)
+
+
+class _Anything:
+    """
+    Attribute chains and calls that do nothing, used for bpy.ops.
+    """
+
+    def __getattr__(self, _):
+        return _Anything()
+
+    def __call__(self, *args, **kwargs):
+        return {'FINISHED'}
+
+
+def create_modules() -> dict:
+    bpy = types.ModuleType("bpy")
+    bpy.data = types.SimpleNamespace(
+        objects=Collection(Object),
+        meshes=Collection(Mesh),
+        lights=Collection(LightData),
+        materials=Collection(lambda name: types.SimpleNamespace(name=name)),
+    )
+    collection = types.SimpleNamespace(objects=types.SimpleNamespace(link=lambda _: None))
+    bpy.context = types.SimpleNamespace(
+        view_layer=types.SimpleNamespace(active_layer_collection=types.SimpleNamespace(collection=collection)),
+        scene=_Anything(),
+        selected_objects=list(),
+    )
+    bpy.ops = _Anything()
+    bpy.types = types.SimpleNamespace(Operator=object, Panel=object, PropertyGroup=object)
+
+    mathutils = types.ModuleType("mathutils")
+    mathutils.Matrix = Matrix
+    mathutils.Vector = Vector
+
+    bmesh = types.ModuleType("bmesh")
+    bmesh.new = lambda: _Anything()
+    bmesh.ops = _Anything()
+
+    return {"bpy": bpy, "mathutils": mathutils, "bmesh": bmesh}
+
+
+def install():
+    """
+    Register the fake modules, real ones are left untouched if present.
+    """
+    for name, module in create_modules().items():
+        sys.modules.setdefault(name, module)
+    return sys.modules["bpy"]
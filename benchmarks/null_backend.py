@@ -0,0 +1,58 @@
+"""
+DataGenFunctsInterface implementation that does no Blender work, so the
+generator loop only pays its own orchestration cost.
+"""
+import types
+
+from gentool.translator import DataGenFunctsInterface
+
+
+class _Light:
+    __slots__ = ("location", "color", "data")
+
+    def __init__(self):
+        self.location = (0.0, 0.0, 0.0)
+        self.color = (0.0, 0.0, 0.0)
+        self.data = types.SimpleNamespace(energy=0)
+
+
+class _Object:
+    def select_set(self, _):
+        pass
+
+
+class NullFuncts(DataGenFunctsInterface):
+    def __init__(self, passes=("null",)):
+        self.passes = list(passes)
+        self.lights = list()
+        self.cursor = 0
+
+    def get_render_passes(self, r):
+        return self.passes
+
+    def define_texture(self, o):
+        return ""
+
+    def load_object(self, o, size_env):
+        return _Object()
+
+    def create_camera(self):
+        return None
+
+    def create_light(self, li, location=None, color=None):
+        if self.cursor == len(self.lights):
+            self.lights.append(_Light())
+        light = self.lights[self.cursor]
+        self.cursor += 1
+        light.location = location
+        light.color = color
+        return light
+
+    def get_light_params(self, light):
+        return [*light.location, *light.color]
+
+    def clear_lights(self):
+        self.cursor = 0
+
+    def render(self, path, render_style, texture, object_loaded):
+        return {}
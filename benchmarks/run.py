@@ -0,0 +1,185 @@
+"""
+CPU only benchmarks of the non-render overhead of the generator.
+
+python benchmarks/run.py                                  (default sizes)
+python benchmarks/run.py --sizes 10 1000 1000000          (frames per benchmark)
+python benchmarks/run.py --json out.json                  (save the results)
+python benchmarks/run.py --baseline out.json --tolerance 0.25
+                                                          (exit 1 on regressions)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+
+import fake_bpy  # noqa: E402
+from null_backend import NullFuncts  # noqa: E402
+
+from gentool.basics import Environment, Light, Object, Render, Viewpoint  # noqa: E402
+from gentool.sampling import SamplingEngine  # noqa: E402
+from gentool.sinks import CsvSink  # noqa: E402
+from gentool.translator import Config, ConfigIO, DatasetsGenerator  # noqa: E402
+
+
+def synthetic_config(output_dir_path: str, frames: int, objects: int = 1) -> Config:
+    per_object = max(frames // objects, 1)
+    return Config(
+        environment=Environment(dimension=1),
+        render=Render(128, 128, output_dir_path, [Render.Style.RASTERED]),
+        objects=[Object(f"object_{i}", f"object_{i}.obj", None, normalize=False) for i in range(objects)],
+        lights=[Light().dynamic_light([1, 1, 1], 5, 10), Light().rainbow_dynamic_light(5, 10)],
+        viewpoints=[Viewpoint().dynamic_camera_viewpoint(per_object, 5)],
+        seed=0
+    )
+
+
+def timed(function, repeat: int = 1) -> float:
+    """
+    Best wall time of `repeat` calls, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_generator(frames: int, workdir: str) -> float:
+    output_dir_path = os.path.join(workdir, f"generator_{frames}")
+
+    def run():
+        shutil.rmtree(output_dir_path, ignore_errors=True)
+        DatasetsGenerator(
+            synthetic_config(output_dir_path, frames), NullFuncts(), preview=False, open_output=False
+        ).run()
+
+    return timed(run)
+
+
+def bench_config_load(frames: int, workdir: str) -> float:
+    path = os.path.join(workdir, f"config_{frames}.json")
+    # One object per frame stresses the object list parsing.
+    with contextlib.redirect_stdout(io.StringIO()):  # json_dumps prints the config.
+        ConfigIO.json_dumps(synthetic_config(workdir, frames, objects=frames), path)
+    return timed(lambda: ConfigIO.json_loads(path), repeat=3)
+
+
+def bench_schedule(frames: int, workdir: str) -> float:
+    config = synthetic_config(workdir, frames)
+
+    def run():
+        # The schedule is computed by chunks, on access.
+        schedule = SamplingEngine.from_config(config).schedule()
+        for index in range(len(schedule)):
+            schedule.frame(index)
+
+    return timed(run, repeat=3)
+
+
+def bench_csv(frames: int, workdir: str) -> float:
+    header = ["index", "object", *(f"c{i}" for i in range(15))]
+    row = [0, "object", *np.random.rand(15).tolist()]
+
+    def run():
+        sink = CsvSink(os.path.join(workdir, f"csv_{frames}.csv"), header, fsync=False)
+        for index in range(frames):
+            row[0] = index
+            sink.write(row)
+        sink.close()
+
+    return timed(run)
+
+
+def bench_min_max(frames: int, _: str) -> float:
+    from gentool.utils import get_min_max
+
+    bpy = sys.modules["bpy"]
+    # frames is used as the amount of vertices.
+    mesh = bpy.data.meshes.new("bench", co=np.random.rand(frames, 3))
+    obj = bpy.data.objects.new("bench", object_data=mesh)
+    return timed(lambda: get_min_max(obj), repeat=3)
+
+
+def bench_light_pool(frames: int, _: str) -> float:
+    from gentool.utils import LightPool
+
+    pool = LightPool()
+
+    def run():
+        for _ in range(frames):
+            pool.acquire('POINT', (1.0, 1.0, 1.0), (0.0, 0.0, 0.0))
+            pool.acquire('POINT', (1.0, 1.0, 1.0), (0.0, 0.0, 0.0))
+            pool.release()
+
+    return timed(run)
+
+
+BENCHMARKS = {
+    "generator": bench_generator,
+    "config_load": bench_config_load,
+    "schedule": bench_schedule,
+    "csv": bench_csv,
+    "min_max": bench_min_max,
+    "light_pool": bench_light_pool,
+}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000], help="frames per benchmark.")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--json", default=None, help="save the results to this file.")
+    parser.add_argument("--baseline", default=None, help="compare against a saved results file.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline.")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    fake_bpy.install()
+
+    results = dict()
+    workdir = tempfile.mkdtemp(prefix="gentool-bench-")
+    try:
+        print(f"{'benchmark':<24}{'total (s)':>12}{'per frame (us)':>18}")
+        for name in args.only:
+            for frames in args.sizes:
+                seconds = BENCHMARKS[name](frames, workdir)
+                key = f"{name}[{frames}]"
+                results[key] = {"frames": frames, "seconds": seconds, "per_frame_us": seconds / frames * 1e6}
+                print(f"{key:<24}{seconds:>12.4f}{results[key]['per_frame_us']:>18.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json is not None:
+        with open(args.json, "w") as fw:
+            fw.write(json.dumps(results, indent=4, sort_keys=True))
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as fr:
+            baseline = json.load(fr)
+        regressions = [
+            key for key, result in results.items()
+            if key in baseline and result["seconds"] > baseline[key]["seconds"] * (1 + args.tolerance)
+        ]
+        for key in regressions:
+            print(f"REGRESSION {key}: {baseline[key]['seconds']:.4f}s -> {results[key]['seconds']:.4f}s")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
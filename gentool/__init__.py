@@ -0,0 +1,14 @@
+"""
+Config, sampling, sharding and manifest modules are pure python. The
+Blender backend (gentool.utils) imports bpy, load it with load_backend().
+"""
+
+
+def load_backend():
+    """
+    Import the Blender render backend.
+    :return: the DataGenFunctsInterface implementation class.
+    """
+    from .utils import DataGenApplyFuncts
+
+    return DataGenApplyFuncts
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 
 
 class Environment:
@@ -83,7 +83,7 @@ class Light:
                  color: list = None,
                  location: list = None,
                  max_range: int = 0,
-                 max_energy: int = 10
+                 max_energy: int = None  # W, LightCreator.DEFAULT_ENERGY if None
                  ):
         self.kind = kind
         self.color = color
@@ -137,13 +137,24 @@ class Viewpoint:
         DYNAMIC_CAMERA = "dynamic_camera"
         OBJECT_PATH = "object_path"
 
+    class Layout:  # distribución de las cámaras de OBJECT_PATH
+        UV_SPHERE = "uv_sphere"  # vertices of a UV sphere, horizontal and vertical divisions
+        FIBONACCI = "fibonacci"  # golden spiral of `amount` points
+        HEMISPHERE = "hemisphere"  # golden spiral of `amount` points, upper half only
+        ICOSPHERE = "icosphere"  # vertices of a subdivided icosahedron
+        LATITUDE_BANDS = "latitude_bands"  # vertical_divisions rings of horizontal_divisions points
+
     def __init__(self, kind: str = "",
                  location: list = None,
                  amount: int = 0,
                  size: int = 0,
                  horizontal_divisions: int = 0,
                  vertical_divisions: int = 0,
-                 max_range: int = 0
+                 max_range: int = 0,
+                 layout: str = Layout.UV_SPHERE,
+                 subdivisions: int = 0,
+                 min_elevation: float = -90,
+                 max_elevation: float = 90
                  ):
         self.max_range = max_range
         self.location = location
@@ -152,6 +163,10 @@ class Viewpoint:
         self.size = size
         self.vertical_divisions = vertical_divisions
         self.horizontal_divisions = horizontal_divisions
+        self.layout = layout
+        self.subdivisions = subdivisions
+        self.min_elevation = min_elevation
+        self.max_elevation = max_elevation
 
     def static_camera_viewpoint(self,
                                 location: List,
@@ -180,6 +195,27 @@ class Viewpoint:
 
         return self
 
+    def sphere_layout_viewpoint(self,
+                                layout: str,
+                                size: int,
+                                amount: int = 0,
+                                subdivisions: int = 0,
+                                horizontal_divisions: int = 0,
+                                vertical_divisions: int = 0,
+                                min_elevation: float = -90,
+                                max_elevation: float = 90):
+        self.kind = self.Kind.OBJECT_PATH
+        self.layout = layout
+        self.size = size
+        self.amount = amount
+        self.subdivisions = subdivisions
+        self.horizontal_divisions = horizontal_divisions
+        self.vertical_divisions = vertical_divisions
+        self.min_elevation = min_elevation
+        self.max_elevation = max_elevation
+
+        return self
+
 
 class Render:
     class Style:
@@ -189,8 +225,30 @@ class Render:
         RAY_TRACED = "ray-traced"
         RASTERED = "rastered"
 
-    def __init__(self, resolution_x: int, resolution_y: int, output_dir_path: str, styles: List[str]):
+    class Output:
+        SEPARATE = "separate"  # one render per style
+        MULTILAYER_EXR = "multilayer_exr"  # one render, every pass in a multilayer exr
+        PNG_PASSES = "png_passes"  # one render, one png per pass
+
+    # style_settings key of the single render of the MULTILAYER_EXR and PNG_PASSES outputs.
+    PASSES = "passes"
+
+    def __init__(self,
+                 resolution_x: int,
+                 resolution_y: int,
+                 output_dir_path: str,
+                 styles: List[str],
+                 style_settings: Dict[str, dict] = None,
+                 output: str = Output.SEPARATE):
+        """
+        :param styles: the Render.Style values rendered for every frame.
+        :param style_settings: per style overrides of "engine", "samples" and "denoise",
+                               Render.PASSES for the single render of the compositor outputs.
+        :param output: one of Render.Output.
+        """
         self.resolution_x = resolution_x
         self.resolution_y = resolution_y
         self.output_dir_path = output_dir_path
         self.styles = styles
+        self.style_settings = style_settings
+        self.output = output
@@ -0,0 +1,241 @@
+"""
+Headless entry point, no panels nor properties are registered:
+
+blender -b -P gentool/cli.py -- --config cfg.json                 (single process)
+blender -b -P gentool/cli.py -- --config cfg.json --shard 0/8     (one shard)
+python gentool/cli.py --config cfg.json --workers 8               (coordinator)
+python gentool/cli.py --config cfg.json --merge                   (merge the shard csv files)
+
+Shards run without the coordinator, on separate machines, draw their frames
+from the config seed and need the same NumPy version. Their outputs are copied
+into one output directory and merged with --merge.
+
+Shards are numbered from 0 to N - 1. Configs with sweeps (see gentool.sweep)
+render each job into a subdirectory of the output directory, in a single process.
+"""
+import argparse
+import os
+import sys
+
+# Blender runs this file as a script, make the gentool package importable.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gentool import load_backend  # noqa: E402
+from gentool.basics import Render  # noqa: E402
+from gentool.profiling import StageTimer  # noqa: E402
+from gentool.sampling import SamplingEngine, Schedule  # noqa: E402
+from gentool.schema import ConfigError  # noqa: E402
+from gentool.sharding import ShardCoordinator, ShardPlanner  # noqa: E402
+from gentool.sweep import Sweep, SweepRunner  # noqa: E402
+from gentool.translator import ConfigIO, DatasetsGenerator  # noqa: E402
+from gentool.writer import ImageWriter  # noqa: E402
+
+
+def parse_shard(value: str) -> tuple:
+    number, shards = value.split("/")
+    number, shards = int(number), int(shards)
+    if not 0 <= number < shards:
+        raise argparse.ArgumentTypeError(f"shard must be i/N with 0 <= i < N, got {value}")
+    return number, shards
+
+
+def parse_range(value: str) -> tuple:
+    start, stop = value.split(":")
+    return int(start), int(stop)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="gentool", description="Generate a dataset from a json config.")
+    parser.add_argument("--config", required=True, help="json config file.")
+    parser.add_argument("--workers", type=int, default=1, help="amount of blender processes.")
+    parser.add_argument("--shard", type=parse_shard, default=None, help="render only the shard i/N.")
+    parser.add_argument("--merge", action="store_true",
+                        help="merge the shard csv files of the output directory into data.csv and exit.")
+    parser.add_argument("--blender", default="blender", help="blender executable used by the workers.")
+    parser.add_argument("--preview", action="store_true", help="render only 1 frame per object.")
+    parser.add_argument("--resume", action="store_true", help="continue a previous run.")
+    parser.add_argument("--csv-batch-rows", type=int, default=1000, help="csv rows buffered before writing them.")
+    parser.add_argument("--csv-flush-interval", type=float, default=5.0, help="max seconds between csv writes.")
+    parser.add_argument("--parquet", action="store_true", help="also write data.parquet (needs pyarrow).")
+    parser.add_argument("--mesh-cache", default=None, help="directory of the normalized meshes cache.")
+    parser.add_argument("--swap-objects", action="store_true",
+                        help="keep the scene between objects and only swap the model.")
+    parser.add_argument("--tar-shards", type=int, default=None,
+                        help="pack the frames into WebDataset tar shards of this amount of frames.")
+    parser.add_argument("--memmap", action="store_true",
+                        help="store the renders and the csv values in numpy memmaps, no image files.")
+    parser.add_argument("--image-writer", choices=["png", "npy", "raw"], default=None,
+                        help="render in memory and write the images in background threads with this format.")
+    parser.add_argument("--compression", type=int, default=6, help="png compression of the image writer, 0 to 9.")
+    parser.add_argument("--writer-threads", type=int, default=2, help="threads of the image writer.")
+    parser.add_argument("--writer-queue", type=int, default=16, help="max images waiting to be written.")
+    parser.add_argument("--timing", action="store_true", help="write a per stage timing summary.")
+    parser.add_argument("--profile-frames", type=parse_range, default=None,
+                        help="capture the frames start:stop with cProfile.")
+    return parser.parse_args(argv)
+
+
+def generator_options(args) -> dict:
+    return dict(
+        csv_batch_rows=args.csv_batch_rows,
+        csv_flush_interval=args.csv_flush_interval,
+        parquet=args.parquet,
+        timer=StageTimer(enabled=args.timing, profile_frames=args.profile_frames),
+        swap_objects=args.swap_objects,
+        tar_shard_size=args.tar_shards,
+        memmap=args.memmap
+    )
+
+
+def backend(args):
+    image_writer = None
+    if args.image_writer is not None:
+        image_writer = ImageWriter(
+            image_format=args.image_writer,
+            compression=args.compression,
+            workers=args.writer_threads,
+            max_pending=args.writer_queue
+        )
+    return load_backend()(mesh_cache_dir=args.mesh_cache, image_writer=image_writer)
+
+
+def worker_args(args) -> list:
+    """
+    Command line options forwarded by the coordinator to its workers.
+    """
+    result = [
+        "--csv-batch-rows", str(args.csv_batch_rows),
+        "--csv-flush-interval", str(args.csv_flush_interval),
+    ]
+    if args.parquet:
+        result.append("--parquet")
+    if args.timing:
+        result.append("--timing")
+    if args.swap_objects:
+        result.append("--swap-objects")
+    if args.tar_shards is not None:
+        result += ["--tar-shards", str(args.tar_shards)]
+    if args.memmap:
+        result.append("--memmap")
+    if args.profile_frames is not None:
+        result += ["--profile-frames", f"{args.profile_frames[0]}:{args.profile_frames[1]}"]
+    if args.mesh_cache is not None:
+        result += ["--mesh-cache", os.path.abspath(args.mesh_cache)]
+    if args.image_writer is not None:
+        result += [
+            "--image-writer", args.image_writer,
+            "--compression", str(args.compression),
+            "--writer-threads", str(args.writer_threads),
+            "--writer-queue", str(args.writer_queue),
+        ]
+    return result
+
+
+def check_options(args, sweep: Sweep):
+    """
+    Reject the options the config does not support, before the workers start.
+    :raise ConfigError: with the config fields or options at fault.
+    """
+    errors = list()
+    if args.memmap and args.image_writer is not None:
+        errors.append(("--image-writer", "memmap stores the pixels in arrays, no image is written"))
+    if sweep.axes:
+        outputs = [job.data["render"].get("output", Render.Output.SEPARATE) for job in sweep]
+    else:
+        outputs = [ConfigIO.json_loads(args.config).render.output]
+    for output in dict.fromkeys(outputs):
+        errors += DatasetsGenerator.option_errors(output, args.memmap, args.image_writer is not None)
+    if errors:
+        raise ConfigError(errors, args.config)
+
+
+def run_shard(args):
+    config = ConfigIO.json_loads(args.config)
+    number, shards = args.shard
+    shard = next((sh for sh in ShardPlanner.plan(config, shards, args.preview) if sh.number == number), None)
+    if shard is None:
+        return  # more shards than frames.
+
+    schedule_path = os.path.join(config.render.output_dir_path, ShardCoordinator.SCHEDULE_NAME)
+    if os.path.exists(schedule_path):
+        schedule = Schedule.load(schedule_path, config)
+    elif config.seed is None:
+        # Every shard must draw the same frames.
+        raise SystemExit(f"{schedule_path} not found: shards run without the coordinator need a seed in the config.")
+    else:
+        schedule = SamplingEngine.from_config(config).schedule(args.preview)
+
+    functs = backend(args)
+    try:
+        DatasetsGenerator(
+            config=config,
+            functs=functs,
+            preview=args.preview,
+            frame_range=(shard.start, shard.stop),
+            csv_name=shard.csv_name,
+            open_output=False,
+            schedule=schedule,
+            resume=args.resume,
+            manifest_name=shard.manifest_name,
+            **generator_options(args)
+        ).run()
+    finally:
+        functs.close()
+
+
+def run_single(args):
+    functs = backend(args)
+    try:
+        DatasetsGenerator(
+            config=ConfigIO.json_loads(args.config),
+            functs=functs,
+            preview=args.preview,
+            open_output=False,
+            resume=args.resume,
+            **generator_options(args)
+        ).run()
+    finally:
+        functs.close()
+
+
+def run_sweep(args, sweep: Sweep):
+    functs = backend(args)
+    try:
+        SweepRunner(
+            sweep,
+            functs=functs,
+            preview=args.preview,
+            job_options=lambda: dict(resume=args.resume, **generator_options(args))
+        ).run()
+    finally:
+        functs.close()
+
+
+def main(argv):
+    args = parse_args(argv)
+    sweep = Sweep.load(args.config)
+
+    if args.merge:
+        output_dir_path = ConfigIO.json_loads(args.config).render.output_dir_path
+        rows = ShardCoordinator.merge_csv(output_dir_path)
+        print(f"{rows} rows merged into {os.path.join(output_dir_path, 'data.csv')}")
+        return
+
+    check_options(args, sweep)
+    if sweep.axes:
+        if args.shard is not None or args.workers > 1:
+            raise SystemExit("Sweeps run in a single process, --shard and --workers are not supported.")
+        run_sweep(args, sweep)
+    elif args.shard is not None:
+        run_shard(args)
+    elif args.workers > 1:
+        ShardCoordinator(
+            args.config, args.workers, blender=args.blender, preview=args.preview, resume=args.resume,
+            worker_args=worker_args(args)
+        ).run()
+    else:
+        run_single(args)
+
+
+if __name__ == "__main__":
+    main(sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:])
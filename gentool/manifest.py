@@ -0,0 +1,111 @@
+import glob
+import json
+import os
+
+from typing import Dict, Tuple
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_END = b"IEND\xaeB`\x82"
+
+
+def is_valid_image(path: str) -> bool:
+    """
+    Check that an image was fully written. PNG files must start with
+    the PNG signature and end with the IEND chunk.
+    :param path: image path.
+    """
+    size = os.path.getsize(path) if os.path.isfile(path) else 0
+    if size == 0:
+        return False
+
+    if not path.lower().endswith(".png"):
+        return True
+
+    if size < len(PNG_SIGNATURE) + len(PNG_END):
+        return False
+
+    with open(path, "rb") as fr:
+        head = fr.read(len(PNG_SIGNATURE))
+        fr.seek(-len(PNG_END), os.SEEK_END)
+        return head == PNG_SIGNATURE and fr.read() == PNG_END
+
+
+class FrameManifest:
+    NAME = "manifest.jsonl"
+    # Every manifest of an output directory, shard ones included.
+    PATTERN = "manifest*.jsonl"
+
+    def __init__(self, output_dir_path: str, name: str = NAME):
+        """
+        On disk record of the rendered outputs, one json line per
+        (object, index, style) entry. Paths are relative to the output directory.
+        :param output_dir_path: the output directory.
+        :param name: the manifest file name.
+        """
+        self.output_dir_path = output_dir_path
+        self.path = os.path.join(output_dir_path, name)
+        self.entries: Dict[Tuple[str, int], Dict[str, str]] = dict()
+        self.pending = list()
+        self.file = None
+
+    def load(self, frame_range: Tuple[int, int] = None):
+        """
+        Read the entries of previous runs from every manifest of the output
+        directory: entries are keyed by frame index, a resumed run finds them
+        whatever the shards that wrote them. A truncated last line, left by a crash, is ignored.
+        :param frame_range: [start, stop) frame indexes kept, all of them if None.
+        """
+        for path in sorted(glob.glob(os.path.join(glob.escape(self.output_dir_path), self.PATTERN))):
+            with open(path, "r") as fr:
+                for line in fr:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if frame_range is not None and not frame_range[0] <= entry["index"] < frame_range[1]:
+                        continue
+                    self.entries.setdefault((entry["object"], entry["index"]), dict())[entry["style"]] = entry["path"]
+
+        return self
+
+    def is_done(self, obj_name: str, index: int, style: str = None) -> bool:
+        """
+        A frame is done when it has entries and all of its outputs are valid.
+        :param obj_name: the object name.
+        :param index: the frame index.
+        :param style: only check this style if given.
+        """
+        styles = self.entries.get((obj_name, index))
+        if not styles or (style is not None and style not in styles):
+            return False
+        paths = styles.values() if style is None else [styles[style]]
+        return all(is_valid_image(os.path.join(self.output_dir_path, p)) for p in paths)
+
+    def add(self, obj_name: str, index: int, outputs: Dict[str, str]):
+        """
+        Record the outputs of a frame. Entries reach the disk on the next flush,
+        which is done once the frame metadata is written. They are not kept in
+        memory afterwards, only the entries loaded for a resume are.
+        :param obj_name: the object name.
+        :param index: the frame index.
+        :param outputs: style -> output path.
+        """
+        for style, path in outputs.items():
+            path = os.path.relpath(path, self.output_dir_path)
+            self.pending.append(json.dumps({"object": obj_name, "index": index, "style": style, "path": path}))
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.file is None:
+            self.file = open(self.path, "a")
+
+        self.file.write("\n".join(self.pending) + "\n")
+        self.file.flush()
+        self.pending = list()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
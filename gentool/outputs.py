@@ -0,0 +1,296 @@
+import json
+import os
+import shutil
+import tarfile
+import time
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .writer import ImageWriter
+
+# (object name, frame index, style -> path) entries for the manifest.
+Entries = List[Tuple[str, int, Dict[str, str]]]
+
+
+class DirectoryOutput:
+    # If true, every pass of a frame is rendered again when one of them is missing.
+    whole_frames = False
+    # If true, frames are rendered in memory and stored with write() instead of frame_path().
+    pixels = False
+
+    def __init__(self, output_dir_path: str):
+        """
+        One directory per frame: <output>/<object>/<index>/<style>.png
+        :param output_dir_path: the output directory.
+        """
+        self.output_dir_path = output_dir_path
+
+    def frame_path(self, obj_name: str, index: int) -> str:
+        """
+        The directory the outputs of a frame are rendered into.
+        """
+        path = os.path.join(self.output_dir_path, obj_name, f"{index}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def add(self, obj_name: str, index: int, outputs: Dict[str, str]) -> Entries:
+        """
+        Receive the rendered outputs of a frame.
+        :return: the manifest entries of the outputs already stored.
+        """
+        return [(obj_name, index, outputs)]
+
+    def add_row(self, index: int, row: list):
+        """
+        Receive the data.csv row of a frame.
+        """
+        pass
+
+    def finish_object(self, obj_name: str) -> Entries:
+        """
+        Called once every frame of the object is rendered and on disk.
+        :return: the manifest entries of the outputs stored meanwhile.
+        """
+        return []
+
+    def flush(self):
+        """
+        Called before the manifest is flushed, the stored outputs must reach the disk.
+        """
+        pass
+
+    def close(self):
+        pass
+
+
+class TarShardOutput(DirectoryOutput):
+    DIRECTORY = "shards"
+    STAGING = ".staging"
+    whole_frames = True  # a sample is only written with all of its passes.
+
+    def __init__(self, output_dir_path: str, prefix: str = "data", samples_per_shard: int = 1000):
+        """
+        Frames packed into tar shards in WebDataset layout: the files of a frame
+        are consecutive members named <object>-<index>.<style>.<ext>. Renders are
+        staged until their object is done, then moved into the shard.
+        Each shard is written as .tmp and renamed once complete, next to an index
+        file with the byte offset of every member.
+        :param output_dir_path: the output directory.
+        :param prefix: shard name prefix, distinct for each worker.
+        :param samples_per_shard: amount of frames of each shard.
+        """
+        super(TarShardOutput, self).__init__(output_dir_path)
+        self.prefix = prefix
+        self.samples_per_shard = samples_per_shard
+        self.directory = os.path.join(output_dir_path, self.DIRECTORY)
+        self.staging = os.path.join(output_dir_path, self.STAGING, prefix)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.number = self._next_number()
+        self.file = None
+        self.tar = None
+        self.samples = 0
+        self.index = list()
+        self.staged: Dict[Tuple[str, int], Dict[str, str]] = dict()
+
+    def _next_number(self) -> int:
+        # Shards of previous runs, complete or not, are never appended.
+        numbers = [
+            int(name[len(self.prefix) + 1:].split(".")[0])
+            for name in os.listdir(self.directory)
+            if name.startswith(self.prefix + "-") and name[len(self.prefix) + 1:].split(".")[0].isdigit()
+        ]
+        return max(numbers) + 1 if numbers else 0
+
+    @property
+    def shard_path(self) -> str:
+        return os.path.join(self.directory, f"{self.prefix}-{self.number:06d}.tar")
+
+    @staticmethod
+    def key(obj_name: str, index: int) -> str:
+        # WebDataset splits the key from the extension at the first dot.
+        return f"{obj_name}-{index:09d}".replace(".", "_")
+
+    def frame_path(self, obj_name: str, index: int) -> str:
+        path = os.path.join(self.staging, obj_name, f"{index}")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def add(self, obj_name: str, index: int, outputs: Dict[str, str]) -> Entries:
+        self.staged.setdefault((obj_name, index), dict()).update(outputs)
+        return []
+
+    def finish_object(self, obj_name: str) -> Entries:
+        frames = sorted(index for name, index in self.staged if name == obj_name)
+        entries = [self._pack(obj_name, index, self.staged.pop((obj_name, index))) for index in frames]
+        shutil.rmtree(os.path.join(self.staging, obj_name), ignore_errors=True)
+        return entries
+
+    def _pack(self, obj_name: str, index: int, outputs: Dict[str, str]) -> tuple:
+        if self.tar is None:
+            self.file = open(self.shard_path + ".tmp", "wb")
+            self.tar = tarfile.open(fileobj=self.file, mode="w")
+
+        key = self.key(obj_name, index)
+        shard_path = self.shard_path
+        for style, path in outputs.items():
+            info = tarfile.TarInfo(f"{key}.{style}{os.path.splitext(path)[1].lower()}")
+            info.size = os.path.getsize(path)
+            info.mtime = int(time.time())
+            with open(path, "rb") as fr:
+                self.tar.addfile(info, fr)
+            # Data is padded to 512 byte blocks after its header.
+            offset = self.tar.offset - -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+            self.index.append({
+                "object": obj_name, "index": index, "style": style,
+                "member": info.name, "offset": offset, "size": info.size
+            })
+            os.remove(path)
+
+        self.samples += 1
+        if self.samples >= self.samples_per_shard:
+            self._close_shard()
+        return obj_name, index, {style: shard_path for style in outputs}
+
+    def _close_shard(self):
+        if self.tar is None:
+            return
+        self.tar.close()  # writes the end of archive blocks, the file is left open.
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+        shard_path = self.shard_path
+        index_path = os.path.splitext(shard_path)[0] + ".idx.jsonl"
+        with open(index_path + ".tmp", "w") as fw:
+            fw.write("".join(json.dumps(entry) + "\n" for entry in self.index))
+        os.replace(index_path + ".tmp", index_path)
+        os.replace(shard_path + ".tmp", shard_path)
+
+        self.file = None
+        self.tar = None
+        self.samples = 0
+        self.index = list()
+        self.number += 1
+
+    def close(self):
+        """
+        Complete the current shard. Frames of unfinished objects are dropped,
+        their outputs are not in the manifest and are rendered again on resume.
+        """
+        self._close_shard()
+        self.staged = dict()
+        shutil.rmtree(self.staging, ignore_errors=True)
+        try:
+            os.rmdir(os.path.dirname(self.staging))  # only if no other worker uses it.
+        except OSError:
+            pass
+
+
+class MemmapOutput(DirectoryOutput):
+    DIRECTORY = "tensors"
+    CHANNELS = 4  # RGBA
+    # data.csv columns not stored in the params memmap.
+    TEXT_COLUMNS = ("index", "object", "texture")
+    pixels = True
+
+    def __init__(self,
+                 output_dir_path: str,
+                 prefix: str,
+                 styles: List[str],
+                 frame_range: Tuple[int, int],
+                 resolution: Tuple[int, int],
+                 header: List[str],
+                 dtype: str = "uint8"):
+        """
+        Fixed shape arrays a loader can map without decoding images:
+        <prefix>.<style>.npy     (frames, height, width, 4) pixels, first row at the top
+        <prefix>.params.npy      (frames, columns) float32 numeric columns of data.csv, nan until written
+        <prefix>.written.npy     (frames, styles) uint8, 1 once the frame of a style is stored
+        <prefix>.json            shapes, columns and the first frame index of the files
+        Row i of every array is the frame first_index + i. Existing files are reused on resume.
+        :param output_dir_path: the output directory.
+        :param prefix: file name prefix, distinct for each worker.
+        :param styles: the render passes.
+        :param frame_range: [start, stop) frame indexes stored.
+        :param resolution: (width, height) of the renders.
+        :param header: the data.csv columns.
+        :param dtype: uint8 for 8 bit sRGB pixels, float32 for linear pixels as rendered.
+        """
+        super(MemmapOutput, self).__init__(output_dir_path)
+        assert dtype in ("uint8", "float32"), "dtype must be uint8 or float32"
+        self.directory = os.path.join(output_dir_path, self.DIRECTORY)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.start, stop = frame_range
+        frames = stop - self.start
+        width, height = resolution
+        self.dtype = dtype
+        self.styles = list(styles)
+        self.columns = [i for i, name in enumerate(header) if name not in self.TEXT_COLUMNS]
+
+        self.paths = {style: os.path.join(self.directory, f"{prefix}.{style}.npy") for style in self.styles}
+        self.images = {
+            style: self._open(path, (frames, height, width, self.CHANNELS), dtype)
+            for style, path in self.paths.items()
+        }
+        self.params = self._open(
+            os.path.join(self.directory, f"{prefix}.params.npy"), (frames, len(self.columns)), "float32", np.nan
+        )
+        self.written = self._open(
+            os.path.join(self.directory, f"{prefix}.written.npy"), (frames, len(self.styles)), "uint8"
+        )
+
+        with open(os.path.join(self.directory, f"{prefix}.json"), "w") as fw:
+            fw.write(json.dumps({
+                "first_index": self.start,
+                "frames": frames,
+                "shape": [height, width, self.CHANNELS],
+                "dtype": dtype,
+                "styles": {style: os.path.basename(path) for style, path in self.paths.items()},
+                "params": {"file": f"{prefix}.params.npy", "columns": [header[i] for i in self.columns]},
+                "written": {"file": f"{prefix}.written.npy", "columns": self.styles},
+            }, indent=4))
+
+    @staticmethod
+    def _open(path: str, shape: tuple, dtype: str, fill=None) -> np.memmap:
+        if os.path.exists(path):
+            array = np.lib.format.open_memmap(path, mode="r+")
+            if array.shape == shape and array.dtype == np.dtype(dtype):
+                return array
+            del array  # another run layout, it is replaced.
+        array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+        if fill is not None:
+            array[:] = fill
+        return array
+
+    def write(self, index: int, pixels: Dict[str, np.ndarray]) -> Dict[str, str]:
+        """
+        Copy the rendered pixels of a frame into its slot.
+        :param index: the frame index.
+        :param pixels: style -> (height, width, channels) pixels, first row at the bottom.
+        :return: style -> memmap path, for the manifest.
+        """
+        slot = index - self.start
+        for style, values in pixels.items():
+            image = self.images[style]
+            if values.shape != image.shape[1:]:
+                raise ValueError(f"Render of shape {values.shape} does not fit the {image.shape[1:]} memmap.")
+            values = values[::-1]
+            image[slot] = ImageWriter.to_uint8(values) if self.dtype == "uint8" else values
+            self.written[slot, self.styles.index(style)] = 1
+        return {style: self.paths[style] for style in pixels}
+
+    def add_row(self, index: int, row: list):
+        self.params[index - self.start] = [row[i] for i in self.columns]
+
+    def flush(self):
+        for image in self.images.values():
+            image.flush()
+        self.params.flush()
+        self.written.flush()
+
+    def close(self):
+        self.flush()
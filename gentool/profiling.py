@@ -0,0 +1,166 @@
+import cProfile
+import csv
+import json
+import math
+import os
+import random
+import time
+
+from contextlib import nullcontext
+from typing import Dict, List, Tuple
+
+DISABLED = nullcontext()
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of sorted values.
+    :param values: sorted values.
+    :param q: percentile between 0 and 100.
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(q * len(values) / 100) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+class StageStats:
+    # Durations kept for the percentiles, exact up to this amount of executions.
+    RESERVOIR_SIZE = 1024
+
+    __slots__ = ("count", "total", "min", "max", "reservoir", "rng")
+
+    def __init__(self, seed: int = 0):
+        """
+        Streaming statistics of the durations of a stage, the memory does not
+        grow with the amount of executions. Percentiles are computed from a
+        uniform sample of the durations (reservoir sampling).
+        :param seed: seed of the sample, summaries of the same run are reproducible.
+        """
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.reservoir: List[float] = list()
+        self.rng = random.Random(seed)
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.min = min(self.min, duration)
+        self.max = max(self.max, duration)
+        if len(self.reservoir) < self.RESERVOIR_SIZE:
+            self.reservoir.append(duration)
+        else:
+            slot = self.rng.randrange(self.count)
+            if slot < self.RESERVOIR_SIZE:
+                self.reservoir[slot] = duration
+
+    def summary(self) -> dict:
+        values = sorted(self.reservoir)
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": self.max,
+        }
+
+
+class _Stage:
+    __slots__ = ("stats", "start")
+
+    def __init__(self, stats: StageStats):
+        self.stats = stats
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.stats.add(time.perf_counter() - self.start)
+        return False
+
+
+class _Profiled:
+    __slots__ = ("profiler",)
+
+    def __init__(self, profiler: cProfile.Profile):
+        self.profiler = profiler
+
+    def __enter__(self):
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *_):
+        self.profiler.disable()
+        return False
+
+
+class StageTimer:
+    TIMING_JSON = "timing.json"
+    TIMING_CSV = "timing.csv"
+    PROFILE = "profile.prof"
+    COLUMNS = ("count", "total", "mean", "min", "p50", "p90", "p99", "max")
+
+    def __init__(self, enabled: bool = False, profile_frames: Tuple[int, int] = None):
+        """
+        Records the wall time of every stage of a generation.
+        When disabled, stage() returns a shared no-op context.
+        :param enabled: record stage timings.
+        :param profile_frames: [start, stop) frame indexes captured with cProfile.
+        """
+        self.enabled = enabled
+        self.profile_frames = profile_frames
+        self.profiler = cProfile.Profile() if profile_frames is not None else None
+        self.stats: Dict[str, StageStats] = dict()
+
+    def stage(self, name: str):
+        """
+        Context manager timing one execution of a stage.
+        :param name: the stage name, "render:<pass>" for renders.
+        """
+        if not self.enabled:
+            return DISABLED
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = StageStats()
+        return _Stage(stats)
+
+    def frame(self, index: int):
+        """
+        Context manager wrapping the work of a frame, profiled if it is in profile_frames.
+        """
+        if self.profiler is None or not self.profile_frames[0] <= index < self.profile_frames[1]:
+            return DISABLED
+        return _Profiled(self.profiler)
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Count, total, extremes and percentiles, in seconds, of every stage.
+        """
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+    def save(self, output_dir_path: str, prefix: str = ""):
+        """
+        Write timing.json, timing.csv and, if captured, profile.prof.
+        :param output_dir_path: the output directory.
+        :param prefix: file name prefix, used by shards.
+        """
+        if self.enabled:
+            summary = self.summary()
+            with open(os.path.join(output_dir_path, prefix + self.TIMING_JSON), "w") as fw:
+                fw.write(json.dumps(summary, indent=4, sort_keys=True))
+
+            with open(os.path.join(output_dir_path, prefix + self.TIMING_CSV), "w", newline="") as fw:
+                writer = csv.writer(fw)
+                writer.writerow(["stage", *self.COLUMNS])
+                for name, stats in sorted(summary.items()):
+                    writer.writerow([name, *(stats[k] for k in self.COLUMNS)])
+
+        if self.profiler is not None:
+            self.profiler.dump_stats(os.path.join(output_dir_path, prefix + self.PROFILE))
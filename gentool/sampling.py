@@ -0,0 +1,219 @@
+import hashlib
+
+from typing import List
+
+import numpy as np
+
+from .basics import Light, Material, Viewpoint
+from .viewpoints import ViewpointSource, random_seed
+
+# Texture of each value of the material textures.
+TEXTURES = [Material.Texture.MARBLE, Material.Texture.CRYSTAL, Material.Texture.WOOD, Material.Texture.GOLD]
+
+
+class Schedule:
+    TEXTURES = TEXTURES
+
+    def __init__(self,
+                 engine,
+                 preview: bool = False,
+                 chunk_size: int = ViewpointSource.CHUNK_SIZE,
+                 digests: np.ndarray = None,
+                 numpy_version: str = None):
+        """
+        The parameters of every frame of a run, computed by chunks on demand so
+        the memory does not grow with the amount of frames. A chunk only depends
+        on the seed and its number: any frame is reachable without the previous ones.
+        The frames are only the same while the config and the NumPy random streams
+        are, which NumPy does not promise between versions: a loaded schedule checks
+        every chunk against the digest saved with it.
+        :param engine: the SamplingEngine with the config and the seed.
+        :param preview: if true, only 1 frame per object.
+        :param chunk_size: amount of frames computed together.
+        :param digests: digest of every chunk of a loaded schedule, None for a new one.
+        :param numpy_version: NumPy version the digests were computed with.
+        """
+        self.engine = engine
+        self.seed = engine.seed
+        self.preview = preview
+        self.chunk_size = chunk_size
+        self.cameras = ViewpointSource(engine.viewpoints, engine.objects, engine.seed, preview, chunk_size)
+        self.frames_per_object = self.cameras.frames_per_object
+        self.digests = digests
+        self.numpy_version = numpy_version
+        self.cached = (None, None)  # (chunk number, (locations, colors, textures, params))
+
+        if digests is not None and len(digests) != self.chunks:
+            raise ValueError(
+                f"The schedule has {len(digests)} chunks and the config {self.chunks}, the config changed."
+            )
+
+    def __len__(self):
+        return len(self.cameras)
+
+    @property
+    def chunks(self) -> int:
+        return -(-len(self) // self.chunk_size)
+
+    def digest(self, number: int) -> int:
+        """
+        Digest of every value of the chunk `number`.
+        """
+        return self._digest(number, self.chunk(number))
+
+    def _digest(self, number: int, data: tuple) -> int:
+        h = hashlib.blake2b(digest_size=8)
+        for values in (self.cameras.chunk(number), *data):
+            h.update(np.ascontiguousarray(values).tobytes())
+        return int.from_bytes(h.digest(), "little")
+
+    def chunk(self, number: int) -> tuple:
+        """
+        Lights and materials of the frames of the chunk `number`.
+        :return: light locations, light colors, material textures and material params.
+        """
+        if self.cached[0] == number:
+            return self.cached[1]
+
+        start = number * self.chunk_size
+        frames = max(min(self.chunk_size, len(self) - start), 0)
+        data = (
+            *self.engine.lights_chunk(np.random.default_rng([self.seed, number, 1]), frames),
+            *self.engine.materials_chunk(
+                np.random.default_rng([self.seed, number, 2]), start, frames, self.frames_per_object
+            )
+        )
+        if self.digests is not None and self._digest(number, data) != int(self.digests[number]):
+            raise ValueError(
+                f"Chunk {number} of the schedule differs from the saved one (NumPy {self.numpy_version}, "
+                f"now {np.__version__}). The config or the NumPy random streams changed, "
+                f"resume with the same config and NumPy version or start a new run."
+            )
+        self.cached = (number, data)
+        return data
+
+    def frame(self, index: int) -> tuple:
+        """
+        Parameters of the frame `index`, no replay needed.
+        :return: camera coordinates, light locations and light colors.
+        """
+        locations, colors, _, _ = self.chunk(index // self.chunk_size)
+        offset = index % self.chunk_size
+        return self.cameras[index], locations[offset], colors[offset]
+
+    def material(self, index: int) -> tuple:
+        """
+        Material of the frame `index`.
+        :return: the texture and the metallic, specular and roughness values.
+        """
+        _, _, textures, params = self.chunk(index // self.chunk_size)
+        offset = index % self.chunk_size
+        return TEXTURES[textures[offset]], params[offset]
+
+    def save(self, path: str):
+        """
+        The seed is saved with a digest of every chunk and the NumPy version, the
+        frames are computed again from the config and checked against the digests.
+        Computes every chunk once.
+        """
+        digests = self.digests
+        if digests is None:
+            digests = np.array([self.digest(number) for number in range(self.chunks)], dtype=np.uint64)
+        with open(path, "wb") as fw:
+            np.savez(
+                fw,
+                seed=self.seed,
+                frames_per_object=self.frames_per_object,
+                preview=self.preview,
+                chunk_size=self.chunk_size,
+                chunk_digests=digests,
+                numpy_version=self.numpy_version or np.__version__
+            )
+
+    @staticmethod
+    def load(path: str, config=None):
+        """
+        :param path: the schedule.npz file.
+        :param config: the Config of the run, the frames are computed again from it.
+        """
+        if config is None:
+            raise ValueError("The config is needed to load the schedule.")
+        with np.load(path) as data:
+            engine = SamplingEngine.from_config(config, seed=int(data["seed"]))
+            return Schedule(
+                engine,
+                preview=bool(data["preview"]),
+                chunk_size=int(data["chunk_size"]),
+                digests=data["chunk_digests"],
+                numpy_version=str(data["numpy_version"])
+            )
+
+
+class SamplingEngine:
+    def __init__(self,
+                 objects: int,
+                 lights: List[Light],
+                 viewpoints: List[Viewpoint],
+                 seed: int = None,
+                 materials: List[Material] = None):
+        """
+        Draws the schedule of a run from a seed.
+        :param objects: amount of objects.
+        :param lights: the Lights of the config.
+        :param viewpoints: the Viewpoints of the config.
+        :param seed: the seed, a random one is picked (and kept in the schedule) if None.
+        :param materials: the Material of each object, None for objects without material.
+        """
+        self.objects = objects
+        self.lights = lights
+        self.viewpoints = viewpoints
+        self.materials = materials if materials is not None else [None] * objects
+        self.seed = seed if seed is not None else random_seed()
+
+    @staticmethod
+    def from_config(config, seed: int = None):
+        """
+        :param seed: overrides the seed of the config.
+        """
+        return SamplingEngine(
+            len(config.objects), config.lights, config.viewpoints, seed if seed is not None else config.seed,
+            materials=[o.material for o in config.objects]
+        )
+
+    def lights_chunk(self, rng: np.random.Generator, frames: int) -> tuple:
+        # One draw for every light of every frame, the light kind picks what is used.
+        locations = rng.uniform(-1, 1, (frames, len(self.lights), 3))
+        colors = rng.uniform(0, 1, (frames, len(self.lights), 3))
+
+        for i, li in enumerate(self.lights):
+            locations[:, i] *= li.max_range
+            if li.kind == Light.Kind.STATIC_LIGHT:
+                locations[:, i] = li.location
+            if li.kind in (Light.Kind.STATIC_LIGHT, Light.Kind.DYNAMIC_LIGHT):
+                colors[:, i] = li.color
+
+        return locations, colors
+
+    def materials_chunk(self, rng: np.random.Generator, start: int, frames: int, frames_per_object: int) -> tuple:
+        textures = rng.integers(0, len(TEXTURES), frames)
+        params = rng.uniform(0, 1, (frames, 3))
+        if frames == 0 or frames_per_object == 0:
+            return textures, params
+
+        # Only the objects with frames in this chunk.
+        for i in range(start // frames_per_object, (start + frames - 1) // frames_per_object + 1):
+            material = self.materials[i]
+            block = slice(max(i * frames_per_object - start, 0), min((i + 1) * frames_per_object - start, frames))
+            if material is None:
+                textures[block] = 0
+                params[block] = np.nan
+                continue
+            if material.texture != Material.Texture.RANDOM and material.kind != Material.Kind.DYNAMIC_TEXTURE_AND_PARAMS:
+                textures[block] = TEXTURES.index(material.texture) if material.texture in TEXTURES else 0
+            if material.kind not in (Material.Kind.STATIC_TEXTURE_DYNAMIC_PARAMS, Material.Kind.DYNAMIC_TEXTURE_AND_PARAMS):
+                params[block] = (material.metallic, material.specular, material.roughness)
+
+        return textures, params
+
+    def schedule(self, preview: bool = False) -> Schedule:
+        return Schedule(self, preview)
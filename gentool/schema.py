@@ -0,0 +1,385 @@
+"""
+Declarative schema of the json configs. A whole file is checked before any
+Blender work and every error is reported at once, with its json path:
+
+$.lights[0].color: expected 3 items, got 2
+$.viewpoints[1].layout: expected one of fibonacci, hemisphere, ..., got 'fibonaci'
+
+The specs are built once at import, loading a config is a single pass over
+the json that checks it and builds the basics instances.
+"""
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from .basics import Environment, Light, Material, Object, Render, Viewpoint
+
+# Key of the sweeps of gentool.sweep, {"$sweep": [alternatives]}.
+SWEEP = "$sweep"
+
+# (json path, message)
+Errors = List[Tuple[str, str]]
+
+# RenderHandler engines, utils imports bpy and is not imported here.
+ENGINES = ("CYCLES", "BLENDER_EEVEE")
+
+
+def values_of(enum: type) -> Tuple[str, ...]:
+    """
+    The values of the constants of a Kind, Style, Layout... class.
+    """
+    return tuple(value for name, value in vars(enum).items() if name.isupper() and isinstance(value, str))
+
+
+class ConfigError(ValueError):
+    def __init__(self, errors: Errors, source: str = None):
+        """
+        :param errors: every (json path, message) found.
+        :param source: the config file, if any.
+        """
+        self.errors = errors
+        self.source = source
+        title = f"Invalid config {source}" if source is not None else "Invalid config"
+        super(ConfigError, self).__init__(
+            f"{title}, {len(errors)} error(s):\n" + "\n".join(f"  {path}: {message}" for path, message in errors)
+        )
+
+
+class Spec:
+    def __init__(self, required: bool = False, nullable: bool = False, default=None):
+        """
+        :param required: the key must be present.
+        :param nullable: null is a valid value.
+        :param default: value loaded when the key is missing, the constructor default if None.
+        """
+        self.required = required
+        self.nullable = nullable
+        self.default = default
+
+    def check(self, value, path: str, errors: Errors):
+        """
+        Append the errors of value to errors.
+        """
+        pass
+
+    def load(self, value):
+        """
+        The python value of a checked json value.
+        """
+        return value
+
+
+class Number(Spec):
+    def __init__(self, minimum: float = None, maximum: float = None, integer: bool = False, **kwargs):
+        super(Number, self).__init__(**kwargs)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.integer = integer
+        self.types = (int,) if integer else (int, float)
+
+    def check(self, value, path: str, errors: Errors):
+        # bool is an int subclass, true is not a number here.
+        if isinstance(value, bool) or not isinstance(value, self.types):
+            errors.append((path, f"expected {'an integer' if self.integer else 'a number'}, got {value!r}"))
+        elif self.minimum is not None and value < self.minimum:
+            errors.append((path, f"must be >= {self.minimum}, got {value!r}"))
+        elif self.maximum is not None and value > self.maximum:
+            errors.append((path, f"must be <= {self.maximum}, got {value!r}"))
+
+
+class Boolean(Spec):
+    def check(self, value, path: str, errors: Errors):
+        if not isinstance(value, bool):
+            errors.append((path, f"expected true or false, got {value!r}"))
+
+
+class String(Spec):
+    def __init__(self, choices: Tuple[str, ...] = None, empty: bool = True, **kwargs):
+        """
+        :param choices: the allowed values, any string if None.
+        :param empty: "" is a valid value.
+        """
+        super(String, self).__init__(**kwargs)
+        self.choices = choices
+        self.empty = empty
+
+    def check(self, value, path: str, errors: Errors):
+        if not isinstance(value, str):
+            errors.append((path, f"expected a string, got {value!r}"))
+        elif self.choices is not None and value not in self.choices:
+            errors.append((path, f"expected one of {', '.join(self.choices)}, got {value!r}"))
+        elif not self.empty and value == "":
+            errors.append((path, "must not be empty"))
+
+
+class Array(Spec):
+    def __init__(self, items: Spec, length: int = None, min_length: int = 0, **kwargs):
+        """
+        :param items: the spec of every item.
+        :param length: exact amount of items, any if None.
+        :param min_length: min amount of items.
+        """
+        super(Array, self).__init__(**kwargs)
+        self.items = items
+        self.length = length
+        self.min_length = min_length
+
+    def check(self, value, path: str, errors: Errors):
+        if not isinstance(value, list):
+            errors.append((path, f"expected a list, got {value!r}"))
+            return
+        if self.length is not None and len(value) != self.length:
+            errors.append((path, f"expected {self.length} items, got {len(value)}"))
+        elif len(value) < self.min_length:
+            errors.append((path, "must not be empty" if self.min_length == 1 else
+                           f"expected at least {self.min_length} items, got {len(value)}"))
+        for i, item in enumerate(value):
+            check_value(self.items, item, f"{path}[{i}]", errors)
+
+    def load(self, value):
+        return [load_value(self.items, item) for item in value]
+
+
+def vector(minimum: float = None, maximum: float = None, **kwargs) -> Array:
+    """
+    A list of 3 numbers: locations and colors.
+    """
+    return Array(Number(minimum, maximum), length=3, **kwargs)
+
+
+class Mapping(Spec):
+    def __init__(self, keys: Spec, values: Spec, **kwargs):
+        """
+        A dict of any amount of keys, like Render.style_settings.
+        """
+        super(Mapping, self).__init__(**kwargs)
+        self.keys = keys
+        self.values = values
+
+    def check(self, value, path: str, errors: Errors):
+        if not isinstance(value, dict):
+            errors.append((path, f"expected an object, got {value!r}"))
+            return
+        for key, item in value.items():
+            self.keys.check(key, f"{path}.{key}", errors)
+            check_value(self.values, item, f"{path}.{key}", errors)
+
+    def load(self, value):
+        return {key: load_value(self.values, item) for key, item in value.items()}
+
+
+class Record(Spec):
+    def __init__(self,
+                 fields: Dict[str, Spec],
+                 build: Callable = None,
+                 rules: List[Callable] = (),
+                 **kwargs):
+        """
+        A json object with known keys, unknown keys are errors.
+        :param fields: key -> spec.
+        :param build: called with the loaded fields as keyword arguments, a dict is returned if None.
+        :param rules: checks between fields, called with the value once every field is valid,
+                      each one returns the (key, message) errors found.
+        """
+        super(Record, self).__init__(**kwargs)
+        self.fields = fields
+        self.build = build
+        self.rules = rules
+
+    def check(self, value, path: str, errors: Errors):
+        if not isinstance(value, dict):
+            errors.append((path, f"expected an object, got {value!r}"))
+            return
+        found = len(errors)
+        for key in value:
+            if key not in self.fields:
+                errors.append((f"{path}.{key}", f"unknown key, expected one of {', '.join(self.fields)}"))
+        for key, spec in self.fields.items():
+            if key in value:
+                check_value(spec, value[key], f"{path}.{key}", errors)
+            elif spec.required:
+                errors.append((f"{path}.{key}", "missing required key"))
+        if len(errors) == found:
+            for rule in self.rules:
+                errors.extend((f"{path}.{key}", message) for key, message in rule(value))
+
+    def load(self, value):
+        loaded = {key: load_value(self.fields[key], item) for key, item in value.items()}
+        for key, spec in self.fields.items():
+            if key not in loaded and spec.default is not None:
+                loaded[key] = spec.default
+        return self.build(**loaded) if self.build is not None else loaded
+
+
+def check_value(spec: Spec, value, path: str, errors: Errors):
+    if value is None:
+        if not spec.nullable:
+            errors.append((path, "must not be null"))
+        return
+    if isinstance(value, dict) and SWEEP in value:
+        errors.append((path, "sweeps are only expanded by Sweep.load"))
+        return
+    spec.check(value, path, errors)
+
+
+def load_value(spec: Spec, value):
+    return None if value is None else spec.load(value)
+
+
+def light_rules(li: dict) -> Iterator[Tuple[str, str]]:
+    kind = li["kind"]
+    if kind in (Light.Kind.STATIC_LIGHT, Light.Kind.DYNAMIC_LIGHT) and li.get("color") is None:
+        yield "color", f"required by {kind} lights"
+    if kind == Light.Kind.STATIC_LIGHT and li.get("location") is None:
+        yield "location", f"required by {kind} lights"
+
+
+def viewpoint_rules(v: dict) -> Iterator[Tuple[str, str]]:
+    kind = v["kind"]
+    layout = v.get("layout", Viewpoint.Layout.UV_SPHERE)
+    amount = v.get("amount", 0)
+    if kind == Viewpoint.Kind.STATIC_CAMERA and v.get("location") is None:
+        yield "location", f"required by {kind} viewpoints"
+    if kind != Viewpoint.Kind.OBJECT_PATH:
+        if amount < 1:
+            yield "amount", f"must be >= 1 for {kind} viewpoints"
+        return
+    if layout in (Viewpoint.Layout.FIBONACCI, Viewpoint.Layout.HEMISPHERE) and amount < 1:
+        yield "amount", f"must be >= 1 for {layout} layouts"
+    if layout == Viewpoint.Layout.UV_SPHERE:
+        # bmesh needs at least 3 segments on both directions.
+        for key in ("horizontal_divisions", "vertical_divisions"):
+            if v.get(key, 0) < 3:
+                yield key, "must be >= 3 for uv_sphere layouts"
+    if layout == Viewpoint.Layout.LATITUDE_BANDS:
+        for key in ("horizontal_divisions", "vertical_divisions"):
+            if v.get(key, 0) < 1:
+                yield key, "must be >= 1 for latitude_bands layouts"
+        if v.get("min_elevation", -90) > v.get("max_elevation", 90):
+            yield "min_elevation", "must be <= max_elevation"
+
+
+def material_rules(m: dict) -> Iterator[Tuple[str, str]]:
+    kind = m.get("kind") or Material.Kind.STATIC_TEXTURE_AND_PARAMS
+    if kind != Material.Kind.DYNAMIC_TEXTURE_AND_PARAMS and m.get("texture", "") == "":
+        yield "texture", f"required by {kind} materials"
+
+
+def object_rules(o: dict) -> Iterator[Tuple[str, str]]:
+    # Names become output directories and csv values.
+    if "/" in o["name"] or "\\" in o["name"]:
+        yield "name", "must not contain path separators"
+
+
+def render_rules(r: dict) -> Iterator[Tuple[str, str]]:
+    if len(set(r["styles"])) != len(r["styles"]):
+        yield "styles", "repeated styles"
+
+
+ENVIRONMENT = Record({
+    "dimension": Number(minimum=0),
+}, build=Environment, required=True)
+
+MATERIAL = Record({
+    # Older configs have no kind, or an empty one: fixed texture and params.
+    "kind": String(choices=values_of(Material.Kind) + ("",), default=Material.Kind.STATIC_TEXTURE_AND_PARAMS),
+    "texture": String(choices=values_of(Material.Texture) + ("",)),
+    "metallic": Number(0, 1),
+    "specular": Number(0, 1),
+    "roughness": Number(0, 1),
+}, build=Material, rules=[material_rules], nullable=True)
+
+OBJECT = Record({
+    "name": String(empty=False, required=True),
+    "path": String(empty=False, required=True),
+    "material": MATERIAL,
+    "normalize": Boolean(),
+}, build=lambda material=None, **o: Object(material=material, **o), rules=[object_rules])
+
+LIGHT = Record({
+    "kind": String(choices=values_of(Light.Kind), required=True),
+    "color": vector(0, 1, nullable=True),
+    "location": vector(nullable=True),
+    "max_range": Number(minimum=0),
+    "max_energy": Number(minimum=0, nullable=True),
+}, build=Light, rules=[light_rules])
+
+VIEWPOINT = Record({
+    "kind": String(choices=values_of(Viewpoint.Kind), required=True),
+    "location": vector(nullable=True),
+    "amount": Number(minimum=0, integer=True),
+    "size": Number(minimum=0),
+    "horizontal_divisions": Number(minimum=0, integer=True),
+    "vertical_divisions": Number(minimum=0, integer=True),
+    "max_range": Number(minimum=0),
+    "layout": String(choices=values_of(Viewpoint.Layout)),
+    "subdivisions": Number(minimum=0, maximum=8, integer=True),  # 8 -> 655362 cameras
+    "min_elevation": Number(-90, 90),
+    "max_elevation": Number(-90, 90),
+}, build=Viewpoint, rules=[viewpoint_rules])
+
+STYLE_SETTINGS = Record({
+    "engine": String(choices=ENGINES),
+    "samples": Number(minimum=1, integer=True),
+    "denoise": Boolean(),
+})
+
+RENDER = Record({
+    "resolution_x": Number(minimum=1, integer=True, required=True),
+    "resolution_y": Number(minimum=1, integer=True, required=True),
+    "output_dir_path": String(empty=False, required=True),
+    "styles": Array(String(choices=values_of(Render.Style)), min_length=1, required=True),
+    "style_settings": Mapping(
+        String(choices=values_of(Render.Style) + (Render.PASSES,)), STYLE_SETTINGS, nullable=True
+    ),
+    "output": String(choices=values_of(Render.Output)),
+}, build=Render, rules=[render_rules], required=True)
+
+CONFIG = Record({
+    "environment": ENVIRONMENT,
+    "render": RENDER,
+    "objects": Array(OBJECT, min_length=1, required=True),
+    "lights": Array(LIGHT, min_length=1, required=True),
+    "viewpoints": Array(VIEWPOINT, min_length=1, required=True),
+    "seed": Number(minimum=0, integer=True, nullable=True),
+})
+
+
+def validate(config: dict) -> Errors:
+    """
+    Check a json config.
+    :param config: the parsed json.
+    :return: every error found, empty if the config is valid.
+    """
+    errors = list()
+    check_value(CONFIG, config, "$", errors)
+    return errors
+
+
+def load(config: dict, source: str = None) -> dict:
+    """
+    Check a json config and build its parts.
+    :param config: the parsed json.
+    :param source: the config file, for the error message.
+    :return: the keyword arguments of Config.
+    :raise ConfigError: with every error found.
+    """
+    errors = validate(config)
+    if errors:
+        raise ConfigError(errors, source)
+    return CONFIG.load(config)
+
+
+def to_json(instance) -> object:
+    """
+    The json form of a basics instance, the lists and dicts it holds are
+    converted too. Unlike ConfigIO.json_dumps, instances are left untouched.
+    """
+    if isinstance(instance, (Environment, Material, Object, Light, Viewpoint, Render)):
+        return {key: to_json(value) for key, value in vars(instance).items()}
+    if isinstance(instance, dict):
+        return {key: to_json(value) for key, value in instance.items()}
+    if hasattr(instance, "tolist"):  # numpy values
+        return instance.tolist()
+    if isinstance(instance, (str, bytes)) or not hasattr(instance, "__iter__"):
+        return instance
+    # lists, tuples and the vector properties of the GUI.
+    return [to_json(value) for value in instance]
@@ -0,0 +1,205 @@
+import csv
+import glob
+import os
+import subprocess
+
+from array import array
+from typing import List
+
+import numpy as np
+
+from .sampling import SamplingEngine
+from .translator import ConfigIO, Config, count_frames_per_object
+
+
+def csv_records(fr):
+    """
+    The rows of a csv file opened in binary mode, as (offset, bytes), the header
+    included. A quoted field may hold commas and line breaks: csv quotes come in
+    pairs, while their count is odd the row goes on in the next line.
+    """
+    offset = fr.tell()
+    record = b""
+    for line in fr:
+        record += line
+        if record.count(b'"') % 2 == 0:
+            yield offset, record
+            offset += len(record)
+            record = b""
+    if record:
+        yield offset, record
+
+
+class Shard:
+    def __init__(self, number: int, start: int, stop: int):
+        """
+        A contiguous range of frame indexes rendered by one worker.
+        :param number: shard number.
+        :param start: first frame index (included).
+        :param stop: last frame index (excluded).
+        """
+        self.number = number
+        self.start = start
+        self.stop = stop
+
+    @property
+    def csv_name(self) -> str:
+        return f"data.shard-{self.number:03d}.csv"
+
+    @property
+    def manifest_name(self) -> str:
+        return f"manifest.shard-{self.number:03d}.jsonl"
+
+    def __len__(self):
+        return self.stop - self.start
+
+
+class ShardPlanner:
+    @staticmethod
+    def count_frames(config: Config, preview: bool = False) -> int:
+        """
+        Amount of frames of the whole work list (objects x viewpoint coordinates).
+        """
+        if config.render is None or config.render.styles == []:
+            return 0
+        return len(config.objects) * count_frames_per_object(config.viewpoints, preview)
+
+    @staticmethod
+    def split(total: int, shards: int) -> List[Shard]:
+        """
+        Split [0, total) into at most `shards` contiguous and balanced ranges.
+        :param total: amount of frames.
+        :param shards: amount of shards wanted.
+        :return: the list of non empty shards.
+        """
+        assert shards > 0, "shards must be greater than 0"
+        size, remainder = divmod(total, shards)
+        result, start = list(), 0
+        for number in range(shards):
+            stop = start + size + (1 if number < remainder else 0)
+            if stop > start:
+                result.append(Shard(number, start, stop))
+            start = stop
+        return result
+
+    @staticmethod
+    def plan(config: Config, shards: int, preview: bool = False) -> List[Shard]:
+        return ShardPlanner.split(ShardPlanner.count_frames(config, preview), shards)
+
+
+class ShardCoordinator:
+    WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+    SCHEDULE_NAME = "schedule.npz"
+
+    def __init__(self,
+                 config_path: str,
+                 workers: int,
+                 blender: str = "blender",
+                 preview: bool = False,
+                 resume: bool = False,
+                 worker_args: List[str] = None):
+        """
+        Launches one headless blender process per shard and merges their outputs.
+        :param config_path: the json config file.
+        :param workers: amount of blender processes.
+        :param blender: blender executable.
+        :param preview: if true, renders only 1 frame per object.
+        :param resume: if true, workers continue the shards of a previous run.
+        :param worker_args: extra command line arguments for the workers.
+        """
+        self.config_path = os.path.abspath(config_path)
+        self.config = ConfigIO.json_loads(self.config_path)
+        self.workers = workers
+        self.blender = blender
+        self.preview = preview
+        self.resume = resume
+        self.worker_args = worker_args or list()
+
+    def command(self, shard: Shard) -> List[str]:
+        command = [
+            self.blender, "-b", "--python", self.WORKER_SCRIPT, "--",
+            "--config", self.config_path, "--shard", f"{shard.number}/{self.workers}"
+        ]
+        if self.preview:
+            command.append("--preview")
+        if self.resume:
+            command.append("--resume")
+        return command + self.worker_args
+
+    def run(self) -> List[Shard]:
+        os.makedirs(self.config.render.output_dir_path, exist_ok=self.resume)
+
+        # Every worker reads its frames from the same schedule, kept between resumed runs.
+        schedule_path = os.path.join(self.config.render.output_dir_path, self.SCHEDULE_NAME)
+        if not (self.resume and os.path.exists(schedule_path)):
+            SamplingEngine.from_config(self.config).schedule(self.preview).save(schedule_path)
+
+        shards = ShardPlanner.plan(self.config, self.workers, self.preview)
+        processes = [(shard, subprocess.Popen(self.command(shard))) for shard in shards]
+
+        failed = [shard.number for shard, process in processes if process.wait() != 0]
+        if failed:
+            raise RuntimeError(f"Shards {failed} failed, partial outputs are kept.")
+
+        ShardCoordinator.merge_csv(self.config.render.output_dir_path)
+        return shards
+
+    @staticmethod
+    def merge_csv(output_dir_path: str, csv_name: str = "data.csv") -> int:
+        """
+        Merge the shard csv files into csv_name, ordered by frame index. The rows
+        already in csv_name are kept, so merging again after a resumed run, with
+        any amount of workers, never loses rows. A frame found in several files is
+        written once. Only the index and position of each row are kept in memory.
+        :param output_dir_path: the output directory.
+        :param csv_name: the merged csv, shard files are named <stem>.shard-NNN.csv.
+        :return: amount of rows of the merged file.
+        """
+        csv_path = os.path.join(output_dir_path, csv_name)
+        stem = os.path.splitext(csv_name)[0]
+        shard_paths = sorted(glob.glob(os.path.join(glob.escape(output_dir_path), f"{glob.escape(stem)}.shard-*.csv")))
+        # The merged file goes first, its rows win over the shard ones.
+        sources = ([csv_path] if os.path.exists(csv_path) else []) + shard_paths
+
+        header = b""
+        indexes, files, offsets, sizes = array("q"), array("q"), array("q"), array("q")
+        for number, path in enumerate(sources):
+            with open(path, "rb") as fr:
+                records = csv_records(fr)
+                _, first_record = next(records, (0, b""))
+                header = header or first_record
+                for offset, record in records:
+                    if record.strip():
+                        row = next(csv.reader([record.decode("utf-8")]))
+                        indexes.append(int(row[0]))
+                        files.append(number)
+                        offsets.append(offset)
+                        sizes.append(len(record))
+
+        indexes, files, offsets, sizes = (
+            np.frombuffer(a, dtype=np.int64) for a in (indexes, files, offsets, sizes)
+        )
+        order = np.lexsort((files, indexes))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = indexes[order][1:] != indexes[order][:-1]
+        order = order[first]
+
+        handles = [open(path, "rb") for path in sources]
+        try:
+            with open(csv_path + ".tmp", "wb") as fw:
+                fw.write(header)
+                for row in order:
+                    fr = handles[files[row]]
+                    fr.seek(offsets[row])
+                    fw.write(fr.read(sizes[row]))
+                fw.flush()
+                os.fsync(fw.fileno())
+        finally:
+            for fr in handles:
+                fr.close()
+        os.replace(csv_path + ".tmp", csv_path)
+
+        # Removed once their rows are in the merged file.
+        for path in shard_paths:
+            os.remove(path)
+        return len(order)
@@ -0,0 +1,147 @@
+import csv
+import os
+import time
+
+from typing import Callable, List
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional, only needed for parquet output.
+    pyarrow = None
+
+
+class MetadataSink:
+    def __init__(self,
+                 header: List[str],
+                 batch_rows: int = 1000,
+                 flush_interval: float = 5.0,
+                 on_flush: Callable = None):
+        """
+        Buffers the rows of data.csv and writes them in batches, the full
+        history is never kept in memory.
+        :param header: the column names.
+        :param batch_rows: flush when this amount of rows is buffered.
+        :param flush_interval: flush when this amount of seconds passed since the last flush.
+        :param on_flush: called after each flush, once the rows are on disk.
+        """
+        self.header = header
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self.rows = list()
+        self.last_flush = time.monotonic()
+
+    def write(self, row: list):
+        self.rows.append(row)
+        self.poll()
+
+    def poll(self):
+        """
+        Flush if the batch is full or the flush interval elapsed.
+        """
+        if len(self.rows) >= self.batch_rows or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self._write_rows(self.rows)
+            self.rows = list()
+        self._sync()
+        self.last_flush = time.monotonic()
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def _write_rows(self, rows: List[list]):
+        pass
+
+    def _sync(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class CsvSink(MetadataSink):
+    def __init__(self, path: str, header: List[str], append: bool = False, fsync: bool = True, **kwargs):
+        """
+        :param path: the csv file.
+        :param header: the column names, only written to new files.
+        :param append: if true, rows are appended to an existing file.
+        :param fsync: if true, every flush is synced to the disk.
+        """
+        super(CsvSink, self).__init__(header, **kwargs)
+        self.fsync = fsync
+
+        append = append and os.path.exists(path)
+        self.file = open(path, "a" if append else "w", newline="")
+        self.writer = csv.writer(self.file)
+        if not append:
+            self.writer.writerow(header)
+
+    def _write_rows(self, rows: List[list]):
+        self.writer.writerows(rows)
+
+    def _sync(self):
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
+class ParquetSink(MetadataSink):
+    def __init__(self, path: str, header: List[str], **kwargs):
+        """
+        Columnar copy of data.csv, one row group per batch. Needs pyarrow.
+        Parquet files can not be appended, an existing file gets a numbered sibling.
+        :param path: the parquet file.
+        :param header: the column names.
+        """
+        if pyarrow is None:
+            raise ImportError("pyarrow is required for parquet output.")
+        super(ParquetSink, self).__init__(header, **kwargs)
+
+        root, extension = os.path.splitext(path)
+        part = 0
+        while os.path.exists(path):
+            part += 1
+            path = f"{root}.{part}{extension}"
+
+        self.path = path
+        self.writer = None
+
+    def _write_rows(self, rows: List[list]):
+        table = pyarrow.table({name: [row[i] for row in rows] for i, name in enumerate(self.header)})
+        if self.writer is None:
+            self.writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+class MultiSink(MetadataSink):
+    def __init__(self, sinks: List[MetadataSink], **kwargs):
+        """
+        Writes the same rows to several sinks, flushing them together.
+        """
+        super(MultiSink, self).__init__(sinks[0].header, **kwargs)
+        self.sinks = sinks
+
+    def _write_rows(self, rows: List[list]):
+        for sink in self.sinks:
+            sink.rows.extend(rows)
+            sink.flush()
+
+    def close(self):
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
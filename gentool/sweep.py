@@ -0,0 +1,324 @@
+"""
+Parameter sweeps: a config whose fields hold lists of alternatives expands
+into one job per combination, each one a Config with its own output directory.
+
+"max_energy": {"$sweep": [10, 100, 1000]}
+
+Sweeps of different fields give the cartesian product of their values. Sweeps
+with the same "zip" name change together instead, their lists must have the
+same length:
+
+"resolution_x": {"$sweep": [256, 512], "zip": "resolution"},
+"resolution_y": {"$sweep": [256, 512], "zip": "resolution"}
+
+A sweep can be on any field, a whole object or list included. Jobs are computed
+on demand: a sweep of thousands of combinations is never held in memory.
+"""
+import hashlib
+import json
+import os
+
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from . import schema
+from .schema import ConfigError, Errors
+from .translator import Config, DataGenFunctsInterface, DatasetsGenerator, Progress
+
+SWEEP = schema.SWEEP
+ZIP = "zip"
+
+# Keys and indexes from the root of the config to a field.
+Path = Tuple[object, ...]
+
+
+def json_path(path: Path) -> str:
+    return "$" + "".join(f"[{key}]" if isinstance(key, int) else f".{key}" for key in path)
+
+
+def replace(data, path: Path, value):
+    """
+    A copy of data with the field at path replaced. Only the lists and dicts
+    along the path are copied, the rest is shared with data.
+    """
+    if not path:
+        return value
+    copy = list(data) if isinstance(data, list) else dict(data)
+    copy[path[0]] = replace(data[path[0]], path[1:], value)
+    return copy
+
+
+class Job:
+    def __init__(self, number: int, data: dict, params: Dict[str, object], output_dir_path: str):
+        """
+        One combination of a sweep.
+        :param number: position of the combination in the sweep.
+        :param data: the json config of the job, without sweeps.
+        :param params: json path -> value of every swept field.
+        :param output_dir_path: the output directory of the sweep, the job writes into a subdirectory.
+        """
+        self.number = number
+        self.params = params
+        # The id only depends on the job config, the same job keeps its directory between runs.
+        content = dict(data, render=dict(data["render"], output_dir_path=None))
+        self.id = hashlib.sha1(
+            json.dumps(content, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        ).hexdigest()[:12]
+        self.output_dir_path = os.path.join(output_dir_path, self.id)
+        self.data = replace(data, ("render", "output_dir_path"), self.output_dir_path)
+
+    def config(self) -> Config:
+        """
+        :raise ConfigError: if the combination is not valid.
+        """
+        return Config(**schema.load(self.data, source=f"job {self.id}"), validate=False)
+
+    def mesh_keys(self) -> tuple:
+        """
+        The models the job loads, jobs with the same keys can share them.
+        """
+        dimension = (self.data.get("environment") or dict()).get("dimension", 0)
+        return tuple(ObjectPool.key(o["path"], o.get("normalize", True), dimension) for o in self.data["objects"])
+
+
+class Sweep:
+    def __init__(self, data: dict, source: str = None):
+        """
+        :param data: the parsed json config, with sweeps.
+        :param source: the config file, for the error messages.
+        :raise ConfigError: if a sweep is malformed. The jobs are checked by validate().
+        """
+        self.data = data
+        self.source = source
+        # Each axis changes its fields together: (name, [(path, values)], length).
+        self.axes: List[Tuple[str, List[Tuple[Path, list]], int]] = list()
+
+        errors = list()
+        found = list()
+        self._find(data, (), found, errors)
+        if found and (not isinstance(data, dict) or not isinstance(data.get("render"), dict) or
+                      not isinstance(data["render"].get("output_dir_path"), str)):
+            errors.append((
+                "$.render.output_dir_path", "required by sweeps, jobs write into subdirectories of it"
+            ))
+
+        axes = dict()
+        for path, values, name in found:
+            # Sweeps without zip name are an axis on their own.
+            axes.setdefault(name if name is not None else path, list()).append((path, values))
+        for name, fields in axes.items():
+            lengths = {len(values) for _, values in fields}
+            if len(lengths) > 1:
+                errors += [
+                    (json_path(path), f"zip {name!r} sweeps must have the same length, got {len(values)}")
+                    for path, values in fields
+                ]
+            self.axes.append((name, fields, max(lengths)))
+        if errors:
+            raise ConfigError(errors, source)
+
+        self.length = 1
+        for _, _, length in self.axes:
+            self.length *= length
+
+    @staticmethod
+    def load(path: str):
+        """
+        Read a config file with sweeps, the jobs are checked by validate().
+        :raise ConfigError: if the file is not json or a sweep is malformed.
+        """
+        with open(path, "r") as fr:
+            try:
+                data = json.load(fr)
+            except json.JSONDecodeError as e:
+                raise ConfigError([("$", f"invalid json at line {e.lineno} column {e.colno}: {e.msg}")], path)
+        return Sweep(data, source=path)
+
+    @staticmethod
+    def has_sweeps(data) -> bool:
+        if isinstance(data, dict):
+            return SWEEP in data or any(Sweep.has_sweeps(value) for value in data.values())
+        if isinstance(data, list):
+            return any(Sweep.has_sweeps(value) for value in data)
+        return False
+
+    def _find(self, data, path: Path, found: list, errors: Errors):
+        if isinstance(data, list):
+            for i, value in enumerate(data):
+                self._find(value, path + (i,), found, errors)
+            return
+        if not isinstance(data, dict):
+            return
+        if SWEEP not in data:
+            for key, value in data.items():
+                self._find(value, path + (key,), found, errors)
+            return
+
+        values = data[SWEEP]
+        name = data.get(ZIP)
+        for key in data:
+            if key not in (SWEEP, ZIP):
+                errors.append((json_path(path + (key,)), f"unknown sweep key, expected {SWEEP} or {ZIP}"))
+        if not isinstance(values, list) or not values:
+            errors.append((json_path(path + (SWEEP,)), "expected a non empty list of alternatives"))
+        elif self.has_sweeps(values):
+            errors.append((json_path(path + (SWEEP,)), "sweeps can not be nested"))
+        elif name is not None and not isinstance(name, str):
+            errors.append((json_path(path + (ZIP,)), f"expected a string, got {name!r}"))
+        else:
+            found.append((path, values, name))
+
+    def __len__(self):
+        return self.length
+
+    def job(self, number: int) -> Job:
+        """
+        The job `number`, the last axis changes first.
+        """
+        if not 0 <= number < self.length:
+            raise IndexError(number)
+        data = self.data
+        params = dict()
+        rest = number
+        for _, fields, length in reversed(self.axes):
+            rest, choice = divmod(rest, length)
+            for path, values in fields:
+                data = replace(data, path, values[choice])
+                params[json_path(path)] = values[choice]
+        params = dict(sorted(params.items()))
+        return Job(number, data, params, self.data["render"]["output_dir_path"])
+
+    def __iter__(self) -> Iterator[Job]:
+        for number in range(self.length):
+            yield self.job(number)
+
+    def validate(self) -> Errors:
+        """
+        Check every job. An error shared by several jobs is reported once.
+        :return: the errors found, the jobs of each one are in the message.
+        """
+        errors = dict()
+        for job in self:
+            for path, message in schema.validate(job.data):
+                errors.setdefault((path, message), list()).append(job.id)
+        return [
+            (path, f"{message} (job{'s' if len(jobs) > 1 else ''} {', '.join(jobs[:3])}"
+                   f"{f' and {len(jobs) - 3} more' if len(jobs) > 3 else ''})")
+            for (path, message), jobs in errors.items()
+        ]
+
+    def plan(self) -> List[Job]:
+        """
+        Every job, the ones loading the same models one after the other so
+        the models are imported once for all of them. Groups keep the order
+        of their first job.
+        """
+        groups: Dict[tuple, List[int]] = dict()
+        for job in self:
+            groups.setdefault(job.mesh_keys(), list()).append(job.number)
+        return [self.job(number) for numbers in groups.values() for number in numbers]
+
+
+class ObjectPool:
+    def __init__(self, functs: DataGenFunctsInterface):
+        """
+        Models kept loaded between the jobs of a sweep. A model is hidden once
+        its frames are rendered and shown again by the next job that uses it.
+        :param functs: the DataGenFunctsInterface implementation.
+        """
+        self.functs = functs
+        self.loaded = dict()
+
+    @staticmethod
+    def key(path: str, normalize: bool, dimension: float) -> tuple:
+        return path, normalize, dimension
+
+    def acquire(self, o, dimension: float):
+        """
+        The loaded model of an Object, imported only the first time.
+        """
+        key = self.key(o.path, o.normalize, dimension)
+        if key in self.loaded:
+            self.functs.reuse_object(self.loaded[key])
+        else:
+            self.loaded[key] = self.functs.load_object(o, size_env=dimension)
+        return self.loaded[key]
+
+    def release(self, object_loaded):
+        self.functs.keep_object(object_loaded)
+
+    def objects(self) -> list:
+        return list(self.loaded.values())
+
+    def clear(self):
+        self.functs.clear_objects()
+        self.loaded = dict()
+
+
+class SweepRunner:
+    JOBS_NAME = "jobs.jsonl"
+
+    def __init__(self,
+                 sweep: Sweep,
+                 functs: DataGenFunctsInterface,
+                 preview: bool,
+                 job_options: Callable[[], dict] = dict):
+        """
+        Render every job of a sweep in this process. Jobs loading the same
+        models run one after the other and share them.
+        :param sweep: the Sweep.
+        :param functs: the DataGenFunctsInterface implementation.
+        :param preview: if true, renders only 1 frame per object of each job.
+        :param job_options: returns the other DatasetsGenerator arguments, called for each
+                            job so every one gets its own StageTimer.
+        """
+        self.sweep = sweep
+        self.functs = functs
+        self.preview = preview
+        self.job_options = job_options
+
+    def steps(self):
+        """
+        Yields the Progress of the whole sweep after each render.
+        :raise ConfigError: with the errors of every job, before rendering anything.
+        """
+        errors = self.sweep.validate()
+        if errors:
+            raise ConfigError(errors, self.sweep.source)
+
+        jobs = self.sweep.plan()
+        output_dir_path = self.sweep.data["render"]["output_dir_path"]
+        os.makedirs(output_dir_path, exist_ok=True)
+        with open(os.path.join(output_dir_path, self.JOBS_NAME), "w") as fw:
+            fw.write("".join(json.dumps({
+                "id": job.id, "number": job.number, "params": job.params, "output_dir_path": job.output_dir_path
+            }) + "\n" for job in jobs))
+
+        pool = ObjectPool(self.functs)
+        mesh_keys = None
+        progress = Progress(total=0)
+        try:
+            for remaining, job in zip(range(len(jobs), 0, -1), jobs):
+                if job.mesh_keys() != mesh_keys:
+                    pool.clear()  # the next jobs use other models.
+                    mesh_keys = job.mesh_keys()
+                generator = DatasetsGenerator(
+                    config=job.config(),
+                    functs=self.functs,
+                    preview=self.preview,
+                    open_output=False,
+                    object_pool=pool,
+                    **self.job_options()
+                )
+                estimated = False
+                for job_progress in generator.steps():
+                    if not estimated:
+                        # The next jobs are expected to have as many renders as this one.
+                        progress.total = progress.done + job_progress.total * remaining
+                        estimated = True
+                    yield progress.advance(job_progress.object_name)
+        finally:
+            pool.clear()
+
+    def run(self):
+        for _ in self.steps():
+            pass
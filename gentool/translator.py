@@ -1,12 +1,23 @@
 import json
 import os
+import time
 import webbrowser
 import csv
 
 from threading import Thread
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+import numpy as np
 
 from .basics import Environment, Object, Light, Viewpoint, Render, Material
+from . import schema
+from .manifest import FrameManifest
+from .outputs import DirectoryOutput, MemmapOutput, TarShardOutput
+from .profiling import StageTimer
+from .sampling import SamplingEngine, Schedule
+from .schema import ConfigError
+from .sinks import CsvSink, MultiSink, ParquetSink
+from .viewpoints import count_sphere_coords
 
 
 def process(o: Object) -> Dict:
@@ -15,11 +26,29 @@ def process(o: Object) -> Dict:
     return o.__dict__
 
 
-def reconstruct(o: Dict) -> Object:
-    if o.get('material') is not None:
-        mat = Material(**(o.get('material')))
-        o.update({'material': mat})
-    return Object(**o)
+def count_viewpoint_coords(v: Viewpoint) -> int:
+    """
+    Amount of camera coordinates a viewpoint produces, without creating them.
+    :param v: the Viewpoint
+    :return: the amount of coordinates.
+    """
+    if v.kind in (Viewpoint.Kind.STATIC_CAMERA, Viewpoint.Kind.DYNAMIC_CAMERA):
+        return v.amount
+    if v.kind == Viewpoint.Kind.OBJECT_PATH:
+        return count_sphere_coords(v)
+    return 0
+
+
+def count_frames_per_object(vs: List[Viewpoint], preview: bool) -> int:
+    """
+    Amount of frames rendered for each object of a config.
+    :param vs: a list of Viewpoints objects.
+    :param preview: if true, only 1 frame is rendered.
+    :return: the amount of frames.
+    """
+    if preview:
+        return 1
+    return sum(count_viewpoint_coords(v) for v in vs)
 
 
 class Config:
@@ -28,19 +57,31 @@ class Config:
                  render: Render,
                  objects: List[Object],
                  lights: List[Light],
-                 viewpoints: List[Viewpoint]):
-        assert environment is not None, "environment cant be None!"
-        assert objects != [], "objects is empty!"
-        assert lights != [], "lights is empty!"
-        assert viewpoints != [], "viewpoints is empty!"
-        if render is not None:
-            assert render.output_dir_path != "", "Output directory path not specified!"
+                 viewpoints: List[Viewpoint],
+                 seed: int = None,
+                 validate: bool = True):
+        """
+        :param validate: check the parts against the schema, ConfigError is raised with every error found.
+                         ConfigIO.json_loads already checked them.
+        """
+        if validate:
+            errors = schema.validate(schema.to_json({
+                "environment": environment,
+                "render": render,
+                "objects": objects,
+                "lights": lights,
+                "viewpoints": viewpoints,
+                "seed": seed
+            }))
+            if errors:
+                raise ConfigError(errors)
 
         self.environment = environment
         self.objects = objects
         self.lights = lights
         self.viewpoints = viewpoints
         self.render = render
+        self.seed = seed
 
 
 class ConfigIO:
@@ -51,7 +92,8 @@ class ConfigIO:
             "objects": [process(obj) for obj in instance.objects],
             "lights": [light.__dict__ for light in instance.lights] if instance.lights is not None else None,
             "viewpoints": [viewpoint.__dict__ for viewpoint in instance.viewpoints] if instance.lights is not None else None,
-            "render": instance.render.__dict__ if instance.render is not None else None
+            "render": instance.render.__dict__ if instance.render is not None else None,
+            "seed": instance.seed
         }
 
         if path is not None:
@@ -61,19 +103,18 @@ class ConfigIO:
         print(config)
 
     @staticmethod
-    def json_loads(path: str):
+    def json_loads(path: str) -> Config:
+        """
+        Read a config file, the whole file is checked before building the Config.
+        :raise ConfigError: with every error found and its json path.
+        """
         with open(path, "r") as fr:
-            config = json.load(fr)
-
-        config = {
-            "environment": Environment(**config.get("environment")),
-            "objects": [reconstruct(o) for o in config.get("objects")],
-            "lights": [Light(**li) for li in config.get("lights")] if config.get("lights") is not None else None,
-            "viewpoints": [Viewpoint(**v) for v in config.get("viewpoints")] if config.get("viewpoints") is not None else None,
-            "render": Render(**config.get("render")) if config.get("render") is not None else None
-        }
+            try:
+                config = json.load(fr)
+            except json.JSONDecodeError as e:
+                raise ConfigError([("$", f"invalid json at line {e.lineno} column {e.colno}: {e.msg}")], path)
 
-        return Config(**config)
+        return Config(**schema.load(config, source=path), validate=False)
 
 
 class DataGenFunctsInterface:
@@ -86,19 +127,12 @@ class DataGenFunctsInterface:
         """
         pass
 
-    def create_viewpoints(self, vs: List[Viewpoint], preview: bool):
+    def create_light(self, li: Light, location: tuple = None, color: tuple = None):
         """
-        Create the viewpoints of the camera
-        :param vs: a list of Viewpoints objects.
-        :param preview: if true, returns only 1 coord.
-        :return:
-        """
-        pass
-
-    def create_light(self, li: Light):
-        """
-        Create a light based on params of light
+        Create a light based on params of light, with the energy of the Light.
         :param li: Light
+        :param location: scheduled location, sampled from li if None.
+        :param color: scheduled color, sampled from li if None.
         :return: None
         """
         pass
@@ -128,21 +162,22 @@ class DataGenFunctsInterface:
         """
         pass
 
-    def render(self, path: str, render_style: str, texture: str, object_loaded):
+    def render(self, path: str, render_style: str, texture: str, object_loaded) -> Dict[str, str]:
         """
         This method renders the image based on input render style.
-        This should be one of RenderManager.Kind variables.
+        This should be one of the passes returned by get_render_passes.
         :param path: to save the render
         :param render_style: Style to apply.
         :param object_loaded: Object to apply the style.
-        :param texture: object texture
-        :return: None
+        :param texture: object texture, None if the object has no material.
+        :return: the written files, style -> file path.
         """
         pass
 
     def clear_lights(self):
         """
-        This method should remove all lights.
+        This method should release the lights of the current frame,
+        they can be reused by the next create_light calls.
         """
         pass
 
@@ -154,9 +189,30 @@ class DataGenFunctsInterface:
         """
         pass
 
+    def apply_material(self, object_loaded, texture: str, metallic: float, specular: float, roughness: float):
+        """
+        This method sets the material of a frame. Only the values of the
+        material are changed, it must not be rebuilt.
+        :param object_loaded: Object to apply the material.
+        :param texture: a Material.Texture.
+        :param metallic: metallic value of the material.
+        :param specular: specular value of the material.
+        :param roughness: roughness value of the material.
+        """
+        pass
+
     def set_render_resolution(self, r: Render):
         """
         This method allows to change the render resolution.
+        It is called once per run, before any render.
+        :param r: Render config params.
+        """
+        pass
+
+    def get_render_passes(self, r: Render) -> List[str]:
+        """
+        This method returns the render passes of every frame. Frames
+        are rendered grouped by pass, each one is a render_style.
         :param r: Render config params.
         """
         pass
@@ -164,7 +220,7 @@ class DataGenFunctsInterface:
     def define_texture(self, o: Object):
         """
         This method returns a texture to show in the object.
-        :param o: Object config params
+        :param o: Object config params, only called for objects with a material.
         """
         pass
 
@@ -182,98 +238,459 @@ class DataGenFunctsInterface:
         """
         pass
 
-    def clear_objects(self):
+    def render_pixels(self, render_style: str, texture: str, object_loaded) -> Dict[str, np.ndarray]:
+        """
+        This method renders the scene in memory, no file is written.
+        :param render_style: the render pass.
+        :param texture: object texture, None if the object has no material.
+        :param object_loaded: reference of the object.
+        :return: render pass -> (height, width, channels) float pixels, first row at the bottom.
+        """
+        pass
+
+    def flush_outputs(self):
+        """
+        This method should wait until every output returned by render
+        is on disk. It is called before the manifest records them.
+        """
+        pass
+
+    def close(self):
+        """
+        Release the resources of the backend, once no generator uses it.
+        """
+        pass
+
+    def clear_objects(self, keep: list = ()):
+        """
+        Clear the scene objects, lights included.
+        :param keep: loaded objects not removed, hidden by keep_object.
+        """
+        pass
+
+    def unload_object(self, object_loaded):
+        """
+        Remove only the loaded object, keeping the camera, lights and world
+        for the next object.
+        :param object_loaded: reference returned by load_object.
+        """
+        pass
+
+    def keep_object(self, object_loaded):
+        """
+        Hide the loaded object instead of removing it, so it can be rendered again.
+        :param object_loaded: reference returned by load_object.
+        """
+        pass
+
+    def reuse_object(self, object_loaded):
         """
-        Clear the scene objects.
+        Show an object hidden by keep_object, with the materials it was loaded with.
+        :param object_loaded: reference returned by load_object.
         """
         pass
 
 
+class Progress:
+    def __init__(self, total: int):
+        """
+        Progress of a generation, in renders.
+        :param total: amount of renders to do.
+        """
+        self.total = total
+        self.done = 0
+        self.object_name = ""
+        self.start = time.perf_counter()
+
+    def advance(self, object_name: str):
+        self.done += 1
+        self.object_name = object_name
+        return self
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def fps(self) -> float:
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float:
+        """
+        Remaining seconds at the current speed.
+        """
+        fps = self.fps
+        return (self.total - self.done) / fps if fps > 0 else float("inf")
+
+    def __str__(self):
+        return f"{self.done}/{self.total} renders, {self.fps:.2f} renders/s, " \
+               f"ETA {self.eta:.0f}s, object {self.object_name}"
+
+
 class DatasetsGenerator(Thread):
-    def __init__(self, config: Config, functs: DataGenFunctsInterface, preview: bool):
+    def __init__(self,
+                 config: Config,
+                 functs: DataGenFunctsInterface,
+                 preview: bool,
+                 frame_range: Tuple[int, int] = None,
+                 csv_name: str = "data.csv",
+                 open_output: bool = True,
+                 schedule: Schedule = None,
+                 resume: bool = False,
+                 manifest_name: str = FrameManifest.NAME,
+                 csv_batch_rows: int = 1000,
+                 csv_flush_interval: float = 5.0,
+                 parquet: bool = False,
+                 timer: StageTimer = None,
+                 swap_objects: bool = False,
+                 tar_shard_size: int = None,
+                 memmap: bool = False,
+                 object_pool=None):
+        """
+        :param config: the Config to generate.
+        :param functs: the DataGenFunctsInterface implementation.
+        :param preview: if true, renders only 1 frame per object.
+        :param frame_range: [start, stop) of the frame indexes to render, None for all of them.
+        :param csv_name: name of the csv file inside the output directory.
+        :param open_output: if true, opens the output directory when finished.
+        :param schedule: precomputed frame parameters, drawn from the config seed if None.
+        :param resume: if true, continues a previous run skipping the frames of its manifest.
+        :param manifest_name: name of the manifest file inside the output directory.
+        :param csv_batch_rows: csv rows buffered before writing them.
+        :param csv_flush_interval: max seconds between csv writes.
+        :param parquet: if true, also writes the csv rows to a parquet file (needs pyarrow).
+        :param timer: records the time of each stage, disabled if None.
+        :param swap_objects: if true, the scene is kept between objects and only the model is swapped.
+        :param tar_shard_size: if set, frames are packed into tar shards of this amount of frames
+                               instead of a directory per frame.
+        :param memmap: if true, the renders are copied into a (frames, H, W, C) numpy memmap per style
+                       and the csv values into a float32 memmap, no image files are written.
+        :param object_pool: a sweep.ObjectPool, the models are taken from it and kept loaded
+                            for the next generators instead of being removed.
+        """
         super(DatasetsGenerator, self).__init__()
+        errors = self.option_errors(config.render.output, memmap)
+        if errors:
+            raise ConfigError(errors)
 
         self.config = config
         self.functs = functs
         self.preview = preview
+        self.frame_range = frame_range
+        self.csv_name = csv_name
+        self.open_output = open_output
+        self.schedule = schedule
+        self.resume = resume
+        self.manifest_name = manifest_name
+        self.csv_batch_rows = csv_batch_rows
+        self.csv_flush_interval = csv_flush_interval
+        self.parquet = parquet
+        self.timer = timer if timer is not None else StageTimer()
+        self.swap_objects = swap_objects
+        self.tar_shard_size = tar_shard_size
+        self.memmap = memmap
+        self.object_pool = object_pool
 
-    def run(self):
+    @staticmethod
+    def option_errors(output: str, memmap: bool, image_writer: bool = False) -> schema.Errors:
+        """
+        Check the generator options against the config, before rendering.
+        :param output: the Render.Output of the config.
+        :param memmap: the memmap option.
+        :param image_writer: if true, the backend writes the renders with an ImageWriter.
+        :return: the (json path, message) errors found.
+        """
+        errors = list()
+        if output == Render.Output.SEPARATE:
+            return errors
+        # The compositor writes the passes itself, there are no pixels per style.
+        if memmap:
+            errors.append((
+                "$.render.output",
+                f"memmap stores the pixels of each style, needs {Render.Output.SEPARATE!r}, got {output!r}"
+            ))
+        if image_writer:
+            errors.append((
+                "$.render.output",
+                f"the image writer encodes the pixels of each style, needs {Render.Output.SEPARATE!r}, got {output!r}"
+            ))
+        return errors
+
+    def in_range(self, start: int, stop: int) -> bool:
+        """
+        Check if any frame in [start, stop) belongs to this generator.
+        """
+        if self.frame_range is None:
+            return True
+        return start < self.frame_range[1] and self.frame_range[0] < stop
 
-        # self.functs.create_environment(self.config.environment)
-        os.makedirs(self.config.render.output_dir_path)
-        
-        if self.config.render.styles != []:
-            # Create the headers for saving lights in csv. 
-            lights_list = [
-                (f"light_{i}-x", f"light_{i}-y", f"light_{i}-z", f"light_{i}-r", f"light_{i}-g", f"light_{i}-b")
-                for i, _ in enumerate(self.config.lights)
-            ]
-            lights_list = [item for sublist in lights_list for item in sublist]
-            # Create the csv headers.
-            data_csv_list = [['index', 'object', 'view-x', 'view-y', 'view-z', *lights_list, ], ]
-            
-            csv_path = os.path.join(self.config.render.output_dir_path, f"data.csv")
-            csv_file = open(csv_path, "w", newline="")
-            writer = csv.writer(csv_file)
-            writer.writerows(data_csv_list)
-
-        index = 0
-
-        for obj in self.config.objects:
-
-            # Load the object and store the reference.
-            object_loaded = self.functs.load_object(obj, size_env=self.config.environment.dimension)
-            object_loaded.select_set(True)
-
-            # Create an object folder
-            obj_path = os.path.join(self.config.render.output_dir_path, obj.name)
-            os.makedirs(obj_path)
-
-            # Export normalized object
-            if obj.normalize:
-                self.functs.export_normalized_object(path=os.path.join(obj_path, f"normalized.obj"))
-
-            if self.config.render.styles == []:
+    def release_object(self, object_loaded):
+        """
+        Remove the object after its frames, only the model if swap_objects is set.
+        Models of the object pool are hidden instead.
+        """
+        if self.object_pool is not None:
+            with self.timer.stage("keep_object"):
+                self.object_pool.release(object_loaded)
+            if not self.swap_objects:
+                self.clear_scene()
+        elif self.swap_objects:
+            with self.timer.stage("unload_object"):
+                self.functs.unload_object(object_loaded)
+        else:
+            self.clear_scene()
+
+    def clear_scene(self):
+        with self.timer.stage("clear_objects"):
+            if self.object_pool is not None:
+                self.functs.clear_objects(keep=self.object_pool.objects())
+            else:
                 self.functs.clear_objects()
-                continue
-
-            camera = self.functs.create_camera()
-            viewpoints = self.functs.create_viewpoints(self.config.viewpoints, self.preview)
-            # Iterate over viewpoint
-            for _, viewpoint in enumerate(viewpoints):
-                # Iterate over each viewpoint coordinate
-                for coords in viewpoint:
-                    data_csv_list_item = [index, obj.name, *coords]
-                    # Move the camera to the coordinates
-                    self.functs.move_camara_to(camera, coords)
-                    # Create the lights
-                    for _, light in enumerate(self.config.lights):
-                        li = self.functs.create_light(light)
-                        li.data.energy = 1500
-                        light_params = self.functs.get_light_params(li)
-                        data_csv_list_item += light_params
-                    # Create the folder for saving the model renders.
-                    path_render_index = os.path.join(obj_path, f"{index}")
-                    os.makedirs(path_render_index)
-                    # Render the scene.
-                    self.functs.set_render_resolution(self.config.render)
-                    self.functs.render(
-                        path=path_render_index,
-                        render_style="",
-                        texture="",
-                        object_loaded=object_loaded
-                    )
-                    # Clear the lights
-                    self.functs.clear_lights()
-                    # Append the new row for csv saving.
-                    writer.writerow(data_csv_list_item)
-                    data_csv_list.append(data_csv_list_item)
-                    # Update index
-                    index += 1
-                # Todo: make UI progress bar.
-            self.functs.clear_objects()
+
+    @staticmethod
+    def read_csv_indexes(csv_path: str, frame_range: Tuple[int, int] = None) -> set:
+        """
+        Indexes of the rows already written in a csv file.
+        :param frame_range: [start, stop) indexes kept, all of them if None.
+        """
+        if not os.path.exists(csv_path):
+            return set()
+        with open(csv_path, "r", newline="") as fr:
+            reader = csv.reader(fr)
+            next(reader, None)
+            indexes = (int(row[0]) for row in reader if row)
+            if frame_range is None:
+                return set(indexes)
+            return {index for index in indexes if frame_range[0] <= index < frame_range[1]}
+
+    def steps(self):
+        """
+        Generate the dataset one render at a time. The generator yields a
+        Progress after each render, closing it cancels the generation and
+        flushes the csv and manifest files.
+        """
+        timer = self.timer
+        # Shards share the output directory, resumed runs reuse it.
+        sharded = self.frame_range is not None
+        exist_ok = sharded or self.resume
+        output_dir_path = self.config.render.output_dir_path
+        schedule_path = os.path.join(output_dir_path, "schedule.npz")
+        rendering = self.config.render.styles != []
+        materials = any(o.material is not None for o in self.config.objects)
+
+        # self.functs.create_environment(self.config.environment)
+        os.makedirs(output_dir_path, exist_ok=exist_ok)
+
+        manifest = FrameManifest(output_dir_path, self.manifest_name)
+        frame_output = None
+        # Rows written by a previous run, the only ones kept in memory.
+        resumed_indexes = set()
+        sink = None
+        if self.resume:
+            manifest.load(self.frame_range)
+
+        try:
+            if rendering:
+                # Create the headers for saving lights in csv. 
+                lights_list = [
+                    (f"light_{i}-x", f"light_{i}-y", f"light_{i}-z", f"light_{i}-r", f"light_{i}-g", f"light_{i}-b")
+                    for i, _ in enumerate(self.config.lights)
+                ]
+                lights_list = [item for sublist in lights_list for item in sublist]
+                # Create the csv headers.
+                header = ['index', 'object', 'view-x', 'view-y', 'view-z', *lights_list, ]
+                if materials:
+                    header += ['texture', 'metallic', 'specular', 'roughness']
+
+                csv_path = os.path.join(output_dir_path, self.csv_name)
+                if self.resume:
+                    resumed_indexes = self.read_csv_indexes(csv_path, self.frame_range)
+
+                def on_flush():
+                    # Manifest entries are written once the rows and images of their frames are on disk.
+                    self.functs.flush_outputs()
+                    if frame_output is not None:
+                        frame_output.flush()
+                    manifest.flush()
+
+                options = dict(
+                    batch_rows=self.csv_batch_rows,
+                    flush_interval=self.csv_flush_interval,
+                    on_flush=on_flush
+                )
+                if self.parquet:
+                    sink = MultiSink([
+                        CsvSink(csv_path, header, append=bool(resumed_indexes)),
+                        ParquetSink(os.path.splitext(csv_path)[0] + ".parquet", header)
+                    ], **options)
+                else:
+                    sink = CsvSink(csv_path, header, append=bool(resumed_indexes), **options)
+
+            if self.schedule is None and self.resume and os.path.exists(schedule_path):
+                # Skipped and rendered frames must keep the parameters of the first run.
+                self.schedule = Schedule.load(schedule_path, self.config)
+            if self.schedule is None:
+                with timer.stage("schedule"):
+                    self.schedule = SamplingEngine.from_config(self.config).schedule(self.preview)
+                if not sharded:
+                    self.schedule.save(schedule_path)
+
+            frames_per_object = count_frames_per_object(self.config.viewpoints, self.preview)
+
+            # Render settings are applied once for the whole run.
+            self.functs.set_render_resolution(self.config.render)
+            render_passes = self.functs.get_render_passes(self.config.render)
+
+            # Where the renders are stored.
+            prefix = os.path.splitext(self.csv_name)[0]
+            if self.memmap and rendering:
+                frame_output = MemmapOutput(
+                    output_dir_path,
+                    prefix=prefix,
+                    styles=render_passes,
+                    frame_range=self.frame_range or (0, len(self.schedule)),
+                    resolution=(self.config.render.resolution_x, self.config.render.resolution_y),
+                    header=header
+                )
+            elif self.tar_shard_size is not None:
+                frame_output = TarShardOutput(output_dir_path, prefix=prefix, samples_per_shard=self.tar_shard_size)
+            else:
+                frame_output = DirectoryOutput(output_dir_path)
+
+            # Objects of this generator with their frames still to render, per render pass.
+            work = list()
+            for i, obj in enumerate(self.config.objects):
+                first_index = i * frames_per_object
+                if not self.in_range(first_index, first_index + frames_per_object):
+                    continue  # None of the frames of this object belongs to the shard.
+                frames = range(first_index, first_index + frames_per_object)
+                if self.frame_range is not None:
+                    frames = range(max(frames.start, self.frame_range[0]), min(frames.stop, self.frame_range[1]))
+                # Ranges unless resuming, the plan does not grow with the amount of frames.
+                pending = {
+                    render_pass: [index for index in frames if not manifest.is_done(obj.name, index, render_pass)]
+                    if self.resume else frames
+                    for render_pass in render_passes
+                }
+                if self.resume and rendering and not any(pending.values()):
+                    continue  # Every frame of this object was rendered by a previous run.
+                if frame_output.whole_frames and self.resume:
+                    incomplete = sorted(set().union(*pending.values()))
+                    pending = {render_pass: incomplete for render_pass in render_passes}
+                work.append((obj, first_index, pending))
+
+            progress = Progress(total=sum(len(frames) for _, _, pending in work for frames in pending.values()))
+            # With swap_objects the camera and the lights are created once and reused.
+            scene_ready = False
+
+            for obj, first_index, pending in work:
+                # Load the object and store the reference.
+                with timer.stage("load_object"):
+                    if self.object_pool is not None:
+                        object_loaded = self.object_pool.acquire(obj, self.config.environment.dimension)
+                    else:
+                        object_loaded = self.functs.load_object(obj, size_env=self.config.environment.dimension)
+                object_loaded.select_set(True)
+
+                # Create an object folder
+                obj_path = os.path.join(output_dir_path, obj.name)
+                os.makedirs(obj_path, exist_ok=exist_ok)
+
+                # Export normalized object, only once between shards.
+                if obj.normalize and self.in_range(first_index, first_index + 1):
+                    with timer.stage("export_normalized_object"):
+                        self.functs.export_normalized_object(path=os.path.join(obj_path, f"normalized.obj"))
+
+                if not rendering:
+                    self.release_object(object_loaded)
+                    continue
+
+                if not scene_ready:
+                    with timer.stage("create_camera"):
+                        camera = self.functs.create_camera()
+                    scene_ready = self.swap_objects
+                texture = self.functs.define_texture(obj) if obj.material is not None else None
+                # Frames are grouped by render pass, so the engine state stays warm.
+                for pass_number, render_pass in enumerate(render_passes):
+                    render_stage = f"render:{render_pass}"
+                    # Iterate over the scheduled frames of the object
+                    for index in pending[render_pass]:
+                        with timer.frame(index):
+                            coords, light_locations, light_colors = self.schedule.frame(index)
+                            data_csv_list_item = [index, obj.name, *coords]
+                            # Move the camera to the coordinates
+                            with timer.stage("move_camera"):
+                                self.functs.move_camara_to(camera, tuple(coords))
+                            # Create the lights
+                            with timer.stage("create_lights"):
+                                for i, light in enumerate(self.config.lights):
+                                    li = self.functs.create_light(
+                                        light, location=tuple(light_locations[i]), color=tuple(light_colors[i])
+                                    )
+                                    light_params = self.functs.get_light_params(li)
+                                    data_csv_list_item += light_params
+                            if materials:
+                                frame_texture, material_params = self.schedule.material(index)
+                                if obj.material is not None:
+                                    texture = frame_texture
+                                    with timer.stage("apply_material"):
+                                        self.functs.apply_material(object_loaded, texture, *material_params)
+                                # No material was applied: empty texture and nan params.
+                                data_csv_list_item += [texture or "", *material_params]
+                            # Render the scene, image write included.
+                            with timer.stage(render_stage):
+                                if frame_output.pixels:
+                                    outputs = frame_output.write(index, self.functs.render_pixels(
+                                        render_style=render_pass,
+                                        texture=texture,
+                                        object_loaded=object_loaded
+                                    ))
+                                else:
+                                    outputs = self.functs.render(
+                                        path=frame_output.frame_path(obj.name, index),
+                                        render_style=render_pass,
+                                        texture=texture,
+                                        object_loaded=object_loaded
+                                    )
+                            # Clear the lights
+                            with timer.stage("clear_lights"):
+                                self.functs.clear_lights()
+                            with timer.stage("metadata"):
+                                # The pass is done once the frame row is on disk.
+                                for entry in frame_output.add(obj.name, index, outputs):
+                                    manifest.add(*entry)
+                                # Append the new row for csv saving, on the first pass of the frame.
+                                # Once that pass is in the manifest its row is on disk, so a resumed
+                                # run only misses the rows of the frames whose first pass is pending.
+                                if pass_number == 0 and index not in resumed_indexes:
+                                    frame_output.add_row(index, data_csv_list_item)
+                                    sink.write(data_csv_list_item)
+                                else:
+                                    sink.poll()
+
+                        yield progress.advance(obj.name)
+                with timer.stage("finish_object"):
+                    self.functs.flush_outputs()
+                    for entry in frame_output.finish_object(obj.name):
+                        manifest.add(*entry)
+                self.release_object(object_loaded)
+
+            if scene_ready:
+                self.clear_scene()
+        finally:
+            if frame_output is not None:
+                frame_output.close()
+            if sink is not None:
+                sink.close()
+            manifest.close()
+            timer.save(output_dir_path, prefix=os.path.splitext(self.csv_name)[0] + ".")
+
         # Open output folder to see the results.
-        webbrowser.open('file:///' + os.path.abspath(self.config.render.output_dir_path))
-        
-        if self.config.render.styles != []:
-            csv_file.close()
\ No newline at end of file
+        if self.open_output:
+            webbrowser.open('file:///' + os.path.abspath(output_dir_path))
+
+    def run(self):
+        for _ in self.steps():
+            pass
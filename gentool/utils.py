@@ -1,13 +1,15 @@
+import hashlib
 import os
 import random
-from typing import List
 from mathutils import Matrix
 
 import bmesh
 import bpy
+import numpy as np
 
-from .basics import Material, Object, Light, Viewpoint, Environment, Render
+from .basics import Material, Object, Light, Environment, Render
 from .translator import DataGenFunctsInterface
+from .writer import ImageWriter
 
 
 class UtilsName:
@@ -57,37 +59,6 @@ class EnvironmentCreator:
 
 
 class ViewpointsCreator:
-    @staticmethod
-    def create_viewpoints(u_segments: int = 32, v_segments: int = 16, diameter: int = 1):
-        """
-        Create the mesh UV_sphere from params. These mesh vertexes will
-        be used for set the camera and iterate over, for render from
-        multiples places.
-        @param: u_segments : horizontal segments shown.
-        @param: v_segments : vertical segments shown.
-        @param: diameter : sphere diameter.
-        """
-        mesh = bpy.data.meshes.new(UtilsName.viewpoints_name)
-        vp_object = bpy.data.objects.new(UtilsName.viewpoints_name, mesh)
-
-        # Hide this object on rendering process
-        vp_object.hide_render = True
-        # Viewport previsualization is 'WIRE'
-        vp_object.display_type = 'WIRE'
-        # Set a transparent material for viewport
-        # rendering visualisation
-        MaterialHandler.set_transparent(vp_object)
-
-        view_layer = bpy.context.view_layer
-        view_layer.active_layer_collection.collection.objects.link(vp_object)
-
-        bm = bmesh.new()
-        bmesh.ops.create_uvsphere(bm, u_segments=u_segments, v_segments=v_segments, diameter=diameter)
-        bm.to_mesh(mesh)
-        bm.free()
-
-        return vp_object  # reference to the empty object created.
-
     @staticmethod
     def create_camera(location: tuple = (0, 0, 0)):
         """
@@ -138,24 +109,89 @@ class ViewpointsCreator:
 
 
 class LightCreator:
+    # Energy of the lights without max_energy, in W.
+    DEFAULT_ENERGY = 1500
+
     @staticmethod
-    def create_light(kind: str, color: tuple, location: tuple) -> object:
+    def create_light(kind: str, color: tuple, location: tuple, energy: float = DEFAULT_ENERGY) -> object:
         """
         Create a blender light source in the scene.
         @param: kind: 'POINT' or 'SUN'.
         @param: color: light color.
         @param: location: light location.
-        @param: range_position: max & min range to generate randoms locations.
+        @param: energy: light power in W.
         """
         light_data = bpy.data.lights.new(name=UtilsName.light_name, type=kind)
         light_object = bpy.data.objects.new(name=UtilsName.light_name, object_data=light_data)
         light_object.location = location
         light_data.color = color
+        light_data.energy = energy
         view_layer = bpy.context.view_layer
         view_layer.active_layer_collection.collection.objects.link(light_object)
 
         return light_object  # reference to the light created.
 
+    @staticmethod
+    def update_light(light_object, kind: str, color: tuple, location: tuple,
+                     energy: float = DEFAULT_ENERGY) -> object:
+        """
+        Update an existing blender light source instead of creating a new one.
+        @param: light_object: the light to update.
+        @param: kind: 'POINT' or 'SUN'.
+        @param: color: light color.
+        @param: location: light location.
+        @param: energy: light power in W.
+        """
+        if light_object.data.type != kind:
+            light_object.data.type = kind
+        light_object.location = location
+        light_object.data.color = color
+        light_object.data.energy = energy
+
+        return light_object
+
+
+class LightPool:
+    """
+    Keeps the blender lights alive between frames. Lights are created the
+    first time they are acquired and only updated afterwards.
+    """
+
+    def __init__(self):
+        self.lights = list()
+        self.cursor = 0
+
+    def acquire(self, kind: str, color: tuple, location: tuple,
+                energy: float = LightCreator.DEFAULT_ENERGY) -> object:
+        """
+        Get the next light of the pool, creating it if needed.
+        @param: kind: 'POINT' or 'SUN'.
+        @param: color: light color.
+        @param: location: light location.
+        @param: energy: light power in W.
+        """
+        if self.cursor < len(self.lights):
+            light_object = LightCreator.update_light(self.lights[self.cursor], kind, color, location, energy)
+        else:
+            light_object = LightCreator.create_light(kind, color, location, energy)
+            self.lights.append(light_object)
+
+        self.cursor += 1
+        return light_object
+
+    def release(self):
+        """
+        Make every light of the pool available for the next frame.
+        """
+        self.cursor = 0
+
+    def reset(self):
+        """
+        Forget the pooled lights, used once they have been removed from the scene.
+        """
+        self.lights = list()
+        self.cursor = 0
+
 
 def compute_translation(vmin, vmax, respect_to=0.0):
     c = (vmin + vmax) / 2
@@ -163,20 +199,28 @@ def compute_translation(vmin, vmax, respect_to=0.0):
     return round(d, 2)
 
 
+def get_vertices(o) -> np.ndarray:
+    """
+    Read every vertex coordinate of a mesh object in one bulk call.
+    @param: o : the mesh object.
+    :return: a (n, 3) float array with the local coordinates.
+    """
+    vertices = o.data.vertices
+    co = np.empty(len(vertices) * 3, dtype=np.float32)
+    vertices.foreach_get("co", co)
+    return co.reshape(-1, 3)
+
+
 def get_min_max(o, respect_to: tuple = (0, 0, 0)):
-    maxx = minx = miny = maxy = maxz = minz = 0
-    for v in o.data.vertices:
-        maxx = max(v.co.x, maxx)
-        minx = min(v.co.x, minx)
-        maxy = max(v.co.y, maxy)
-        miny = min(v.co.y, miny)
-        maxz = max(v.co.z, maxz)
-        minz = min(v.co.z, minz)
-    
+    co = get_vertices(o)
+    # The origin is always part of the box, as in the per-vertex loop.
+    vmin = co.min(axis=0, initial=0)
+    vmax = co.max(axis=0, initial=0)
+
     # Saber el mayor.
-    x = compute_translation(minx, maxx, respect_to=respect_to[0])
-    y = compute_translation(miny, maxy, respect_to=respect_to[1])
-    z = compute_translation(minz, maxz, respect_to=respect_to[2])
+    x = compute_translation(float(vmin[0]), float(vmax[0]), respect_to=respect_to[0])
+    y = compute_translation(float(vmin[1]), float(vmax[1]), respect_to=respect_to[1])
+    z = compute_translation(float(vmin[2]), float(vmax[2]), respect_to=respect_to[2])
 
     return x, y, z
 
@@ -188,46 +232,123 @@ class ObjectNormalizer:
         obj.scale = (scale_factor, scale_factor, scale_factor)
 
     @staticmethod
-    def translate_object(obj, to: tuple = (.0,.0,.0), tolerance=1): 
-        coords = coords_prev = None
-        counter = 0
-        
-        while coords != to and counter < tolerance:
-            coords = get_min_max(obj, respect_to=to)
-            
-            if (coords == coords_prev):
-                counter += 1
-                continue
-            
-            coords_prev = coords
-            bpy.ops.transform.transform(mode='TRANSLATION', value=(*coords, 0.0))
-            obj.data.transform(obj.matrix_world)
-            obj.matrix_world = Matrix()
+    def center_object(obj, to: tuple = (.0, .0, .0)):
+        """
+        Center the bounding box of the object at `to`. The object transform
+        (scale included) and the centering translation are baked into
+        the mesh with a single matrix transform.
+        @param: obj : the mesh object.
+        @param: to : where the bounding box center will be placed.
+        """
+        basis = obj.matrix_basis.copy()
+        co = get_vertices(obj)
+        if len(co):
+            m = np.array(basis, dtype=np.float64)
+            co = co @ m[:3, :3].T + m[:3, 3]
+            center = (co.min(axis=0) + co.max(axis=0)) / 2
+        else:
+            center = np.zeros(3)
+
+        translation = Matrix.Translation(tuple(np.asarray(to, dtype=np.float64) - center))
+        obj.data.transform(translation @ basis)
+        obj.matrix_basis = Matrix()
+        obj.data.update()
+
+
+class MeshCache:
+    """
+    Content addressed cache of imported and normalized models. Each entry
+    is a .blend library holding the model object with its mesh and materials,
+    appending it is much faster than importing and normalizing the source file.
+    """
+    EXTENSION = ".blend"
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(path: str, scene_dimension: int, normalize: bool) -> str:
+        """
+        Hash of the file content and of the normalization params.
+        """
+        digest = hashlib.sha256()
+        with open(path, "rb") as fr:
+            for chunk in iter(lambda: fr.read(MeshCache.CHUNK_SIZE), b""):
+                digest.update(chunk)
+        digest.update(f"|{scene_dimension}|{int(normalize)}".encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + MeshCache.EXTENSION)
+
+    def load(self, key: str):
+        """
+        Append the cached model to the scene.
+        :return: the model, None on a cache miss.
+        """
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+
+        with bpy.data.libraries.load(path, link=False) as (data_from, data_to):
+            data_to.objects = list(data_from.objects)
+        if not data_to.objects:
+            return None
+
+        obj = data_to.objects[0]
+        view_layer = bpy.context.view_layer
+        view_layer.active_layer_collection.collection.objects.link(obj)
+        return obj
+
+    def store(self, key: str, obj):
+        """
+        Write the model to the cache. The file is renamed into place, so
+        concurrent workers never read a partial entry.
+        """
+        path = self.path(key)
+        tmp_path = f"{path[:-len(MeshCache.EXTENSION)]}.{os.getpid()}.tmp{MeshCache.EXTENSION}"
+        bpy.data.libraries.write(tmp_path, {obj}, fake_user=True)
+        os.replace(tmp_path, path)
+
 
 class ObjectIO:
     extensions_allowed = {'.obj': bpy.ops.import_scene.obj}
 
     @staticmethod
-    def load(path: str, scene_dimension: int, normalize: bool) -> tuple:
+    def load(path: str, scene_dimension: int, normalize: bool, cache: MeshCache = None) -> tuple:
         """
         Load a file or directory from path and scale to fit the scene or
         downscale the model depending of params.
         @param: path : folder path.
+        @param: cache : if given, the normalized model is read from / written to it.
         """
         assert os.path.exists(path), "Not such file or directory!"
         _, extension = os.path.splitext(path)
         assert extension in ObjectIO.extensions_allowed, f"No extension allowed. Only {ObjectIO.extensions_allowed} are " \
                                                        f"supported for now. "
+
+        name = f"{UtilsName.model_name}-{os.path.basename(path)}"
+        key = MeshCache.key(path, scene_dimension, normalize) if cache is not None else None
+        if key is not None:
+            obj = cache.load(key)
+            if obj is not None:
+                obj.name = name
+                return obj
         
         ObjectIO.extensions_allowed.get(extension)(filepath=path, use_smooth_groups=True)
         obj = bpy.context.selected_objects[0]
-        obj.name = f"{UtilsName.model_name}-{os.path.basename(path)}"
+        obj.name = name
         obj.data.transform(obj.matrix_world)
         obj.matrix_world = Matrix()
 
         if normalize:  # Apply model fitting
             ObjectNormalizer.scale_object(obj, scene_dimension)
-            ObjectNormalizer.translate_object(obj, to=(0, 0, 0))
+            ObjectNormalizer.center_object(obj, to=(0, 0, 0))
+
+        if key is not None:
+            cache.store(key, obj)
 
         return obj
 
@@ -235,18 +356,42 @@ class ObjectIO:
     def export(path: str):
         bpy.ops.object.select_all(action='DESELECT')
         for ob in bpy.data.objects:
-            if UtilsName.model_name in ob.name:
+            # Hidden models are kept for other jobs of a sweep.
+            if UtilsName.model_name in ob.name and not ob.hide_render:
                 ob.select_set(True)
 
         bpy.ops.export_scene.obj(filepath=path, use_materials=False)
 
+
 class Cleaner:
     @staticmethod
-    def clear_scene():
-        objs = bpy.data.objects
-        for obj in objs:
-            print(f"Deleted object: type={obj.type}, name={obj.name}")
-            objs.remove(obj, do_unlink=True)
+    def clear_scene(keep: list = ()):
+        """
+        Remove every object of the scene.
+        @param keep: objects not removed.
+        """
+        objs = [obj for obj in bpy.data.objects if obj not in keep]
+        bpy.data.batch_remove(objs)
+
+    @staticmethod
+    def purge_orphans():
+        """
+        Remove, in a single call, the meshes and materials without users.
+        The library materials of MaterialHandler are kept for the next model.
+        """
+        keep = set(MaterialHandler.MATERIALS.values())
+        orphans = [mesh for mesh in bpy.data.meshes if mesh.users == 0]
+        orphans += [mat for mat in bpy.data.materials if mat.users == 0 and mat.name not in keep]
+        if orphans:
+            bpy.data.batch_remove(orphans)
+
+    @staticmethod
+    def remove_object(obj):
+        """
+        Unlink and remove an object, then purge the data it leaves behind.
+        """
+        bpy.data.objects.remove(obj, do_unlink=True)
+        Cleaner.purge_orphans()
 
 
 class RenderHandler:
@@ -267,33 +412,281 @@ class RenderHandler:
         scene.render.resolution_y = res_y
         scene.render.resolution_percentage = res_percentage
 
-    @staticmethod
-    def set_cycles(transparent: bool, samples: int):
+
+class StyleSettings:
+    def __init__(self, engine: str, samples: int, denoise: bool = False, shadeless: bool = False):
+        """
+        How a Render.Style is rendered.
+        @param engine: RenderHandler.ENGINE_CYCLES or RenderHandler.ENGINE_EEVEE.
+        @param samples: the amount of samples at rendering.
+        @param denoise: cycles denoising.
+        @param shadeless: render with the shadeless materials (masks).
         """
-        Set cycles paramethers.
-        @param transparent background transparency ?
-        @param samples the amount of samples at rendering
+        self.engine = engine
+        self.samples = samples
+        self.denoise = denoise
+        self.shadeless = shadeless
+
+    def override(self, settings: dict):
+        """
+        Copy of these settings updated with the "engine", "samples" and "denoise" keys of a dict.
+        """
+        settings = settings or dict()
+        return StyleSettings(
+            engine=settings.get("engine", self.engine),
+            samples=settings.get("samples", self.samples),
+            denoise=settings.get("denoise", self.denoise),
+            shadeless=self.shadeless
+        )
+
+
+class RenderSession:
+    """
+    Keeps the scene render settings between renders and only writes
+    them when they change, so switching engines happens once per group
+    of frames instead of twice per frame.
+    """
+
+    # The view transform the image writer encodes, ImageWriter.to_uint8 is the sRGB curve.
+    VIEW_STANDARD = 'Standard'
+
+    def __init__(self):
+        self.resolution = None
+        self.engine = None
+        self.samples = None
+        self.denoise = None
+        self.view_transform = None
+
+    def configure(self, res_x: int, res_y: int, res_percentage: int = 100, transparent: bool = True):
+        """
+        Apply the settings shared by every engine.
+        @param: res_x : width resolution.
+        @param: res_y : height resolution.
+        @param: res_percentage : percentage resolution.
+        @param: transparent : background transparency.
         """
+        resolution = (res_x, res_y, res_percentage)
+        if resolution == self.resolution:
+            return
+
+        RenderHandler.set_render_output_resolution(res_x, res_y, res_percentage)
         scene = bpy.context.scene
-        scene.render.engine = RenderHandler.ENGINE_CYCLES
-        # The samples to preview are 10
-        scene.cycles.preview_samples = 10
-        # Samples for rendering
-        scene.cycles.samples = samples
         scene.render.film_transparent = transparent  # background -> transparent
-        bpy.context.scene.render.image_settings.file_format = RenderHandler.IMG_FORMAT
-        bpy.context.scene.cycles.device = 'GPU'
+        scene.render.image_settings.file_format = RenderHandler.IMG_FORMAT
+        self.resolution = resolution
 
-    @staticmethod
-    def render(path: str, engine: str, samples: int):
-        bpy.context.scene.render.filepath = path
+    def use_engine(self, engine: str, samples: int, denoise: bool = False):
+        """
+        Switch the render engine, only if it is not the current one.
+        @param engine: RenderHandler.ENGINE_CYCLES or RenderHandler.ENGINE_EEVEE.
+        @param samples: the amount of samples at rendering.
+        @param denoise: cycles denoising.
+        """
+        if (engine, samples, denoise) == (self.engine, self.samples, self.denoise):
+            return
+
+        scene = bpy.context.scene
+        scene.render.engine = engine
         if engine == RenderHandler.ENGINE_CYCLES:
-            RenderHandler.set_cycles(transparent=True, samples=samples)
+            # The samples to preview are 10
+            scene.cycles.preview_samples = 10
+            scene.cycles.samples = samples
+            scene.cycles.device = 'GPU'
+            scene.cycles.use_denoising = denoise
         else:
-            bpy.context.scene.render.engine = RenderHandler.ENGINE_EEVEE
+            scene.eevee.taa_render_samples = samples
+
+        self.engine = engine
+        self.samples = samples
+        self.denoise = denoise
+
+    def use_view_transform(self, view_transform: str = VIEW_STANDARD):
+        """
+        Set the color management of the renders, without look nor exposure.
+        The pixels captured for the image writer are linear, the writer only
+        matches what Blender saves with the Standard view transform, not the
+        Filmic or AgX default.
+        @param view_transform: the scene view transform.
+        """
+        if view_transform == self.view_transform:
+            return
+
+        view_settings = bpy.context.scene.view_settings
+        view_settings.view_transform = view_transform
+        view_settings.look = 'None'
+        view_settings.exposure = 0
+        view_settings.gamma = 1
+        self.view_transform = view_transform
+
+    @staticmethod
+    def render(path: str = None):
+        """
+        Render the scene, into path if given. Without path only the
+        compositor outputs are written.
+        """
+        if path is None:
+            bpy.ops.render.render(use_viewport=True, write_still=False)
+            return
+        bpy.context.scene.render.filepath = path
         bpy.ops.render.render(use_viewport=True, write_still=True)
 
 
+class CompositorOutputs:
+    """
+    Writes the color, index, depth and normal passes of a single render
+    through a compositor File Output node.
+    """
+    NODE_NAME = f"{UtilsName.prefix}-FileOutput"
+    MULTILAYER_NAME = "passes"
+
+    # file slot -> render layers output socket
+    PASSES = {
+        "color": "Image",
+        "object_index": "IndexOB",
+        "material_index": "IndexMA",
+        "depth": "Depth",
+        "normal": "Normal",
+    }
+
+    def __init__(self, multilayer: bool):
+        """
+        @param multilayer: a single multilayer exr if true, one png per pass otherwise.
+        """
+        self.multilayer = multilayer
+        self.node = None
+
+    def setup(self):
+        """
+        Enable the view layer passes and build the compositor node tree.
+        """
+        scene = bpy.context.scene
+        view_layer = bpy.context.view_layer
+        view_layer.use_pass_z = True
+        view_layer.use_pass_normal = True
+        view_layer.use_pass_object_index = True
+        view_layer.use_pass_material_index = True
+
+        scene.use_nodes = True
+        tree = scene.node_tree
+        for node in [n for n in tree.nodes if n.name.startswith(UtilsName.prefix)]:
+            tree.nodes.remove(node)
+
+        layers = tree.nodes.get("Render Layers") or tree.nodes.new("CompositorNodeRLayers")
+        node = tree.nodes.new("CompositorNodeOutputFile")
+        node.name = CompositorOutputs.NODE_NAME
+        node.file_slots.clear()
+
+        if self.multilayer:
+            node.format.file_format = 'OPEN_EXR_MULTILAYER'
+            node.format.color_depth = '32'
+        else:
+            node.format.file_format = RenderHandler.IMG_FORMAT
+            node.format.color_mode = 'RGBA'
+
+        for slot, socket in CompositorOutputs.PASSES.items():
+            node.file_slots.new(slot)
+            output = layers.outputs.get(socket)
+            if not self.multilayer:
+                output = self._to_png(tree, slot, output)
+            tree.links.new(output, node.inputs[slot])
+
+        self.node = node
+        return node
+
+    @staticmethod
+    def _to_png(tree, slot: str, output):
+        """
+        Map a pass to the [0, 1] range a png can store.
+        """
+        if slot in ("object_index", "material_index"):
+            # Pixel value = index.
+            node = tree.nodes.new("CompositorNodeMath")
+            node.name = f"{UtilsName.prefix}-{slot}"
+            node.operation = 'DIVIDE'
+            node.inputs[1].default_value = 255
+            tree.links.new(output, node.inputs[0])
+            return node.outputs[0]
+        if slot == "depth":
+            node = tree.nodes.new("CompositorNodeNormalize")
+            node.name = f"{UtilsName.prefix}-{slot}"
+            tree.links.new(output, node.inputs[0])
+            return node.outputs[0]
+        if slot == "normal":
+            # n * 0.5 + 0.5
+            node = tree.nodes.new("CompositorNodeMixRGB")
+            node.name = f"{UtilsName.prefix}-{slot}"
+            node.blend_type = 'MULTIPLY'
+            node.use_clamp = False
+            node.inputs[2].default_value = (.5, .5, .5, 1)
+            tree.links.new(output, node.inputs[1])
+            shift = tree.nodes.new("CompositorNodeMixRGB")
+            shift.name = f"{UtilsName.prefix}-{slot}-shift"
+            shift.blend_type = 'ADD'
+            shift.inputs[2].default_value = (.5, .5, .5, 1)
+            tree.links.new(node.outputs[0], shift.inputs[1])
+            return shift.outputs[0]
+        return output
+
+    def outputs(self, path: str) -> dict:
+        """
+        Point the File Output node to path.
+        @param path: the frame directory.
+        :return: the files the next render writes, pass -> file path.
+        """
+        frame = f"{bpy.context.scene.frame_current:04d}"
+        if self.multilayer:
+            self.node.base_path = f"{path}/{CompositorOutputs.MULTILAYER_NAME}"
+            return {CompositorOutputs.MULTILAYER_NAME: f"{path}/{CompositorOutputs.MULTILAYER_NAME}{frame}.exr"}
+
+        self.node.base_path = path
+        return {slot: f"{path}/{slot}{frame}.{RenderHandler.IMG_FORMAT.lower()}" for slot in CompositorOutputs.PASSES}
+
+
+class ViewerCapture:
+    """
+    Reads the pixels of a render without writing a file. "Render Result"
+    pixels are not readable from python, the compositor Viewer node image is.
+    """
+    NODE_NAME = f"{UtilsName.prefix}-Viewer"
+    IMAGE_NAME = "Viewer Node"
+
+    def setup(self):
+        """
+        Link the render layers image to a Viewer node, keeping the Composite output.
+        """
+        scene = bpy.context.scene
+        scene.use_nodes = True
+        scene.render.use_compositing = True
+        tree = scene.node_tree
+        node = tree.nodes.get(ViewerCapture.NODE_NAME)
+        if node is not None:
+            tree.nodes.remove(node)
+
+        layers = tree.nodes.get("Render Layers") or tree.nodes.new("CompositorNodeRLayers")
+        if tree.nodes.get("Composite") is None:
+            composite = tree.nodes.new("CompositorNodeComposite")
+            tree.links.new(layers.outputs["Image"], composite.inputs["Image"])
+
+        node = tree.nodes.new("CompositorNodeViewer")
+        node.name = ViewerCapture.NODE_NAME
+        node.use_alpha = True
+        tree.links.new(layers.outputs["Image"], node.inputs["Image"])
+        tree.nodes.active = node  # the active viewer fills the image.
+        return node
+
+    @staticmethod
+    def pixels() -> np.ndarray:
+        """
+        RGBA float pixels of the last render, first row at the bottom.
+        :return: a (height, width, 4) array.
+        """
+        image = bpy.data.images[ViewerCapture.IMAGE_NAME]
+        width, height = image.size
+        buffer = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(buffer)
+        return buffer.reshape(height, width, 4)
+
+
 class LightEffect:
     """
     This class creates a global illumination
@@ -421,29 +814,14 @@ class MaterialHandler:
         @param model 3D object to apply the material
         @param apply_light function for light aplications.
         """
-        materials = bpy.data.materials
-        for i in materials:
-            if i.name == material_name:
-                model.active_material = i
-                apply_light()
-                return
-
-        materials = MaterialHandler.load_material(material_name=material_name)
-
-        for i in materials:
-            model.active_material = i
-
+        MaterialRegistry.apply(model, MaterialRegistry.key_of(material_name))
         apply_light()
 
-
     @staticmethod
     def apply_material_to(model, material: str, apply_light: callable):
         assert material in MaterialHandler.MATERIALS, "MaterialHandler not allowed!"
-        MaterialHandler._create_material(
-            material_name=MaterialHandler.MATERIALS.get(material), 
-            model=model, 
-            apply_light=apply_light
-        )
+        MaterialRegistry.apply(model, material)
+        apply_light()
 
     @staticmethod
     def modify_material_properties(model, metalic, specular, roughness):
@@ -461,6 +839,120 @@ class MaterialHandler:
         model.data.materials.clear()
 
 
+class MaterialRegistry:
+    """
+    Materials of MaterialHandler.MATERIALS loaded from the library in a single
+    pass and indexed by key, so swapping the material of a model does not
+    open the ".blend" file again.
+    """
+    LIBRARY = "//assets/materiales.blend"
+    # Principled BSDF inputs of the material params, "Specular IOR Level" since Blender 4.0
+    PARAM_INPUTS = (("Metallic",), ("Specular", "Specular IOR Level"), ("Roughness",))
+    # MaterialHandler key -> bpy material
+    materials = dict()
+    # MaterialHandler key -> (bpy material, metallic, specular and roughness sockets)
+    param_sockets = dict()
+
+    @staticmethod
+    def _valid(material) -> bool:
+        try:
+            return material.name is not None
+        except ReferenceError:  # removed from bpy.data
+            return False
+
+    @staticmethod
+    def preload(path: str = LIBRARY):
+        """
+        Load every missing material of MaterialHandler.MATERIALS with one libraries.load.
+        @param path materials location file
+        """
+        registry = MaterialRegistry.materials
+        for key, name in MaterialHandler.MATERIALS.items():
+            material = registry.get(key)
+            if material is None or not MaterialRegistry._valid(material):
+                material = bpy.data.materials.get(name)
+                if material is not None:
+                    registry[key] = material
+                else:
+                    registry.pop(key, None)
+
+        missing = [name for key, name in MaterialHandler.MATERIALS.items() if key not in registry]
+        if missing:
+            with bpy.data.libraries.load(path) as (data_from, data_to):
+                requested = [name for name in missing if name in data_from.materials]
+                data_to.materials = requested
+            # data_to keeps the requested order, names may get a suffix on clashes.
+            for name, material in zip(requested, data_to.materials):
+                if material is not None:
+                    material.use_fake_user = True  # keep it when the models are purged.
+                    registry[MaterialRegistry.key_of(name)] = material
+
+    @staticmethod
+    def key_of(material_name: str) -> str:
+        """
+        MaterialHandler key of a material name of the library.
+        """
+        for key, name in MaterialHandler.MATERIALS.items():
+            if name == material_name:
+                return key
+        raise KeyError(material_name)
+
+    @staticmethod
+    def get(key: str):
+        """
+        The material of a MaterialHandler key, the library is only opened if it is not loaded yet.
+        """
+        material = MaterialRegistry.materials.get(key)
+        if material is None or not MaterialRegistry._valid(material):
+            MaterialRegistry.preload()
+            material = MaterialRegistry.materials.get(key)
+        return material
+
+    @staticmethod
+    def apply(model, key: str):
+        """
+        Set the material of a key as the active material of the model, if it is not already.
+        @param model 3D object to apply the material
+        @param key MaterialHandler.MATERIALS key
+        """
+        material = MaterialRegistry.get(key)
+        if material is not None and model.active_material != material:
+            model.active_material = material
+        return material
+
+    @staticmethod
+    def _param_sockets(key: str):
+        material = MaterialRegistry.get(key)
+        cached = MaterialRegistry.param_sockets.get(key)
+        if cached is not None and cached[0] == material:
+            return cached[1]
+
+        sockets = None
+        bsdf = material.node_tree.nodes.get("Principled BSDF") \
+            if material is not None and material.node_tree is not None else None
+        if bsdf is not None:
+            sockets = tuple(
+                next((bsdf.inputs[name] for name in names if name in bsdf.inputs), None)
+                for names in MaterialRegistry.PARAM_INPUTS
+            )
+        MaterialRegistry.param_sockets[key] = (material, sockets)
+        return sockets
+
+    @staticmethod
+    def set_params(key: str, metallic: float, specular: float, roughness: float):
+        """
+        Change the Principled BSDF values of a material, the node tree is kept.
+        The sockets are looked up once per material.
+        @param key MaterialHandler.MATERIALS key
+        """
+        sockets = MaterialRegistry._param_sockets(key)
+        if sockets is None:
+            return
+        for socket, value in zip(sockets, (metallic, specular, roughness)):
+            if socket is not None and socket.default_value != value:
+                socket.default_value = value
+
+
 def create_random_3_tuple(min_value, max_value):
     return (
         random.uniform(min_value, max_value),
@@ -469,31 +961,157 @@ def create_random_3_tuple(min_value, max_value):
     )
 
 class DataGenApplyFuncts(DataGenFunctsInterface):
+    # Render.Style -> default StyleSettings, overridden by Render.style_settings
+    STYLES = {
+        Render.Style.NORMAL: StyleSettings(RenderHandler.ENGINE_CYCLES, 100),
+        Render.Style.RAY_TRACED: StyleSettings(RenderHandler.ENGINE_CYCLES, 100, denoise=True),
+        Render.Style.RASTERED: StyleSettings(RenderHandler.ENGINE_EEVEE, 100),
+        Render.Style.SILHOUETTE: StyleSettings(RenderHandler.ENGINE_EEVEE, 1, shadeless=True),
+        Render.Style.TEXTURE_SEGMENTATION: StyleSettings(RenderHandler.ENGINE_EEVEE, 1, shadeless=True),
+    }
+    # Single render of every pass, Cycles provides the index passes.
+    MULTI_PASS = Render.PASSES
+    MULTI_PASS_SETTINGS = StyleSettings(RenderHandler.ENGINE_CYCLES, 100)
+
+    def __init__(self, mesh_cache_dir: str = None, image_writer: ImageWriter = None):
+        """
+        @param mesh_cache_dir: directory of the MeshCache, models are always imported if None.
+        @param image_writer: encodes and writes the renders in background, Blender writes them if None.
+        """
+        self.mesh_cache = MeshCache(mesh_cache_dir) if mesh_cache_dir is not None else None
+        self.image_writer = image_writer
+        self.viewer = None
+        self.light_pool = LightPool()
+        self.render_session = RenderSession()
+        self.style_settings = dict()
+        # Material of the model replaced by a shadeless one: (model, material)
+        self.replaced_material = None
+        self.compositor_outputs = None
+        # Materials of the models as loaded, restored by keep_object: pointer -> slot materials
+        self.loaded_materials = dict()
 
     def set_render_resolution(self, r: Render):
-        RenderHandler.set_render_output_resolution(
+        self.render_session.configure(
             res_x=r.resolution_x,
             res_y=r.resolution_y,
             res_percentage=100
         )
 
+    def get_render_passes(self, r: Render):
+        overrides = r.style_settings or dict()
+        if r.output != Render.Output.SEPARATE:
+            self.compositor_outputs = CompositorOutputs(multilayer=r.output == Render.Output.MULTILAYER_EXR)
+            self.compositor_outputs.setup()
+            self.style_settings = {
+                self.MULTI_PASS: self.MULTI_PASS_SETTINGS.override(overrides.get(self.MULTI_PASS))
+            }
+            return [self.MULTI_PASS]
+
+        self.compositor_outputs = None
+        self.style_settings = {
+            style: self.STYLES[style].override(overrides.get(style))
+            for style in r.styles if style in self.STYLES
+        }
+        if self.image_writer is not None:
+            self._capture_pixels()
+        return list(self.style_settings)
+
+    def _capture_pixels(self):
+        """
+        Capture the renders in memory, with the Standard view transform so
+        the encoded images look like the ones Blender saves.
+        """
+        if self.viewer is None:
+            self.viewer = ViewerCapture()
+            self.viewer.setup()
+        self.render_session.use_view_transform(RenderSession.VIEW_STANDARD)
+
+    def _shadeless_material(self, render_style: str, texture: str) -> str:
+        if render_style == Render.Style.SILHOUETTE:
+            return MaterialHandler.SILHOUETTE
+        # Models without material are segmented as marble.
+        return f"{texture or Material.Texture.MARBLE}_{MaterialHandler.SHADE}"
+
+    def _set_shadeless(self, object_loaded, material: str):
+        """
+        Replace the model material by a shadeless one, or restore it if material is None.
+        """
+        if self.replaced_material is not None and self.replaced_material[0] != object_loaded:
+            self.replaced_material = None  # the previous model was removed.
+
+        if material is None:
+            if self.replaced_material is not None:
+                object_loaded.active_material = self.replaced_material[1]
+                self.replaced_material = None
+            return
+
+        if self.replaced_material is None:
+            self.replaced_material = (object_loaded, object_loaded.active_material)
+        if object_loaded.active_material is None or \
+                object_loaded.active_material.name != MaterialHandler.MATERIALS[material]:
+            MaterialHandler.apply_material_to(object_loaded, material, apply_light=lambda: None)
+            MaterialHandler.change_shadeless_material_color(
+                object_loaded, MaterialHandler.COLORS_SHADELESS[material]
+            )
+
     def render(self, path: str, render_style: str, texture: str, object_loaded):
-        RenderHandler.render(
-            f"{path}/eevee.{RenderHandler.IMG_FORMAT}",
-            engine=RenderHandler.ENGINE_EEVEE,
-            samples=100
-        ) 
-
-        RenderHandler.render(
-            f"{path}/ cycles.{RenderHandler.IMG_FORMAT}",
-            engine=RenderHandler.ENGINE_CYCLES,
-            samples=100
+        settings = self.style_settings[render_style]
+
+        if render_style == self.MULTI_PASS:
+            object_loaded.pass_index = 1
+            for i, slot in enumerate(object_loaded.material_slots):
+                if slot.material is not None:
+                    slot.material.pass_index = i + 1
+            self.render_session.use_engine(settings.engine, settings.samples, settings.denoise)
+            outputs = self.compositor_outputs.outputs(path)
+            self.render_session.render()
+            return outputs
+
+        self._use_style(render_style, texture, object_loaded)
+
+        if self.image_writer is not None:
+            # Rendered in memory, encoded and written by the writer threads.
+            self.render_session.render()
+            return {render_style: self.image_writer.submit(f"{path}/{render_style}", self.viewer.pixels())}
+
+        output = f"{path}/{render_style}.{RenderHandler.IMG_FORMAT}"
+        self.render_session.render(output)
+
+        return {render_style: output}
+
+    def _use_style(self, render_style: str, texture: str, object_loaded):
+        settings = self.style_settings[render_style]
+        self._set_shadeless(
+            object_loaded,
+            self._shadeless_material(render_style, texture) if settings.shadeless else None
         )
-
+        self.render_session.use_engine(settings.engine, settings.samples, settings.denoise)
+
+    def render_pixels(self, render_style: str, texture: str, object_loaded):
+        if render_style == self.MULTI_PASS:
+            raise ValueError(f"Pixels are only captured with Render.Output.SEPARATE, got the {render_style} pass")
+        self._capture_pixels()
+        self._use_style(render_style, texture, object_loaded)
+        self.render_session.render()
+        return {render_style: self.viewer.pixels()}
+
+    def flush_outputs(self):
+        if self.image_writer is not None:
+            self.image_writer.flush()
+
+    def close(self):
+        if self.image_writer is not None:
+            self.image_writer.close()
+
+    def apply_material(self, object_loaded, texture: str, metallic: float, specular: float, roughness: float):
+        # The material is set for the frame, there is nothing to restore after a shadeless render.
+        self.replaced_material = None
+        MaterialRegistry.apply(object_loaded, texture)
+        MaterialRegistry.set_params(texture, float(metallic), float(specular), float(roughness))
 
     def define_texture(self, o: Object):
         if o.material.texture == Material.Texture.RANDOM:
-            return random.sample(MaterialHandler.TEXTURES.keys(), 1)[0]
+            return random.choice(list(MaterialHandler.TEXTURES.keys()))
         return o.material.texture
 
     def create_environment(self, e: Environment):
@@ -502,60 +1120,25 @@ class DataGenApplyFuncts(DataGenFunctsInterface):
         )
         return env
 
-    def create_viewpoints(self, vs: List[Viewpoint], preview: bool):
-        viewpoints_created = list()
-
-        for v in vs:
-            if v.kind == Viewpoint.Kind.STATIC_CAMERA:
-                location = tuple(v.location)  # create an inmutable object.
-                viewpoints_created.append([location] * v.amount)  # repeate it for memory saving
-
-            elif v.kind == Viewpoint.Kind.DYNAMIC_CAMERA:
-                viewpoints_created.append([  # append randoms 3-tuples.
-                    create_random_3_tuple(0 - v.max_range, v.max_range) for _ in range(v.amount)
-                ])
-
-            elif v.kind == Viewpoint.Kind.OBJECT_PATH:
-                # Create the blender UV_sphere.
-                viewpoint_object = ViewpointsCreator.create_viewpoints(
-                    u_segments=v.horizontal_divisions,
-                    v_segments=v.vertical_divisions,
-                    diameter=v.size
-                )
-                # Get vertices as locations.
-                viewpoints_created.append(
-                    [(vert.co.x, vert.co.y, vert.co.z) for vert in viewpoint_object.data.vertices]
-                )
-                # Remove it for memory saving
-                bpy.data.objects.remove(viewpoint_object, do_unlink=True)
-            else:
-                continue
-
-        return viewpoints_created if not preview else [[viewpoints_created[0][0], ], ]
-
-    def create_light(self, li: Light):
-        if li.kind == Light.Kind.STATIC_LIGHT:
-            return LightCreator.create_light(kind='POINT', color=tuple(li.color), location=tuple(li.location))
-
-        if li.kind == Light.Kind.DYNAMIC_LIGHT:
-            return LightCreator.create_light(kind='POINT', color=tuple(li.color),
-                                      location=create_random_3_tuple(0 - li.max_range, li.max_range))
-
-        if li.kind == Light.Kind.RAINBOW_STATIC_LIGHT:
-            return LightCreator.create_light(kind='POINT', color=create_random_3_tuple(0, 1),
-                                      location=create_random_3_tuple(0 - li.max_range, li.max_range))
-
-        if li.kind == Light.Kind.RAINBOW_DYNAMIC_LIGHT:
-            return LightCreator.create_light(kind='POINT', color=create_random_3_tuple(0, 1),
-                                      location=create_random_3_tuple(0 - li.max_range, li.max_range))
-    
+    def create_light(self, li: Light, location: tuple = None, color: tuple = None):
+        if location is None:
+            location = tuple(li.location) if li.kind == Light.Kind.STATIC_LIGHT \
+                else create_random_3_tuple(0 - li.max_range, li.max_range)
+        if color is None:
+            color = tuple(li.color) if li.kind in (Light.Kind.STATIC_LIGHT, Light.Kind.DYNAMIC_LIGHT) \
+                else create_random_3_tuple(0, 1)
+
+        energy = li.max_energy if li.max_energy is not None else LightCreator.DEFAULT_ENERGY
+        return self.light_pool.acquire(kind='POINT', color=color, location=location, energy=energy)
+
     def get_light_params(self, light):
         return [*light.location.xyz, *light.data.color]
 
     def load_object(self, o: Object, size_env: int):
         obj = ObjectIO.load(
-            o.path, scene_dimension=size_env, normalize=o.normalize
+            o.path, scene_dimension=size_env, normalize=o.normalize, cache=self.mesh_cache
         )
+        self.loaded_materials[obj.as_pointer()] = [slot.material for slot in obj.material_slots]
         return obj
 
     def create_camera(self):
@@ -569,16 +1152,36 @@ class DataGenApplyFuncts(DataGenFunctsInterface):
         camera.location.xyz = coords
 
     def clear_lights(self):
-        bpy.ops.object.select_all(action='DESELECT')
-        for li in bpy.data.objects:
-            if li.type == 'LIGHT':
-                bpy.data.objects.remove(li, do_unlink=True)
+        # Lights are kept in the pool and updated on the next frame.
+        self.light_pool.release()
 
     def export_normalized_object(self, path):
         ObjectIO.export(path=path)
 
-    def clear_objects(self):
-        Cleaner.clear_scene()
+    def clear_objects(self, keep: list = ()):
+        Cleaner.clear_scene(keep=keep)
+        self.light_pool.reset()
+        self.replaced_material = None
+        kept = {obj.as_pointer() for obj in keep}
+        self.loaded_materials = {key: value for key, value in self.loaded_materials.items() if key in kept}
+
+    def unload_object(self, object_loaded):
+        self.replaced_material = None
+        self.loaded_materials.pop(object_loaded.as_pointer(), None)
+        Cleaner.remove_object(object_loaded)
+
+    def keep_object(self, object_loaded):
+        self.replaced_material = None
+        # Restored now, so the materials keep a user while the model waits.
+        materials = self.loaded_materials.get(object_loaded.as_pointer(), [])
+        for slot, material in zip(object_loaded.material_slots, materials):
+            slot.material = material
+        object_loaded.hide_render = True
+        object_loaded.hide_viewport = True
+
+    def reuse_object(self, object_loaded):
+        object_loaded.hide_render = False
+        object_loaded.hide_viewport = False
 
 class Message:
     @staticmethod
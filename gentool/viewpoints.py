@@ -0,0 +1,254 @@
+from typing import Iterator, List
+
+import numpy as np
+
+from .basics import Viewpoint
+
+GOLDEN_ANGLE = np.pi * (3 - np.sqrt(5))
+
+
+def uv_sphere(u_segments: int, v_segments: int, diameter: float) -> np.ndarray:
+    """
+    Vertices of the UV sphere bmesh.ops.create_uvsphere builds: top pole,
+    the inner rings from top to bottom and the bottom pole.
+    bmesh uses its `diameter` argument as the radius, and so does this.
+    :param u_segments: horizontal segments.
+    :param v_segments: vertical segments.
+    :param diameter: sphere "diameter".
+    :return: a (n, 3) array of coordinates.
+    """
+    theta = np.pi * np.arange(1, v_segments) / v_segments
+    phi = 2 * np.pi * np.arange(u_segments) / u_segments
+    theta, phi = np.meshgrid(theta, phi, indexing="ij")
+
+    rings = np.stack([
+        np.sin(theta) * np.cos(phi),
+        np.sin(theta) * np.sin(phi),
+        np.cos(theta)
+    ], axis=-1).reshape(-1, 3)
+
+    return np.concatenate([[[0, 0, 1]], rings, [[0, 0, -1]]]) * diameter
+
+
+def _spiral(z: np.ndarray) -> np.ndarray:
+    # Points at heights z, turned by the golden angle one after the other.
+    phi = GOLDEN_ANGLE * np.arange(len(z))
+    r = np.sqrt(np.clip(1 - z ** 2, 0, None))
+    return np.stack([r * np.cos(phi), r * np.sin(phi), z], axis=-1)
+
+
+def fibonacci_sphere(amount: int, radius: float) -> np.ndarray:
+    """
+    Golden spiral over the whole sphere, every point covers the same area.
+    :param amount: amount of points.
+    :param radius: sphere radius.
+    :return: a (amount, 3) array of coordinates.
+    """
+    z = 1 - 2 * (np.arange(amount) + 0.5) / amount
+    return _spiral(z) * radius
+
+
+def hemisphere(amount: int, radius: float) -> np.ndarray:
+    """
+    Golden spiral over the upper half of the sphere (z > 0), for objects seen from above.
+    :param amount: amount of points.
+    :param radius: sphere radius.
+    :return: a (amount, 3) array of coordinates.
+    """
+    z = 1 - (np.arange(amount) + 0.5) / amount
+    return _spiral(z) * radius
+
+
+def icosphere(subdivisions: int, radius: float) -> np.ndarray:
+    """
+    Vertices of an icosahedron whose faces are split in 4, `subdivisions` times.
+    :param subdivisions: amount of subdivisions, 0 is the icosahedron.
+    :param radius: sphere radius.
+    :return: a (10 * 4 ** subdivisions + 2, 3) array of coordinates.
+    """
+    t = (1 + np.sqrt(5)) / 2
+    vertices = [
+        (-1, t, 0), (1, t, 0), (-1, -t, 0), (1, -t, 0),
+        (0, -1, t), (0, 1, t), (0, -1, -t), (0, 1, -t),
+        (t, 0, -1), (t, 0, 1), (-t, 0, -1), (-t, 0, 1)
+    ]
+    faces = [
+        (0, 11, 5), (0, 5, 1), (0, 1, 7), (0, 7, 10), (0, 10, 11),
+        (1, 5, 9), (5, 11, 4), (11, 10, 2), (10, 7, 6), (7, 1, 8),
+        (3, 9, 4), (3, 4, 2), (3, 2, 6), (3, 6, 8), (3, 8, 9),
+        (4, 9, 5), (2, 4, 11), (6, 2, 10), (8, 6, 7), (9, 8, 1)
+    ]
+    vertices = [np.asarray(vertex, dtype=np.float64) for vertex in vertices]
+
+    for _ in range(subdivisions):
+        midpoints = dict()  # edge -> index of its midpoint, shared by both faces.
+
+        def midpoint(a: int, b: int) -> int:
+            edge = (a, b) if a < b else (b, a)
+            if edge not in midpoints:
+                midpoints[edge] = len(vertices)
+                vertices.append((vertices[a] + vertices[b]) / 2)
+            return midpoints[edge]
+
+        split = list()
+        for a, b, c in faces:
+            ab, bc, ca = midpoint(a, b), midpoint(b, c), midpoint(c, a)
+            split += [(a, ab, ca), (b, bc, ab), (c, ca, bc), (ab, bc, ca)]
+        faces = split
+
+    vertices = np.asarray(vertices)
+    return vertices / np.linalg.norm(vertices, axis=1, keepdims=True) * radius
+
+
+def latitude_bands(bands: int, per_band: int, radius: float,
+                   min_elevation: float = -90, max_elevation: float = 90) -> np.ndarray:
+    """
+    Rings of evenly spaced points at the center of `bands` equal elevation bands.
+    :param bands: amount of rings.
+    :param per_band: amount of points of each ring.
+    :param radius: sphere radius.
+    :param min_elevation: lowest elevation, in degrees.
+    :param max_elevation: highest elevation, in degrees.
+    :return: a (bands * per_band, 3) array of coordinates.
+    """
+    step = (max_elevation - min_elevation) / bands if bands else 0
+    elevation = np.radians(min_elevation + (np.arange(bands) + 0.5) * step)
+    azimuth = 2 * np.pi * np.arange(per_band) / per_band
+    elevation, azimuth = np.meshgrid(elevation, azimuth, indexing="ij")
+
+    return np.stack([
+        np.cos(elevation) * np.cos(azimuth),
+        np.cos(elevation) * np.sin(azimuth),
+        np.sin(elevation)
+    ], axis=-1).reshape(-1, 3) * radius
+
+
+def sphere_coords(v: Viewpoint) -> np.ndarray:
+    """
+    Camera coordinates of an OBJECT_PATH viewpoint, following its layout.
+    :param v: the Viewpoint.
+    :return: a (n, 3) array of coordinates.
+    """
+    if v.layout == Viewpoint.Layout.FIBONACCI:
+        return fibonacci_sphere(v.amount, v.size)
+    if v.layout == Viewpoint.Layout.HEMISPHERE:
+        return hemisphere(v.amount, v.size)
+    if v.layout == Viewpoint.Layout.ICOSPHERE:
+        return icosphere(v.subdivisions, v.size)
+    if v.layout == Viewpoint.Layout.LATITUDE_BANDS:
+        return latitude_bands(
+            v.vertical_divisions, v.horizontal_divisions, v.size, v.min_elevation, v.max_elevation
+        )
+    return uv_sphere(v.horizontal_divisions, v.vertical_divisions, v.size)
+
+
+def count_sphere_coords(v: Viewpoint) -> int:
+    """
+    Amount of coordinates sphere_coords returns, without computing them.
+    :param v: the Viewpoint.
+    """
+    if v.layout in (Viewpoint.Layout.FIBONACCI, Viewpoint.Layout.HEMISPHERE):
+        return v.amount
+    if v.layout == Viewpoint.Layout.ICOSPHERE:
+        return 10 * 4 ** v.subdivisions + 2
+    if v.layout == Viewpoint.Layout.LATITUDE_BANDS:
+        return v.vertical_divisions * v.horizontal_divisions
+    # UV sphere: one ring per inner vertical division plus both poles.
+    return v.horizontal_divisions * (v.vertical_divisions - 1) + 2
+
+
+def random_seed() -> int:
+    return int(np.random.SeedSequence().entropy % 2 ** 32)
+
+
+class ViewpointSource:
+    CHUNK_SIZE = 4096
+    # Stream of the chunk generators, other sources of the same seed use other streams.
+    STREAM = 0
+
+    def __init__(self, viewpoints: List[Viewpoint], objects: int, seed: int = None,
+                 preview: bool = False, chunk_size: int = CHUNK_SIZE):
+        """
+        Lazy camera coordinates of every frame of a run, computed by chunks
+        of frames on demand. Random cameras of a chunk only depend on the seed
+        and the chunk number, so any frame is reachable without the previous ones.
+        :param viewpoints: the Viewpoints of the config.
+        :param objects: amount of objects, every object uses the same viewpoints.
+        :param seed: the seed of the random cameras, a random one if None.
+        :param preview: if true, only the first coordinate of the first viewpoint.
+        :param chunk_size: amount of frames computed together.
+        """
+        self.seed = seed if seed is not None else random_seed()
+        self.objects = objects
+        self.preview = preview
+        self.chunk_size = chunk_size
+
+        # (viewpoint, first frame of the object, amount of frames)
+        self.blocks = list()
+        offset = 0
+        for v in viewpoints:
+            if v.kind == Viewpoint.Kind.OBJECT_PATH:
+                amount = count_sphere_coords(v)
+            elif v.kind in (Viewpoint.Kind.STATIC_CAMERA, Viewpoint.Kind.DYNAMIC_CAMERA):
+                amount = v.amount
+            else:
+                continue
+            if preview:
+                amount = min(amount, 1)
+            self.blocks.append((v, offset, amount))
+            offset += amount
+            if preview:
+                break
+        self.frames_per_object = offset
+        # Sphere coordinates are computed once, they are the same for every object.
+        self.spheres = {
+            id(v): sphere_coords(v)[:amount] for v, _, amount in self.blocks if v.kind == Viewpoint.Kind.OBJECT_PATH
+        }
+        self.cached = (None, None)  # (chunk number, coordinates)
+
+    def __len__(self):
+        return self.frames_per_object * self.objects
+
+    def rng(self, number: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, number, self.STREAM])
+
+    def chunk(self, number: int) -> np.ndarray:
+        """
+        Coordinates of the frames [number * chunk_size, (number + 1) * chunk_size).
+        :return: a (n, 3) array, shorter for the last chunk.
+        """
+        if self.cached[0] == number:
+            return self.cached[1]
+
+        start = number * self.chunk_size
+        stop = min(start + self.chunk_size, len(self))
+        position = np.arange(start, stop) % self.frames_per_object if stop > start else np.empty(0, dtype=np.int64)
+        # One draw for every frame of the chunk, only dynamic cameras use it.
+        coords = self.rng(number).uniform(-1, 1, (len(position), 3))
+
+        for v, offset, amount in self.blocks:
+            mask = (position >= offset) & (position < offset + amount)
+            if v.kind == Viewpoint.Kind.STATIC_CAMERA:
+                coords[mask] = v.location
+            elif v.kind == Viewpoint.Kind.DYNAMIC_CAMERA:
+                coords[mask] *= v.max_range
+            else:
+                coords[mask] = self.spheres[id(v)][position[mask] - offset]
+
+        self.cached = (number, coords)
+        return coords
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        for number in range(-(-len(self) // self.chunk_size)):
+            yield self.chunk(number)
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.chunk(index // self.chunk_size)[index % self.chunk_size]
+
+    def __iter__(self) -> Iterator[tuple]:
+        for coords in self.chunks():
+            yield from map(tuple, coords.tolist())
@@ -0,0 +1,183 @@
+import io
+import os
+import struct
+import threading
+import zlib
+
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Tuple
+
+import numpy as np
+
+from .manifest import PNG_SIGNATURE
+
+# Amount of channels -> png color type
+PNG_COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+
+def linear_to_srgb(values: np.ndarray) -> np.ndarray:
+    """
+    sRGB transfer function, what the "Standard" view transform applies on save.
+    """
+    values = np.clip(values, 0, 1)
+    return np.where(values <= 0.0031308, values * 12.92, 1.055 * np.power(values, 1 / 2.4) - 0.055)
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def encode_png(pixels: np.ndarray, compression: int = 6) -> bytes:
+    """
+    Encode 8 bit pixels as a png, rows without filter.
+    :param pixels: (height, width, channels) uint8 array, the first row is the top one.
+    :param compression: zlib level, 0 stores the pixels uncompressed.
+    """
+    height, width, channels = pixels.shape
+    rows = np.zeros((height, width * channels + 1), dtype=np.uint8)  # filter byte 0 on each row
+    rows[:, 1:] = pixels.reshape(height, -1)
+    header = struct.pack(">IIBBBBB", width, height, 8, PNG_COLOR_TYPES[channels], 0, 0, 0)
+
+    return b"".join([
+        PNG_SIGNATURE,
+        _png_chunk(b"IHDR", header),
+        _png_chunk(b"IDAT", zlib.compress(rows.tobytes(), compression)),
+        _png_chunk(b"IEND", b"")
+    ])
+
+
+class ImageWriter:
+    class Format:
+        PNG = "png"  # 8 bit, sRGB
+        NPY = "npy"  # float32, linear, as rendered
+        RAW = "raw"  # 8 bit sRGB bytes, (height, width, channels) row major
+
+    def __init__(self,
+                 image_format: str = Format.PNG,
+                 compression: int = 6,
+                 workers: int = 2,
+                 max_pending: int = 16,
+                 resize: Tuple[int, int] = None,
+                 crop: Tuple[int, int, int, int] = None):
+        """
+        Encodes and writes the rendered pixels in background threads, so the
+        renderer does not wait for the compression. zlib and NumPy release the
+        GIL, threads are enough. When max_pending images are waiting, submit
+        blocks until one of them is written.
+        :param image_format: an ImageWriter.Format.
+        :param compression: png zlib level, from 0 (uncompressed) to 9.
+        :param workers: amount of writer threads.
+        :param max_pending: max amount of images submitted and not written yet.
+        :param resize: (width, height) of the written images, nearest neighbour.
+        :param crop: (x, y, width, height) region written, from the top left corner. Applied before resize.
+        """
+        assert image_format in (self.Format.PNG, self.Format.NPY, self.Format.RAW), \
+            f"Unknown image format {image_format}"
+        assert 0 <= compression <= 9, "compression must be between 0 and 9"
+        self.image_format = image_format
+        self.compression = compression
+        self.resize = resize
+        self.crop = crop
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gentool-writer")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.futures = set()
+        self.errors = list()
+
+    @property
+    def extension(self) -> str:
+        return self.image_format
+
+    def submit(self, path: str, pixels: np.ndarray) -> str:
+        """
+        Queue an image, blocks while the queue is full.
+        :param path: the output path, without extension.
+        :param pixels: (height, width, channels) float array as Blender stores it, first row at the bottom.
+        :return: the path the image is written to.
+        """
+        self.raise_errors()
+        path = f"{path}.{self.extension}"
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(self._write, path, pixels)
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.futures.add(future)
+        future.add_done_callback(self._done)
+        return path
+
+    def _done(self, future):
+        with self.lock:
+            self.futures.discard(future)
+            if future.exception() is not None:
+                self.errors.append(future.exception())
+        self.slots.release()
+
+    def prepare(self, pixels: np.ndarray) -> np.ndarray:
+        pixels = pixels[::-1]  # the first row is the top one.
+        if self.crop is not None:
+            x, y, width, height = self.crop
+            pixels = pixels[y:y + height, x:x + width]
+        if self.resize is not None:
+            width, height = self.resize
+            rows = np.arange(height) * pixels.shape[0] // height
+            columns = np.arange(width) * pixels.shape[1] // width
+            pixels = pixels[rows][:, columns]
+        return pixels
+
+    @staticmethod
+    def to_uint8(pixels: np.ndarray) -> np.ndarray:
+        """
+        Linear float pixels to 8 bit sRGB, alpha stays linear. Matches the
+        "Standard" view transform only, RenderSession forces it while capturing.
+        """
+        values = np.array(pixels, dtype=np.float32)
+        color = min(values.shape[2], 3)
+        values[..., :color] = linear_to_srgb(values[..., :color])
+        return (np.clip(values, 0, 1) * 255 + 0.5).astype(np.uint8)
+
+    def encode(self, pixels: np.ndarray) -> bytes:
+        """
+        The file content of an image, as submit receives it.
+        """
+        pixels = self.prepare(pixels)
+        if self.image_format == self.Format.NPY:
+            buffer = io.BytesIO()
+            np.save(buffer, np.ascontiguousarray(pixels, dtype=np.float32))
+            return buffer.getvalue()
+        pixels = self.to_uint8(pixels)
+        if self.image_format == self.Format.PNG:
+            return encode_png(pixels, self.compression)
+        return np.ascontiguousarray(pixels).tobytes()
+
+    def _write(self, path: str, pixels: np.ndarray):
+        data = self.encode(pixels)
+        # Written aside and renamed, a crash never leaves a truncated image.
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as fw:
+            fw.write(data)
+        os.replace(tmp_path, path)
+
+    def raise_errors(self):
+        with self.lock:
+            if self.errors:
+                error = self.errors[0]
+                self.errors = list()
+                raise error
+
+    def flush(self):
+        """
+        Wait until every submitted image is written.
+        """
+        with self.lock:
+            futures = list(self.futures)
+        wait(futures)
+        self.raise_errors()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.executor.shutdown(wait=True)
@@ -1,6 +1,7 @@
 from bpy.types import Operator
 
 from .gentool.basics import Environment, Object, Material, Viewpoint, Render, Light
+from .gentool.schema import ConfigError
 from .gentool.translator import ConfigIO, DatasetsGenerator, Config
 from .gentool.utils import Cleaner, DataGenApplyFuncts, Message
 
@@ -16,10 +17,20 @@ class OperatorsEnd:
 def create_config_from_gui(properties):
     e = Environment(dimension=properties.scene_dimension)
 
+    m = None
+    if properties.material_kind != 'NONE':
+        m = Material(
+            kind=properties.material_kind,
+            texture=properties.material_texture,
+            metallic=properties.material_metallic,
+            specular=properties.material_specular,
+            roughness=properties.material_roughness
+        )
+
     o = Object(
         name='sample',
         path=properties.input_model,
-        material=None,
+        material=m,
         normalize=properties.normalize
     )
     v = Viewpoint(
@@ -29,17 +40,19 @@ def create_config_from_gui(properties):
         size=properties.camera_size,
         horizontal_divisions=properties.camera_h_segments,
         vertical_divisions=properties.camera_v_segments,
-        max_range=properties.camera_range_location
+        max_range=properties.camera_range_location,
+        layout=properties.camera_layout,
+        subdivisions=properties.camera_subdivisions
     )
     i = Light(
         kind=properties.light_kind,
-        color=properties.light_color,
+        color=[channel / 255 for channel in properties.light_color],  # the property goes from 0 to 255
         location=properties.light_location,
         max_range=properties.light_range_location,
         max_energy=None
     )
 
-    styles = [Render.Style.NORMAL]
+    styles = [Render.Style.RASTERED, Render.Style.RAY_TRACED]
 
     r = Render(
         resolution_x=properties.render_resolution_x,
@@ -51,17 +64,6 @@ def create_config_from_gui(properties):
     return Config(environment=e, render=r, objects=[o], lights=[i], viewpoints=[v])
 
 
-def generate_renders(config: Config, preview: bool):
-    dataset_generator = DatasetsGenerator(
-        config=config,
-        functs=DataGenApplyFuncts(),
-        preview=preview
-    )
-
-    dataset_generator.setName('Dataset-Generator')
-    dataset_generator.run()  # Convert into Daemon or subprocess
-
-
 class OP_OT_ClearScene(Operator):
     """
     Clear the scene.
@@ -75,6 +77,10 @@ class OP_OT_ClearScene(Operator):
 
 
 class OP_OT_GenerateDataset(Operator):
+    """
+    Generate the dataset from a timer, one render per event, so the UI keeps
+    responding. Press ESC to cancel.
+    """
     bl_label = "Generate"
     bl_idname = "object.generate_dataset"
     bl_options = {'REGISTER'}
@@ -83,8 +89,53 @@ class OP_OT_GenerateDataset(Operator):
         tool = context.scene.tool
         input_path = tool.input_presets_file
 
-        config = ConfigIO.json_loads(input_path) if tool.choice_render == 'FILE' \
-            else create_config_from_gui(tool)
-        generate_renders(config, preview=False)
-
-        return {OperatorsEnd.FINISHED}
+        try:
+            config = ConfigIO.json_loads(input_path) if tool.choice_render == 'FILE' \
+                else create_config_from_gui(tool)
+        except ConfigError as e:
+            self.report({'ERROR'}, str(e))
+            return {OperatorsEnd.CANCELLED}
+
+        self._steps = DatasetsGenerator(
+            config=config,
+            functs=DataGenApplyFuncts(),
+            preview=False
+        ).steps()
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.01, window=context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, 100)
+
+        return {OperatorsEnd.RUNNING_MODAL}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._steps.close()  # flushes data.csv
+            self.finish(context)
+            self.report({'WARNING'}, "Dataset generation cancelled")
+            return {OperatorsEnd.CANCELLED}
+
+        if event.type != 'TIMER':
+            return {OperatorsEnd.PASS_THROUGH}
+
+        try:
+            progress = next(self._steps)
+        except StopIteration:
+            self.finish(context)
+            return {OperatorsEnd.FINISHED}
+        except Exception:
+            self._steps.close()
+            self.finish(context)
+            raise
+
+        context.window_manager.progress_update(100 * progress.done // max(progress.total, 1))
+        context.workspace.status_text_set(str(progress))
+
+        return {OperatorsEnd.RUNNING_MODAL}
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
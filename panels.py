@@ -47,6 +47,13 @@ class PL_PT_gui(ToolPanel, Panel):
         layout.label(text="Model options:")
         layout.prop(tool, "input_model")
         layout.prop(tool, "normalize")
+        layout.prop(tool, "material_kind")
+        if tool.material_kind != 'NONE':
+            layout.prop(tool, "material_texture")
+            row = layout.row()
+            row.prop(tool, "material_metallic")
+            row.prop(tool, "material_specular")
+            row.prop(tool, "material_roughness")
 
         # Light options
         layout.separator()
@@ -69,6 +76,9 @@ class PL_PT_gui(ToolPanel, Panel):
         row.prop(tool, 'camera_size')
         row.prop(tool, 'camera_h_segments')
         row.prop(tool, 'camera_v_segments')
+        row = layout.row()
+        row.prop(tool, 'camera_layout')
+        row.prop(tool, 'camera_subdivisions')
 
         # Render Manager options
         layout.separator()
@@ -38,6 +38,41 @@ class Properties(PropertyGroup):
         default=True,
     )
 
+    # Material properties:
+    material_kind: EnumProperty(
+        name="Material",
+        description="Choose how the material of the model changes between renders",
+        items=[
+            ('NONE', 'None', 'Keep the materials of the model', '', 0),
+            (Material.Kind.STATIC_TEXTURE_AND_PARAMS, 'Static',
+             'Apply the selected texture with the specified params', '', 1),
+            (Material.Kind.STATIC_TEXTURE_DYNAMIC_PARAMS, 'Dynamic params',
+             'Apply the selected texture with random params in each render', '', 2),
+            (Material.Kind.DYNAMIC_TEXTURE_AND_PARAMS, 'Dynamic',
+             'Apply a random texture with random params in each render', '', 3)
+        ],
+        default='NONE'
+    )
+
+    material_texture: EnumProperty(
+        name="Texture",
+        description="Texture of the model",
+        items=[
+            (Material.Texture.MARBLE, 'Marble', '', '', 0),
+            (Material.Texture.CRYSTAL, 'Crystal', '', '', 1),
+            (Material.Texture.WOOD, 'Wood', '', '', 2),
+            (Material.Texture.GOLD, 'Gold', '', '', 3),
+            (Material.Texture.RANDOM, 'Random', 'A random texture in each render', '', 4)
+        ],
+        default=Material.Texture.MARBLE
+    )
+
+    material_metallic: FloatProperty(name="Metallic", default=0.0, min=0.0, max=1.0)
+
+    material_specular: FloatProperty(name="Specular", default=0.5, min=0.0, max=1.0)
+
+    material_roughness: FloatProperty(name="Roughness", default=0.5, min=0.0, max=1.0)
+
     # Light properties:
     light_kind: EnumProperty(
         name="Kind",
@@ -100,6 +135,28 @@ class Properties(PropertyGroup):
         default=Viewpoint.Kind.DYNAMIC_CAMERA
     )
 
+    camera_layout: EnumProperty(
+        name="Layout",
+        description="Distribution of the cameras in case \"Spheric path\" was selected",
+        items=[
+            (Viewpoint.Layout.UV_SPHERE, 'UV sphere', 'Vertices of a UV sphere, denser at the poles', '', 0),
+            (Viewpoint.Layout.FIBONACCI, 'Fibonacci', 'Uniform golden spiral of "Shoots" cameras', '', 1),
+            (Viewpoint.Layout.HEMISPHERE, 'Hemisphere', 'Uniform golden spiral of "Shoots" cameras above the model', '', 2),
+            (Viewpoint.Layout.ICOSPHERE, 'Icosphere', 'Vertices of a subdivided icosahedron', '', 3),
+            (Viewpoint.Layout.LATITUDE_BANDS, 'Latitude bands',
+             'One ring of "Horizontal segments" cameras for each vertical segment', '', 4)
+        ],
+        default=Viewpoint.Layout.UV_SPHERE
+    )
+
+    camera_subdivisions: IntProperty(
+        name="Subdivisions",
+        description="Icosphere subdivisions, the cameras are 10 * 4^subdivisions + 2",
+        default=2,
+        min=0,
+        max=6
+    )
+
     camera_location: FloatVectorProperty(
         name="Camera Location",
         description="""Specify fixed camera location.""",
@@ -0,0 +1,51 @@
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+# The repository root is the Blender add-on, only the gentool package is imported.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gentool.translator import ConfigIO  # noqa: E402
+
+CONFIG = {
+    "environment": {"dimension": 1},
+    "render": {
+        "resolution_x": 8,
+        "resolution_y": 8,
+        "output_dir_path": "out",
+        "styles": ["normal"],
+    },
+    "objects": [
+        {"name": "a", "path": "a.obj", "normalize": False, "material": None},
+        {"name": "b", "path": "b.obj", "normalize": False, "material": None},
+    ],
+    "lights": [{"kind": "dynamic", "color": [1, 0, 0], "max_range": 3, "max_energy": 10}],
+    "viewpoints": [{"kind": "dynamic_camera", "amount": 5, "max_range": 3}],
+    "seed": 3,
+}
+
+
+@pytest.fixture
+def config_data(tmp_path) -> dict:
+    """
+    A valid json config writing into tmp_path.
+    """
+    data = copy.deepcopy(CONFIG)
+    data["render"]["output_dir_path"] = str(tmp_path / "out")
+    return data
+
+
+@pytest.fixture
+def load_config(tmp_path):
+    """
+    Build the Config of a json config, as ConfigIO reads it from a file.
+    """
+    def load(data: dict):
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps(data))
+        return ConfigIO.json_loads(str(path))
+
+    return load
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from gentool.basics import Render
+from gentool.cli import check_options, parse_args
+from gentool.schema import ConfigError
+from gentool.sweep import Sweep
+
+
+@pytest.fixture
+def config_path(tmp_path, config_data):
+    def write(output: str) -> str:
+        config_data["render"]["output"] = output
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps(config_data))
+        return str(path)
+
+    return write
+
+
+def errors(path: str, *options) -> list:
+    args = parse_args(["--config", path, *options])
+    try:
+        check_options(args, Sweep.load(path))
+    except ConfigError as e:
+        return [field for field, _ in e.errors]
+    return []
+
+
+@pytest.mark.parametrize("options", [[], ["--memmap"], ["--image-writer", "png"]])
+def test_separate_renders_accept_every_option(config_path, options):
+    assert errors(config_path(Render.Output.SEPARATE), *options) == []
+
+
+@pytest.mark.parametrize("output", [Render.Output.MULTILAYER_EXR, Render.Output.PNG_PASSES])
+@pytest.mark.parametrize("options", [["--memmap"], ["--image-writer", "npy"]])
+def test_compositor_outputs_need_files(config_path, output, options):
+    assert errors(config_path(output), *options) == ["$.render.output"]
+    assert errors(config_path(output)) == []
+
+
+def test_memmap_writes_no_images(config_path):
+    assert errors(config_path(Render.Output.SEPARATE), "--memmap", "--image-writer", "png") == ["--image-writer"]
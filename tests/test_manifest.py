@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from gentool.manifest import PNG_END, PNG_SIGNATURE, FrameManifest, is_valid_image
+
+PNG = PNG_SIGNATURE + b"pixels" + PNG_END
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    for name, content in [("0/normal.png", PNG), ("0/depth.exr", b"exr"), ("1/normal.png", PNG)]:
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(content)
+    return tmp_path
+
+
+@pytest.mark.parametrize("name, content, valid", [
+    ("a.png", PNG, True),
+    ("a.PNG", PNG, True),
+    ("a.png", PNG[:-1], False),
+    ("a.png", PNG_END, False),
+    ("a.png", b"", False),
+    ("a.png", b"x" * 3 + PNG_END, False),
+    ("a.exr", b"exr", True),
+    ("a.exr", b"", False),
+])
+def test_is_valid_image(tmp_path, name, content, valid):
+    path = tmp_path / name
+    path.write_bytes(content)
+    assert is_valid_image(str(path)) == valid
+
+
+def test_missing_image_is_not_valid(tmp_path):
+    assert not is_valid_image(str(tmp_path / "a.png"))
+    assert not is_valid_image(str(tmp_path))
+
+
+def test_resume_finds_the_flushed_frames(output_dir):
+    manifest = FrameManifest(str(output_dir))
+    manifest.add("a", 0, {"normal": str(output_dir / "0/normal.png"), "depth": str(output_dir / "0/depth.exr")})
+    manifest.add("a", 1, {"normal": str(output_dir / "1/normal.png")})
+    # Not flushed: the frame metadata never reached the disk.
+    resumed = FrameManifest(str(output_dir)).load()
+    assert not resumed.is_done("a", 0)
+
+    manifest.close()
+    resumed = FrameManifest(str(output_dir)).load()
+    assert resumed.is_done("a", 0)
+    assert resumed.is_done("a", 0, "depth")
+    assert resumed.is_done("a", 1, "normal")
+    assert not resumed.is_done("a", 1, "depth")
+    assert not resumed.is_done("b", 0)
+    assert not resumed.is_done("a", 2)
+
+
+def test_paths_are_relative_to_the_output_dir(output_dir):
+    manifest = FrameManifest(str(output_dir))
+    manifest.add("a", 0, {"normal": str(output_dir / "0/normal.png")})
+    manifest.close()
+    entry = json.loads((output_dir / FrameManifest.NAME).read_text())
+    assert entry == {"object": "a", "index": 0, "style": "normal", "path": "0/normal.png"}
+
+
+def test_truncated_image_is_rendered_again(output_dir):
+    manifest = FrameManifest(str(output_dir))
+    manifest.add("a", 0, {"normal": str(output_dir / "0/normal.png")})
+    manifest.close()
+    (output_dir / "0/normal.png").write_bytes(PNG[:10])
+    assert not FrameManifest(str(output_dir)).load().is_done("a", 0)
+
+
+def test_truncated_last_line_is_ignored(output_dir):
+    manifest = FrameManifest(str(output_dir))
+    manifest.add("a", 0, {"normal": str(output_dir / "0/normal.png")})
+    manifest.close()
+    with open(output_dir / FrameManifest.NAME, "a") as fw:
+        fw.write('{"object": "a", "index": 1, "sty')
+    resumed = FrameManifest(str(output_dir)).load()
+    assert resumed.is_done("a", 0)
+    assert not resumed.is_done("a", 1)
+
+
+def test_shard_manifests_are_read_whatever_the_shard(output_dir):
+    for name, index in [("manifest.shard-000.jsonl", 0), ("manifest.shard-001.jsonl", 1)]:
+        manifest = FrameManifest(str(output_dir), name)
+        manifest.add("a", index, {"normal": str(output_dir / f"{index}/normal.png")})
+        manifest.close()
+
+    resumed = FrameManifest(str(output_dir), "manifest.shard-005.jsonl").load()
+    assert resumed.is_done("a", 0) and resumed.is_done("a", 1)
+
+    in_range = FrameManifest(str(output_dir)).load(frame_range=(1, 5))
+    assert not in_range.is_done("a", 0)
+    assert in_range.is_done("a", 1)
@@ -0,0 +1,116 @@
+import json
+import os
+import tarfile
+
+import numpy as np
+import pytest
+
+from gentool.outputs import MemmapOutput, TarShardOutput
+from gentool.writer import ImageWriter
+
+
+def render(output, obj_name: str, index: int, styles=("normal", "depth")) -> dict:
+    path = output.frame_path(obj_name, index)
+    outputs = dict()
+    for style in styles:
+        outputs[style] = os.path.join(path, f"{style}.png")
+        with open(outputs[style], "wb") as fw:
+            fw.write(f"{obj_name} {index} {style}".encode() * (index + 1))
+    return outputs
+
+
+def files(path) -> list:
+    return sorted(os.path.relpath(os.path.join(root, name), path) for root, _, names in os.walk(path) for name in names)
+
+
+def test_tar_shards_roll_over(tmp_path):
+    output = TarShardOutput(str(tmp_path), "data", samples_per_shard=2)
+    for index in range(3):
+        assert output.add("a", index, render(output, "a", index)) == []
+    entries = output.finish_object("a")
+    assert [(name, index) for name, index, _ in entries] == [("a", 0), ("a", 1), ("a", 2)]
+    assert entries[0][2] == dict.fromkeys(["normal", "depth"], str(tmp_path / "shards/data-000000.tar"))
+    assert entries[2][2]["normal"] == str(tmp_path / "shards/data-000001.tar")
+
+    output.add("b", 7, render(output, "b", 7))
+    output.finish_object("b")
+    output.close()
+
+    assert files(tmp_path) == [
+        "shards/data-000000.idx.jsonl", "shards/data-000000.tar",
+        "shards/data-000001.idx.jsonl", "shards/data-000001.tar",
+    ]
+    with tarfile.open(tmp_path / "shards/data-000001.tar") as tar:
+        assert tar.getnames() == [
+            "a-000000002.normal.png", "a-000000002.depth.png", "b-000000007.normal.png", "b-000000007.depth.png"
+        ]
+
+
+def test_tar_index_points_at_the_members(tmp_path):
+    output = TarShardOutput(str(tmp_path), "w0", samples_per_shard=10)
+    for index in range(4):
+        output.add("x.y", index, render(output, "x.y", index))
+    output.finish_object("x.y")
+    output.close()
+
+    content = (tmp_path / "shards/w0-000000.tar").read_bytes()
+    index = [json.loads(line) for line in (tmp_path / "shards/w0-000000.idx.jsonl").read_text().splitlines()]
+    assert len(index) == 8
+    for entry in index:
+        member = content[entry["offset"]:entry["offset"] + entry["size"]]
+        assert member == f"x.y {entry['index']} {entry['style']}".encode() * (entry["index"] + 1)
+        assert entry["member"] == f"x_y-{entry['index']:09d}.{entry['style']}.png"
+
+
+def test_tar_close_leaves_no_partial_file(tmp_path):
+    output = TarShardOutput(str(tmp_path), "data", samples_per_shard=2)
+    output.add("a", 0, render(output, "a", 0))
+    output.finish_object("a")
+    assert os.path.exists(output.shard_path + ".tmp")
+    # Unfinished objects are dropped.
+    output.add("b", 0, render(output, "b", 0))
+    output.close()
+    assert files(tmp_path) == ["shards/data-000000.idx.jsonl", "shards/data-000000.tar"]
+
+    # A new run writes the next shard.
+    assert TarShardOutput(str(tmp_path), "data").number == 1
+
+
+@pytest.mark.parametrize("dtype", ["uint8", "float32"])
+def test_memmap_frames_are_read_back(tmp_path, dtype):
+    header = ["index", "object", "light_x", "energy"]
+    output = MemmapOutput(str(tmp_path), "shard-000", ["normal", "depth"], (10, 14), (3, 2), header, dtype)
+    rng = np.random.default_rng(0)
+    frames = {index: rng.random((2, 3, 4), dtype=np.float32) for index in (10, 12)}
+    for index, pixels in frames.items():
+        paths = output.write(index, {"normal": pixels})
+        output.add_row(index, [index, "a", index / 2, 100])
+    output.write(12, {"depth": frames[12]})
+    output.close()
+    assert paths == {"normal": str(tmp_path / "tensors/shard-000.normal.npy")}
+
+    layout = json.loads((tmp_path / "tensors/shard-000.json").read_text())
+    assert (layout["first_index"], layout["frames"], layout["shape"]) == (10, 4, [2, 3, 4])
+    assert layout["params"]["columns"] == ["light_x", "energy"]
+
+    written = np.load(tmp_path / "tensors" / layout["written"]["file"], mmap_mode="r")
+    assert written.tolist() == [[1, 0], [0, 0], [1, 1], [0, 0]]
+    normal = np.load(tmp_path / "tensors" / layout["styles"]["normal"], mmap_mode="r")
+    assert normal.shape == (4, 2, 3, 4) and normal.dtype == np.dtype(dtype)
+    for index, pixels in frames.items():
+        expected = ImageWriter.to_uint8(pixels[::-1]) if dtype == "uint8" else pixels[::-1]
+        np.testing.assert_array_equal(normal[index - 10], expected)
+    params = np.load(tmp_path / "tensors" / layout["params"]["file"], mmap_mode="r")
+    assert params[[0, 2]].tolist() == [[5, 100], [6, 100]]
+    assert np.isnan(params[[1, 3]]).all()
+
+
+def test_memmap_is_reused_on_resume(tmp_path):
+    args = (str(tmp_path), "shard-000", ["normal"], (0, 2), (2, 2), ["index"])
+    output = MemmapOutput(*args)
+    output.write(1, {"normal": np.ones((2, 2, 4))})
+    output.close()
+    output = MemmapOutput(*args)
+    assert output.written[:, 0].tolist() == [0, 1]
+    with pytest.raises(ValueError):
+        output.write(0, {"normal": np.ones((3, 2, 4))})
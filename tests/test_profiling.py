@@ -0,0 +1,92 @@
+import csv
+import json
+import random
+
+import pytest
+
+from gentool.profiling import DISABLED, StageStats, StageTimer, percentile
+
+
+@pytest.mark.parametrize("q, expected", [(0, 1), (10, 1), (50, 5), (90, 9), (99, 10), (100, 10)])
+def test_percentile_nearest_rank(q, expected):
+    assert percentile(list(range(1, 11)), q) == expected
+
+
+def test_percentile_rank_is_not_rounded_away():
+    values = list(range(1, 101))
+    assert [percentile(values, q) for q in (7, 29, 50, 99)] == [7, 29, 50, 99]
+
+
+def test_percentile_edges():
+    assert percentile([], 50) == 0.0
+    assert percentile([3.5], 0) == percentile([3.5], 100) == 3.5
+
+
+def test_stats_are_exact_below_the_reservoir_size():
+    durations = [random.Random(1).random() for _ in range(500)]
+    stats = StageStats()
+    for duration in durations:
+        stats.add(duration)
+    summary = stats.summary()
+    values = sorted(durations)
+    assert summary["count"] == 500
+    assert summary["total"] == pytest.approx(sum(durations))
+    assert (summary["min"], summary["max"]) == (values[0], values[-1])
+    assert [summary["p50"], summary["p90"], summary["p99"]] == [percentile(values, q) for q in (50, 90, 99)]
+
+
+def test_stats_memory_is_bounded():
+    stats = StageStats()
+    for i in range(20 * StageStats.RESERVOIR_SIZE):
+        stats.add(i / 1000)
+    assert len(stats.reservoir) == StageStats.RESERVOIR_SIZE
+    summary = stats.summary()
+    assert summary["count"] == 20 * StageStats.RESERVOIR_SIZE
+    assert (summary["min"], summary["max"]) == (0, (20 * StageStats.RESERVOIR_SIZE - 1) / 1000)
+    # The sample is uniform: the median is close to the one of every duration.
+    assert summary["p50"] == pytest.approx(summary["max"] / 2, rel=0.1)
+    # Seeded: the same durations give the same summary.
+    other = StageStats()
+    for i in range(20 * StageStats.RESERVOIR_SIZE):
+        other.add(i / 1000)
+    assert other.summary() == summary
+
+
+def test_empty_stats():
+    assert StageStats().summary() == dict.fromkeys(StageTimer.COLUMNS, 0)
+
+
+def test_disabled_timer_records_nothing(tmp_path):
+    timer = StageTimer()
+    assert timer.stage("render:normal") is DISABLED
+    assert timer.frame(0) is DISABLED
+    with timer.stage("render:normal"):
+        pass
+    timer.save(str(tmp_path))
+    assert timer.summary() == {} and list(tmp_path.iterdir()) == []
+
+
+def test_timer_saves_every_stage(tmp_path):
+    timer = StageTimer(enabled=True)
+    for _ in range(3):
+        with timer.stage("render:normal"):
+            pass
+    with timer.stage("write"):
+        pass
+    timer.save(str(tmp_path), "shard-000.")
+
+    summary = json.loads((tmp_path / "shard-000.timing.json").read_text())
+    assert {name: stats["count"] for name, stats in summary.items()} == {"render:normal": 3, "write": 1}
+    with open(tmp_path / "shard-000.timing.csv", newline="") as fr:
+        rows = list(csv.reader(fr))
+    assert rows[0] == ["stage", *StageTimer.COLUMNS]
+    assert [row[:2] for row in rows[1:]] == [["render:normal", "3"], ["write", "1"]]
+
+
+def test_profiled_frames(tmp_path):
+    timer = StageTimer(profile_frames=(1, 2))
+    assert timer.frame(0) is DISABLED and timer.frame(2) is DISABLED
+    with timer.frame(1):
+        sum(range(100))
+    timer.save(str(tmp_path))
+    assert [p.name for p in tmp_path.iterdir()] == [StageTimer.PROFILE]
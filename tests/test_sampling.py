@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from gentool.sampling import SamplingEngine, Schedule
+
+CHUNK_SIZES = [1, 3, 4, 7, 4096]
+
+
+@pytest.fixture
+def config(config_data, load_config):
+    config_data["objects"][1]["material"] = {"kind": "dynamic_dynamic", "texture": "random"}
+    config_data["lights"].append({"kind": "rainbow_dynamic_light", "max_range": 2})
+    return load_config(config_data)
+
+
+def frames(schedule: Schedule, order) -> dict:
+    result = dict()
+    for index in order:
+        camera, locations, colors = schedule.frame(index)
+        texture, params = schedule.material(index)
+        result[index] = (np.array(camera), np.array(locations), np.array(colors), texture, np.array(params))
+    return result
+
+
+def assert_same_frames(a: dict, b: dict):
+    assert a.keys() == b.keys()
+    for index in a:
+        for x, y in zip(a[index], b[index]):
+            np.testing.assert_array_equal(x, y)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_same_seed_same_frames(config, chunk_size):
+    a = Schedule(SamplingEngine.from_config(config), chunk_size=chunk_size)
+    b = Schedule(SamplingEngine.from_config(config), chunk_size=chunk_size)
+    assert len(a) == 10
+    assert_same_frames(frames(a, range(len(a))), frames(b, range(len(b))))
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_frames_do_not_depend_on_the_access_order(config, chunk_size):
+    a = Schedule(SamplingEngine.from_config(config), chunk_size=chunk_size)
+    b = Schedule(SamplingEngine.from_config(config), chunk_size=chunk_size)
+    order = list(range(len(b)))
+    np.random.default_rng(0).shuffle(order)
+    assert_same_frames(frames(a, range(len(a))), frames(b, order))
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_saved_schedule_gives_the_same_frames(config, chunk_size, tmp_path):
+    schedule = Schedule(SamplingEngine.from_config(config), chunk_size=chunk_size)
+    path = str(tmp_path / "schedule.npz")
+    schedule.save(path)
+    loaded = Schedule.load(path, config)
+    assert loaded.chunk_size == chunk_size
+    assert loaded.chunks == schedule.chunks
+    assert_same_frames(frames(schedule, range(len(schedule))), frames(loaded, reversed(range(len(loaded)))))
+
+
+def test_other_seeds_give_other_frames(config):
+    a = Schedule(SamplingEngine.from_config(config))
+    b = Schedule(SamplingEngine.from_config(config, seed=config.seed + 1))
+    assert not np.array_equal(a.frame(0)[1], b.frame(0)[1])
+
+
+def test_objects_without_material_have_nan_params(config):
+    schedule = Schedule(SamplingEngine.from_config(config), chunk_size=3)
+    for index in range(len(schedule)):
+        _, params = schedule.material(index)
+        # Object "a" has the frames 0 to 4 and no material.
+        assert np.isnan(params).all() == (index < 5)
+
+
+def test_loaded_schedule_rejects_a_changed_config(config, tmp_path):
+    path = str(tmp_path / "schedule.npz")
+    Schedule(SamplingEngine.from_config(config), chunk_size=4).save(path)
+    config.lights[0].max_range = 5
+    loaded = Schedule.load(path, config)
+    with pytest.raises(ValueError, match="differs from the saved one"):
+        loaded.frame(0)
+
+    config.viewpoints[0].amount = 9  # 18 frames, 5 chunks instead of 3
+    with pytest.raises(ValueError, match="the config changed"):
+        Schedule.load(path, config)
+
+
+def test_load_needs_the_config(config, tmp_path):
+    path = str(tmp_path / "schedule.npz")
+    Schedule(SamplingEngine.from_config(config)).save(path)
+    with pytest.raises(ValueError):
+        Schedule.load(path)
+
+
+def test_only_static_lights_keep_their_location(config_data, load_config):
+    config_data["lights"] = [
+        {"kind": "static", "color": [1, 1, 1], "location": [1, 2, 3]},
+        # Rainbow static lights are placed at random, the location is not used.
+        {"kind": "rainbow_static_light", "location": [1, 1, 1], "max_range": 2},
+    ]
+    schedule = SamplingEngine.from_config(load_config(config_data)).schedule()
+    locations = np.array([schedule.frame(index)[1] for index in range(len(schedule))])
+    assert (locations[:, 0] == [1, 2, 3]).all()
+    assert not (locations[:, 1] == [1, 1, 1]).all(axis=1).any()
+    assert (np.abs(locations[:, 1]) <= 2).all()
@@ -0,0 +1,66 @@
+import pytest
+
+from gentool import schema
+from gentool.basics import Material, Render
+from gentool.schema import ConfigError
+
+
+def test_valid_config_has_no_errors(config_data):
+    assert schema.validate(config_data) == []
+
+
+def test_load_builds_the_config(config_data):
+    loaded = schema.load(config_data)
+    assert isinstance(loaded["render"], Render)
+    assert loaded["render"].output == Render.Output.SEPARATE
+    assert [o.name for o in loaded["objects"]] == ["a", "b"]
+
+
+@pytest.mark.parametrize("change, path", [
+    (lambda d: d["render"].pop("resolution_x"), "$.render.resolution_x"),
+    (lambda d: d["render"].update(resolution_y=0), "$.render.resolution_y"),
+    (lambda d: d["render"].update(styles=["sepia"]), "$.render.styles[0]"),
+    (lambda d: d["render"].update(styles=["normal", "normal"]), "$.render.styles"),
+    (lambda d: d["render"].update(style_settings={"bogus": {}}), "$.render.style_settings.bogus"),
+    (lambda d: d["render"].update(style_settings={"normal": {"samples": 0}}), "$.render.style_settings.normal.samples"),
+    (lambda d: d["objects"][1].update(name="a/b"), "$.objects[1].name"),
+    (lambda d: d["objects"][0].update(material={"kind": "static_static"}), "$.objects[0].material.texture"),
+    (lambda d: d["lights"][0].update(color=[1, 0]), "$.lights[0].color"),
+    (lambda d: d["lights"][0].update(color=None), "$.lights[0].color"),
+    (lambda d: d["viewpoints"][0].update(amount=0), "$.viewpoints[0].amount"),
+    (lambda d: d["viewpoints"][0].update(subdivisions=9), "$.viewpoints[0].subdivisions"),
+    (lambda d: d.update(colour=1), "$.colour"),
+    (lambda d: d.update(render=None), "$.render"),
+    (lambda d: d.update(seed={"$sweep": [1, 2]}), "$.seed"),
+])
+def test_error_paths(config_data, change, path):
+    change(config_data)
+    assert [p for p, _ in schema.validate(config_data)] == [path]
+
+
+def test_every_error_is_reported(config_data):
+    config_data["render"]["resolution_x"] = -1
+    config_data["lights"][0]["kind"] = "sun"
+    with pytest.raises(ConfigError) as e:
+        schema.load(config_data, source="cfg.json")
+    assert [path for path, _ in e.value.errors] == ["$.render.resolution_x", "$.lights[0].kind"]
+    assert str(e.value).startswith("Invalid config cfg.json, 2 error(s):")
+
+
+def test_passes_settings_are_accepted(config_data):
+    config_data["render"]["output"] = Render.Output.MULTILAYER_EXR
+    config_data["render"]["style_settings"] = {Render.PASSES: {"samples": 20}}
+    assert schema.validate(config_data) == []
+
+
+def test_material_kind_defaults(config_data):
+    config_data["objects"][0]["material"] = {"texture": "wood"}
+    material = schema.load(config_data)["objects"][0].material
+    assert material.kind == Material.Kind.STATIC_TEXTURE_AND_PARAMS
+
+
+def test_to_json_round_trip(config_data):
+    loaded = schema.load(config_data)
+    data = {key: schema.to_json(value) for key, value in loaded.items()}
+    assert schema.validate(data) == []
+    assert schema.to_json(schema.load(data)["render"]) == data["render"]
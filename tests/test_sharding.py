@@ -0,0 +1,63 @@
+import pytest
+
+from gentool.sharding import ShardCoordinator, ShardPlanner
+
+
+@pytest.mark.parametrize("total, shards", [(10, 1), (10, 3), (10, 4), (10, 10), (3, 8), (0, 4), (4096, 7)])
+def test_split_covers_every_frame_once(total, shards):
+    result = ShardPlanner.split(total, shards)
+    assert all(a.stop == b.start for a, b in zip(result, result[1:]))
+    assert sum(len(s) for s in result) == total
+    assert result == [] or (result[0].start, result[-1].stop) == (0, total)
+    assert all(len(s) > 0 for s in result)
+    # Balanced: sizes differ by one at most, the bigger ones first.
+    sizes = [len(s) for s in result]
+    assert sizes == sorted(sizes, reverse=True)
+    assert not sizes or max(sizes) - min(sizes) <= 1
+
+
+def test_split_boundaries():
+    assert [(s.number, s.start, s.stop) for s in ShardPlanner.split(10, 4)] == [
+        (0, 0, 3), (1, 3, 6), (2, 6, 8), (3, 8, 10)
+    ]
+    # More shards than frames: the empty shards are dropped, numbers are kept.
+    assert [(s.number, s.start, s.stop) for s in ShardPlanner.split(2, 4)] == [(0, 0, 1), (1, 1, 2)]
+
+
+def test_split_needs_a_shard():
+    with pytest.raises(AssertionError):
+        ShardPlanner.split(10, 0)
+
+
+def test_plan_counts_every_object(config_data, load_config):
+    config = load_config(config_data)
+    assert ShardPlanner.count_frames(config) == 10
+    assert ShardPlanner.count_frames(config, preview=True) == 2
+    assert [len(s) for s in ShardPlanner.plan(config, 3)] == [4, 3, 3]
+
+
+def test_shard_file_names():
+    shard = ShardPlanner.split(100, 20)[12]
+    assert shard.csv_name == "data.shard-012.csv"
+    assert shard.manifest_name == "manifest.shard-012.jsonl"
+
+
+def test_merge_csv_keeps_every_frame_once(tmp_path):
+    (tmp_path / "data.csv").write_text("index,object\n0,a\n1,a\n")
+    (tmp_path / "data.shard-000.csv").write_text("index,object\n1,stale\n4,b\n")
+    (tmp_path / "data.shard-001.csv").write_text("index,object\n3,b\n2,a\n")
+
+    assert ShardCoordinator.merge_csv(str(tmp_path)) == 5
+    assert (tmp_path / "data.csv").read_text() == "index,object\n0,a\n1,a\n2,a\n3,b\n4,b\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["data.csv"]
+
+    # Merging again keeps the rows.
+    assert ShardCoordinator.merge_csv(str(tmp_path)) == 5
+
+
+def test_merge_csv_parses_quoted_fields(tmp_path):
+    (tmp_path / "data.shard-000.csv").write_text('index,object\n1,"b, c"\n0,"a\nd"\n', newline="")
+    (tmp_path / "data.shard-001.csv").write_text('index,object\n2,"say ""e"""\n', newline="")
+
+    assert ShardCoordinator.merge_csv(str(tmp_path)) == 3
+    assert (tmp_path / "data.csv").read_text() == 'index,object\n0,"a\nd"\n1,"b, c"\n2,"say ""e"""\n'
@@ -0,0 +1,89 @@
+import csv
+
+import pytest
+
+from gentool.sinks import CsvSink, MultiSink, ParquetSink
+
+HEADER = ["index", "object", "value"]
+
+
+def read_csv(path) -> list:
+    with open(path, newline="") as fr:
+        return list(csv.reader(fr))
+
+
+def test_csv_rows_are_written_by_batches(tmp_path):
+    path = tmp_path / "data.csv"
+    flushes = list()
+    sink = CsvSink(str(path), HEADER, batch_rows=2, flush_interval=3600, on_flush=lambda: flushes.append(1))
+
+    sink.write([0, "a", 0.5])
+    assert read_csv(path)[1:] == []
+    sink.write([1, "a", 1.5])
+    assert read_csv(path) == [HEADER, ["0", "a", "0.5"], ["1", "a", "1.5"]]
+    assert len(flushes) == 1
+
+    sink.write([2, "b", 2.5])
+    sink.close()
+    assert read_csv(path)[-1] == ["2", "b", "2.5"]
+    assert len(flushes) == 2
+    sink.close()  # closing again does nothing.
+
+
+def test_csv_flush_interval(tmp_path):
+    path = tmp_path / "data.csv"
+    sink = CsvSink(str(path), HEADER, batch_rows=1000, flush_interval=0)
+    sink.write([0, "a", 0.5])
+    assert len(read_csv(path)) == 2
+    sink.close()
+
+
+def test_csv_append_keeps_the_rows(tmp_path):
+    path = tmp_path / "data.csv"
+    sink = CsvSink(str(path), HEADER)
+    sink.write([0, "a", 0.5])
+    sink.close()
+
+    sink = CsvSink(str(path), HEADER, append=True)
+    sink.write([1, "a", 1.5])
+    sink.close()
+    assert read_csv(path) == [HEADER, ["0", "a", "0.5"], ["1", "a", "1.5"]]
+
+    # A new run overwrites the file.
+    CsvSink(str(path), HEADER).close()
+    assert read_csv(path) == [HEADER]
+
+
+def test_csv_append_to_a_missing_file_writes_the_header(tmp_path):
+    path = tmp_path / "data.csv"
+    sink = CsvSink(str(path), HEADER, append=True)
+    sink.write([0, "a", 0.5])
+    sink.close()
+    assert read_csv(path) == [HEADER, ["0", "a", "0.5"]]
+
+
+def test_parquet_sink(tmp_path):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.parquet  # noqa: F401
+
+    csv_path, parquet_path = tmp_path / "data.csv", tmp_path / "data.parquet"
+    sink = MultiSink([CsvSink(str(csv_path), HEADER), ParquetSink(str(parquet_path), HEADER)], batch_rows=2)
+    for i in range(5):
+        sink.write([i, "a", i + 0.5])
+    sink.close()
+
+    table = pyarrow.parquet.read_table(str(parquet_path))
+    assert table.column_names == HEADER
+    assert table.column("index").to_pylist() == list(range(5))
+    assert len(read_csv(csv_path)) == 6
+
+    # Parquet files can not be appended, the next run writes a sibling.
+    sink = ParquetSink(str(parquet_path), HEADER)
+    assert sink.path == str(tmp_path / "data.1.parquet")
+    sink.close()
+
+
+def test_parquet_sink_needs_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr("gentool.sinks.pyarrow", None)
+    with pytest.raises(ImportError):
+        ParquetSink(str(tmp_path / "data.parquet"), HEADER)
@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from gentool.schema import ConfigError
+from gentool.sweep import Sweep
+
+
+def test_config_without_sweeps_is_one_job(config_data):
+    sweep = Sweep(config_data)
+    assert sweep.axes == []
+    assert len(sweep) == 1
+
+
+def test_sweeps_of_different_fields_give_the_product(config_data):
+    config_data["lights"][0]["max_energy"] = {"$sweep": [10, 100, 1000]}
+    config_data["render"]["styles"] = {"$sweep": [["normal"], ["silhouette"]]}
+    sweep = Sweep(config_data)
+
+    jobs = list(sweep)
+    assert len(sweep) == len(jobs) == 6
+    values = [(job.data["render"]["styles"], job.data["lights"][0]["max_energy"]) for job in jobs]
+    # Axes follow the config order, the last one changes first.
+    assert values == [
+        (["normal"], 10), (["normal"], 100), (["normal"], 1000),
+        (["silhouette"], 10), (["silhouette"], 100), (["silhouette"], 1000),
+    ]
+    assert jobs[4].params == {"$.lights[0].max_energy": 100, "$.render.styles": ["silhouette"]}
+
+
+def test_zip_sweeps_change_together(config_data):
+    config_data["render"]["resolution_x"] = {"$sweep": [256, 512], "zip": "resolution"}
+    config_data["render"]["resolution_y"] = {"$sweep": [128, 256], "zip": "resolution"}
+    config_data["seed"] = {"$sweep": [1, 2, 3]}
+    sweep = Sweep(config_data)
+
+    assert len(sweep) == 6
+    resolutions = {(job.data["render"]["resolution_x"], job.data["render"]["resolution_y"]) for job in sweep}
+    assert resolutions == {(256, 128), (512, 256)}
+
+
+def test_zip_sweeps_must_have_the_same_length(config_data):
+    config_data["render"]["resolution_x"] = {"$sweep": [256, 512], "zip": "resolution"}
+    config_data["render"]["resolution_y"] = {"$sweep": [256], "zip": "resolution"}
+    with pytest.raises(ConfigError) as e:
+        Sweep(config_data)
+    assert [path for path, _ in e.value.errors] == ["$.render.resolution_x", "$.render.resolution_y"]
+
+
+@pytest.mark.parametrize("marker, path", [
+    ({"$sweep": []}, "$.seed.$sweep"),
+    ({"$sweep": 3}, "$.seed.$sweep"),
+    ({"$sweep": [1, {"$sweep": [2]}]}, "$.seed.$sweep"),
+    ({"$sweep": [1, 2], "zip": 4}, "$.seed.zip"),
+    ({"$sweep": [1, 2], "step": 1}, "$.seed.step"),
+])
+def test_malformed_sweeps(config_data, marker, path):
+    config_data["seed"] = marker
+    with pytest.raises(ConfigError) as e:
+        Sweep(config_data)
+    assert [p for p, _ in e.value.errors] == [path]
+
+
+def test_jobs_are_not_shared_with_the_sweep(config_data):
+    config_data["seed"] = {"$sweep": [1, 2]}
+    sweep = Sweep(config_data)
+    job = sweep.job(1)
+    assert job.data["seed"] == 2
+    assert config_data["seed"] == {"$sweep": [1, 2]}
+    with pytest.raises(IndexError):
+        sweep.job(2)
+
+
+def test_job_ids_only_depend_on_the_job_config(config_data):
+    config_data["seed"] = {"$sweep": [1, 2]}
+    ids = [job.id for job in Sweep(config_data)]
+    config_data["render"]["output_dir_path"] = "elsewhere"
+    assert [job.id for job in Sweep(config_data)] == ids
+    assert len(set(ids)) == 2
+
+    job = Sweep(config_data).job(0)
+    assert job.output_dir_path == os.path.join("elsewhere", job.id)
+    assert job.config().render.output_dir_path == job.output_dir_path
+
+
+def test_validate_groups_the_errors_of_the_jobs(config_data):
+    config_data["seed"] = {"$sweep": [1, 2, 3, 4, 5]}
+    config_data["render"]["resolution_x"] = {"$sweep": [0, 8]}
+    errors = Sweep(config_data).validate()
+    assert len(errors) == 1
+    path, message = errors[0]
+    assert path == "$.render.resolution_x"
+    assert message.endswith("and 2 more)")
+
+
+def test_plan_keeps_the_jobs_of_the_same_models_together(config_data):
+    config_data["objects"][0]["path"] = {"$sweep": ["a.obj", "c.obj"]}
+    config_data["seed"] = {"$sweep": [1, 2]}
+    sweep = Sweep(config_data)
+    plan = sweep.plan()
+    assert sorted(job.number for job in plan) == list(range(len(sweep)))
+    keys = [job.mesh_keys() for job in plan]
+    assert keys == sorted(keys, key=keys.index)
+    assert len(set(keys)) == 2
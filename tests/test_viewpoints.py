@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from gentool.basics import Viewpoint
+from gentool.viewpoints import (
+    ViewpointSource, count_sphere_coords, fibonacci_sphere, hemisphere, icosphere, latitude_bands, sphere_coords,
+    uv_sphere
+)
+
+
+def assert_on_sphere(coords: np.ndarray, radius: float):
+    np.testing.assert_allclose(np.linalg.norm(coords, axis=1), radius)
+
+
+def object_path(layout: str, **kwargs) -> Viewpoint:
+    return Viewpoint(kind=Viewpoint.Kind.OBJECT_PATH, layout=layout, size=2, **kwargs)
+
+
+@pytest.mark.parametrize("amount", [1, 2, 100])
+def test_fibonacci_sphere(amount):
+    coords = fibonacci_sphere(amount, 2)
+    assert coords.shape == (amount, 3)
+    assert_on_sphere(coords, 2)
+    assert len(np.unique(coords.round(9), axis=0)) == amount
+
+
+def test_fibonacci_sphere_covers_both_halves():
+    z = fibonacci_sphere(1000, 1)[:, 2]
+    assert abs((z > 0).sum() - (z < 0).sum()) <= 1
+
+
+@pytest.mark.parametrize("amount", [1, 50])
+def test_hemisphere(amount):
+    coords = hemisphere(amount, 3)
+    assert coords.shape == (amount, 3)
+    assert_on_sphere(coords, 3)
+    assert (coords[:, 2] > 0).all()
+
+
+@pytest.mark.parametrize("subdivisions", [0, 1, 2, 3])
+def test_icosphere(subdivisions):
+    coords = icosphere(subdivisions, 1.5)
+    assert coords.shape == (10 * 4 ** subdivisions + 2, 3)
+    assert_on_sphere(coords, 1.5)
+    # Edges shared by two faces get a single midpoint.
+    assert len(np.unique(coords.round(9), axis=0)) == len(coords)
+
+
+def test_latitude_bands():
+    coords = latitude_bands(4, 6, 2, min_elevation=0, max_elevation=80)
+    assert coords.shape == (24, 3)
+    assert_on_sphere(coords, 2)
+    elevations = np.degrees(np.arcsin(coords[:, 2] / 2)).reshape(4, 6)
+    np.testing.assert_allclose(elevations, [[10] * 6, [30] * 6, [50] * 6, [70] * 6])
+
+
+def test_uv_sphere():
+    coords = uv_sphere(8, 4, 2)
+    assert coords.shape == (8 * 3 + 2, 3)
+    assert_on_sphere(coords, 2)
+    np.testing.assert_allclose(coords[[0, -1]], [[0, 0, 2], [0, 0, -2]])
+
+
+@pytest.mark.parametrize("v", [
+    object_path(Viewpoint.Layout.UV_SPHERE, horizontal_divisions=16, vertical_divisions=8),
+    object_path(Viewpoint.Layout.FIBONACCI, amount=37),
+    object_path(Viewpoint.Layout.HEMISPHERE, amount=12),
+    object_path(Viewpoint.Layout.ICOSPHERE, subdivisions=2),
+    object_path(Viewpoint.Layout.LATITUDE_BANDS, horizontal_divisions=5, vertical_divisions=3),
+])
+def test_count_sphere_coords(v):
+    coords = sphere_coords(v)
+    assert count_sphere_coords(v) == len(coords)
+    assert_on_sphere(coords, 2)
+
+
+@pytest.fixture
+def viewpoints():
+    return [
+        Viewpoint().dynamic_camera_viewpoint(amount=7, max_range=3),
+        Viewpoint().static_camera_viewpoint(location=[1, 2, 3], amount=2),
+        object_path(Viewpoint.Layout.FIBONACCI, amount=5),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 10, 4096])
+def test_source_chunks_are_deterministic(viewpoints, chunk_size):
+    a = ViewpointSource(viewpoints, objects=3, seed=5, chunk_size=chunk_size)
+    b = ViewpointSource(viewpoints, objects=3, seed=5, chunk_size=chunk_size)
+    assert len(a) == 3 * 14
+
+    coords = np.concatenate(list(a.chunks()))
+    assert coords.shape == (len(a), 3)
+    # Any chunk, in any order, is computed again with the same values.
+    for number in reversed(range(-(-len(b) // chunk_size))):
+        np.testing.assert_array_equal(b.chunk(number), coords[number * chunk_size:(number + 1) * chunk_size])
+    np.testing.assert_array_equal([b[index] for index in range(len(b))], coords)
+    assert list(a) == [tuple(c) for c in coords.tolist()]
+
+
+def test_source_frames_follow_the_viewpoints(viewpoints):
+    source = ViewpointSource(viewpoints, objects=2, seed=5, chunk_size=4)
+    coords = np.array([source[index] for index in range(len(source))]).reshape(2, 14, 3)
+    assert (np.abs(coords[:, :7]) <= 3).all()
+    assert (coords[:, 7:9] == [1, 2, 3]).all()
+    np.testing.assert_allclose(coords[:, 9:], [fibonacci_sphere(5, 2)] * 2)
+    # Random cameras are drawn again for every object.
+    assert not np.array_equal(coords[0, :7], coords[1, :7])
+    assert source[-1].tolist() == source[len(source) - 1].tolist()
+    with pytest.raises(IndexError):
+        source[len(source)]
+
+
+def test_source_preview_and_seeds(viewpoints):
+    preview = ViewpointSource(viewpoints, objects=2, seed=5, preview=True)
+    assert preview.frames_per_object == 1 and len(preview) == 2
+    a, b = ViewpointSource(viewpoints, 1, seed=5), ViewpointSource(viewpoints, 1, seed=6)
+    assert not np.array_equal(a.chunk(0), b.chunk(0))
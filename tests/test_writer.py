@@ -0,0 +1,129 @@
+import struct
+import threading
+import zlib
+
+import numpy as np
+import pytest
+
+from gentool.manifest import PNG_SIGNATURE, is_valid_image
+from gentool.writer import ImageWriter, encode_png, linear_to_srgb
+
+
+def decode_png(data: bytes) -> np.ndarray:
+    """
+    Decode the pngs encode_png writes: 8 bit, a single IDAT, rows without filter.
+    """
+    assert data.startswith(PNG_SIGNATURE)
+    chunks, position = dict(), len(PNG_SIGNATURE)
+    while position < len(data):
+        size, = struct.unpack(">I", data[position:position + 4])
+        kind, content = data[position + 4:position + 8], data[position + 8:position + 8 + size]
+        crc, = struct.unpack(">I", data[position + 8 + size:position + 12 + size])
+        assert crc == zlib.crc32(kind + content) & 0xFFFFFFFF
+        chunks[kind] = content
+        position += size + 12
+    width, height, depth, color_type = struct.unpack(">IIBB", chunks[b"IHDR"][:10])
+    channels = {0: 1, 4: 2, 2: 3, 6: 4}[color_type]
+    assert depth == 8 and b"IEND" in chunks
+    rows = np.frombuffer(zlib.decompress(chunks[b"IDAT"]), dtype=np.uint8).reshape(height, -1)
+    assert (rows[:, 0] == 0).all()
+    return rows[:, 1:].reshape(height, width, channels)
+
+
+@pytest.mark.parametrize("channels", [1, 2, 3, 4])
+@pytest.mark.parametrize("compression", [0, 9])
+def test_encode_png(tmp_path, channels, compression):
+    pixels = np.random.default_rng(channels).integers(0, 256, (5, 7, channels), dtype=np.uint8)
+    data = encode_png(pixels, compression)
+    np.testing.assert_array_equal(decode_png(data), pixels)
+
+    path = tmp_path / "a.png"
+    path.write_bytes(data)
+    assert is_valid_image(str(path))
+
+
+def test_prepare_flips_crops_and_resizes():
+    pixels = np.arange(4 * 6).reshape(4, 6, 1)
+    np.testing.assert_array_equal(ImageWriter().prepare(pixels), pixels[::-1])
+
+    cropped = ImageWriter(crop=(1, 0, 3, 2)).prepare(pixels)
+    np.testing.assert_array_equal(cropped[..., 0], [[19, 20, 21], [13, 14, 15]])
+
+    resized = ImageWriter(resize=(3, 2)).prepare(pixels)
+    np.testing.assert_array_equal(resized[..., 0], [[18, 20, 22], [6, 8, 10]])
+
+    both = ImageWriter(crop=(0, 0, 4, 4), resize=(2, 2)).prepare(pixels)
+    np.testing.assert_array_equal(both[..., 0], [[18, 20], [6, 8]])
+
+
+def test_to_uint8_keeps_the_alpha_linear():
+    pixels = np.array([[[0.0, 0.5, 2.0, 0.5]]])
+    expected = [0, int(linear_to_srgb(np.array(0.5)) * 255 + 0.5), 255, 128]
+    assert ImageWriter.to_uint8(pixels).tolist() == [[expected]]
+
+
+@pytest.mark.parametrize("image_format", [ImageWriter.Format.PNG, ImageWriter.Format.NPY, ImageWriter.Format.RAW])
+def test_submit_writes_every_image(tmp_path, image_format):
+    pixels = np.random.default_rng(0).random((4, 3, 4), dtype=np.float32)
+    writer = ImageWriter(image_format, workers=2, max_pending=2)
+    paths = [writer.submit(str(tmp_path / f"{i}"), pixels) for i in range(10)]
+    writer.close()
+
+    assert paths == [str(tmp_path / f"{i}.{image_format}") for i in range(10)]
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(f"{i}.{image_format}" for i in range(10))
+    content = (tmp_path / f"0.{image_format}").read_bytes()
+    assert content == writer.encode(pixels)
+    if image_format == ImageWriter.Format.NPY:
+        np.testing.assert_array_equal(np.load(tmp_path / "0.npy"), pixels[::-1])
+    elif image_format == ImageWriter.Format.PNG:
+        np.testing.assert_array_equal(decode_png(content), ImageWriter.to_uint8(pixels[::-1]))
+
+
+def test_submit_blocks_while_the_queue_is_full(tmp_path, monkeypatch):
+    release = threading.Event()
+    encode = ImageWriter.encode
+
+    def slow_encode(self, pixels):
+        release.wait()
+        return encode(self, pixels)
+
+    monkeypatch.setattr(ImageWriter, "encode", slow_encode)
+    writer = ImageWriter(workers=1, max_pending=2)
+    pixels = np.zeros((2, 2, 3), dtype=np.float32)
+    writer.submit(str(tmp_path / "0"), pixels)
+    writer.submit(str(tmp_path / "1"), pixels)
+
+    third = threading.Thread(target=writer.submit, args=(str(tmp_path / "2"), pixels))
+    third.start()
+    third.join(0.2)
+    assert third.is_alive()  # waits for a free slot.
+    release.set()
+    third.join(5)
+    assert not third.is_alive()
+    writer.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["0.png", "1.png", "2.png"]
+
+
+def test_errors_reach_the_caller(tmp_path):
+    writer = ImageWriter()
+    pixels = np.zeros((2, 2, 3), dtype=np.float32)
+    writer.submit(str(tmp_path / "missing" / "0"), pixels)
+    with pytest.raises(FileNotFoundError):
+        writer.flush()
+    writer.flush()  # an error is raised once.
+
+    writer.submit(str(tmp_path / "missing" / "1"), pixels)
+    with pytest.raises(FileNotFoundError):
+        writer.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_next_submit_raises_a_previous_error(tmp_path):
+    writer = ImageWriter(workers=1)
+    pixels = np.zeros((2, 2, 3), dtype=np.float32)
+    writer.submit(str(tmp_path / "missing" / "0"), pixels)
+    writer.executor.submit(lambda: None).result()  # the failed write is done.
+    with pytest.raises(FileNotFoundError):
+        writer.submit(str(tmp_path / "1"), pixels)
+    writer.close()
+    assert not (tmp_path / "1.png").exists()